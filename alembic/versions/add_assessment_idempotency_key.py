@@ -0,0 +1,30 @@
+"""Add an idempotency key to assessment_results for webhook retries
+
+Revision ID: add_assessment_idempotency_key
+Revises: add_results_completed_at_idx
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_assessment_idempotency_key'
+down_revision = 'add_results_completed_at_idx'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # create_all on an app start may have made the table with the column already
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('assessment_results')}
+    if 'idempotency_key' not in columns:
+        op.add_column('assessment_results', sa.Column('idempotency_key', sa.String(length=100), nullable=True))
+    # Unique so webhook inserts can skip already-recorded results with ON CONFLICT DO NOTHING
+    op.create_index(
+        'uq_assessment_results_idempotency_key', 'assessment_results', ['idempotency_key'], unique=True,
+        if_not_exists=True
+    )
+
+def downgrade():
+    op.drop_index('uq_assessment_results_idempotency_key', table_name='assessment_results')
+    op.drop_column('assessment_results', 'idempotency_key')
@@ -0,0 +1,24 @@
+"""Index assessment_results.completed_at for the streamed CSV export
+
+Revision ID: add_results_completed_at_idx
+Revises: add_hot_lookup_indexes
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_results_completed_at_idx'
+down_revision = 'add_hot_lookup_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Lets the export stream newest-first without sorting the whole table first;
+    # if_not_exists as create_all makes it along with a new assessment_results
+    op.create_index('ix_assessment_results_completed_at', 'assessment_results', ['completed_at'],
+                    if_not_exists=True)
+
+def downgrade():
+    op.drop_index('ix_assessment_results_completed_at', table_name='assessment_results')
@@ -0,0 +1,34 @@
+"""Add cohort_stats for per-class analytics
+
+Revision ID: add_cohort_stats
+Revises: add_stat_counters
+Create Date: 2026-10-17 23:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_cohort_stats'
+down_revision = 'add_stat_counters'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Filled from the source tables on the app's next start, or with
+    # python reconcile_stats.py --fix. create_all on an app start may have
+    # made it already.
+    if 'cohort_stats' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'cohort_stats',
+        sa.Column('class_label', sa.String(length=50), nullable=False),
+        sa.Column('metric', sa.String(length=30), nullable=False),
+        sa.Column('key', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('class_label', 'metric', 'key')
+    )
+
+def downgrade():
+    op.drop_table('cohort_stats')
@@ -0,0 +1,85 @@
+"""Add indexes for hot lookups in routes and ReportService
+
+Revision ID: add_hot_lookup_indexes
+Revises: add_assessment_fields
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_hot_lookup_indexes'
+down_revision = 'add_assessment_fields'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # The module assessment tables were only ever created by create_all on
+    # startup; create them here so a fresh `alembic upgrade head` is complete.
+    existing_tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'module_assessments' not in existing_tables:
+        op.create_table('module_assessments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('module_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('questions', sa.Text(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['module_id'], ['modules.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'module_assessment_attempts' not in existing_tables:
+        op.create_table('module_assessment_attempts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('assessment_id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('answers', sa.Text(), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('percentage', sa.Integer(), nullable=False),
+        sa.Column('stars_earned', sa.Integer(), nullable=False),
+        sa.Column('time_taken', sa.Integer(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['assessment_id'], ['module_assessments.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    # if_not_exists: create_all makes the models' indexes along with new tables
+
+    # Dashboard, report, module detail/complete and assessment submit
+    op.create_index('ix_enrollment_progress_student_module', 'enrollment_progress',
+                    ['student_id', 'module_id'], if_not_exists=True)
+
+    # Latest assessment per student (dashboard, report, /assessment/complete)
+    op.create_index('ix_assessment_results_student_completed', 'assessment_results',
+                    ['student_id', 'completed_at'], if_not_exists=True)
+
+    # Latest attempt per student + assessment (show_module_assessment)
+    op.create_index('ix_module_assessment_attempts_student_assessment_completed',
+                    'module_assessment_attempts',
+                    ['student_id', 'assessment_id', 'completed_at'], if_not_exists=True)
+
+    # Active assessment for a module (submit_module_assessment)
+    op.create_index('ix_module_assessments_module_active', 'module_assessments',
+                    ['module_id', 'is_active'], if_not_exists=True)
+
+    # Published catalog ordered by week
+    op.create_index('ix_modules_published_week', 'modules', ['is_published', 'week_no'], if_not_exists=True)
+
+    # register_student duplicate checks and parent_login
+    op.create_index('ix_students_parent_email', 'students', ['parent_email'], if_not_exists=True)
+    op.create_index('ix_students_lower_first_name_age', 'students',
+                    [sa.text('lower(first_name)'), 'age'], if_not_exists=True)
+
+def downgrade():
+    op.drop_index('ix_students_lower_first_name_age', table_name='students')
+    op.drop_index('ix_students_parent_email', table_name='students')
+    op.drop_index('ix_modules_published_week', table_name='modules')
+    op.drop_index('ix_module_assessments_module_active', table_name='module_assessments')
+    op.drop_index('ix_module_assessment_attempts_student_assessment_completed',
+                  table_name='module_assessment_attempts')
+    op.drop_index('ix_assessment_results_student_completed', table_name='assessment_results')
+    op.drop_index('ix_enrollment_progress_student_module', table_name='enrollment_progress')
@@ -0,0 +1,37 @@
+"""Add stat_counters for the admin dashboard's row counts
+
+Revision ID: add_stat_counters
+Revises: add_student_directory_indexes
+Create Date: 2026-10-17 21:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_stat_counters'
+down_revision = 'add_student_directory_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # create_all on an app start may have made (and the app seeded) it already
+    if 'stat_counters' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'stat_counters',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name', 'shard')
+    )
+    # Start from the real counts; the app keeps them current from here
+    op.execute("""
+        INSERT INTO stat_counters (name, shard, value)
+        SELECT 'students', 0, count(*) FROM students
+        UNION ALL SELECT 'modules', 0, count(*) FROM modules
+        UNION ALL SELECT 'assessment_results', 0, count(*) FROM assessment_results
+    """)
+
+def downgrade():
+    op.drop_table('stat_counters')
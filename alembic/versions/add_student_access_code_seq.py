@@ -0,0 +1,22 @@
+"""Add the sequence behind generated student access codes
+
+Revision ID: add_student_access_code_seq
+Revises: add_webhook_outbox
+Create Date: 2026-10-17 19:30:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers
+revision = 'add_student_access_code_seq'
+down_revision = 'add_webhook_outbox'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Steps by 64: each value reserves a block of codes for one app process.
+    # IF NOT EXISTS: create_all on an app start may have made it already
+    op.execute("CREATE SEQUENCE IF NOT EXISTS student_access_code_seq INCREMENT BY 64 MINVALUE 0 START WITH 0")
+
+def downgrade():
+    op.execute("DROP SEQUENCE student_access_code_seq")
@@ -0,0 +1,38 @@
+"""Add indexes for the paginated, searchable admin student directory
+
+Revision ID: add_student_directory_indexes
+Revises: add_student_access_code_seq
+Create Date: 2026-10-17 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_student_directory_indexes'
+down_revision = 'add_student_access_code_seq'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # if_not_exists: create_all makes the models' indexes along with new tables
+
+    # Newest-first keyset pages
+    op.create_index('ix_students_created_at_id', 'students', ['created_at', 'id'], if_not_exists=True)
+
+    # Prefix search; text_pattern_ops lets LIKE 'abc%' use the index under any collation
+    op.create_index('ix_students_lower_first_name_pattern', 'students',
+                    [sa.text('lower(first_name) text_pattern_ops')], if_not_exists=True)
+    op.create_index('ix_students_lower_parent_email_pattern', 'students',
+                    [sa.text('lower(parent_email) text_pattern_ops')], if_not_exists=True)
+    op.create_index('ix_students_access_code_pattern', 'students',
+                    [sa.text('access_code text_pattern_ops')], if_not_exists=True)
+    op.create_index('ix_students_lower_class_label_pattern', 'students',
+                    [sa.text('lower(class_label) text_pattern_ops')], if_not_exists=True)
+
+def downgrade():
+    op.drop_index('ix_students_lower_class_label_pattern', table_name='students')
+    op.drop_index('ix_students_access_code_pattern', table_name='students')
+    op.drop_index('ix_students_lower_parent_email_pattern', table_name='students')
+    op.drop_index('ix_students_lower_first_name_pattern', table_name='students')
+    op.drop_index('ix_students_created_at_id', table_name='students')
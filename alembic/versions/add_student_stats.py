@@ -0,0 +1,38 @@
+"""Add student_stats for per-student star and progress totals
+
+Revision ID: add_student_stats
+Revises: add_cohort_stats
+Create Date: 2026-10-17 23:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_student_stats'
+down_revision = 'add_cohort_stats'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Filled from the source tables on the app's next start, or with
+    # python reconcile_stats.py --fix. create_all on an app start may have
+    # made it already.
+    if 'student_stats' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'student_stats',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('module_stars', sa.Integer(), nullable=False),
+        sa.Column('assessment_stars', sa.Integer(), nullable=False),
+        sa.Column('total_stars', sa.Integer(), sa.Computed('module_stars + assessment_stars'), nullable=True),
+        sa.Column('modules_completed', sa.Integer(), nullable=False),
+        sa.Column('latest_assessment_id', sa.Integer(), nullable=True),
+        sa.Column('latest_assessment_at', sa.DateTime(), nullable=True),
+        sa.Column('last_activity_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('student_id')
+    )
+
+def downgrade():
+    op.drop_table('student_stats')
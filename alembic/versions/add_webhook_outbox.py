@@ -0,0 +1,32 @@
+"""Add the webhook_outbox table for accept-then-persist webhooks
+
+Revision ID: add_webhook_outbox
+Revises: add_assessment_idempotency_key
+Create Date: 2026-10-17 18:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_webhook_outbox'
+down_revision = 'add_assessment_idempotency_key'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # create_all on an app start may have made it already
+    if 'webhook_outbox' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'webhook_outbox',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+def downgrade():
+    op.drop_table('webhook_outbox')
@@ -0,0 +1,139 @@
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+import time
+import zlib
+from .metrics import CompressionMetrics, compression_metrics
+from .services.http_cache import negotiate_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies worth compressing; images and archives are compressed already
+COMPRESSIBLE_TYPES = {
+    "text/html", "text/plain", "text/csv", "text/css", "text/javascript",
+    "application/json", "application/javascript", "application/pdf", "image/svg+xml"
+}
+# Server preference when the client accepts several equally
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+class _Encoder:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._compressor.process
+        else:
+            # wbits 31: gzip container
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+        self.encoding = encoding
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.elapsed_ms = 0.0
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        start = time.perf_counter()
+        out = self._compress(data)
+        if last:
+            out += self._compressor.finish() if self.encoding == "br" else self._compressor.flush()
+        self.elapsed_ms += (time.perf_counter() - start) * 1000
+        self.bytes_in += len(data)
+        self.bytes_out += len(out)
+        return out
+
+class CompressionMiddleware:
+    """
+    Compresses text responses (pages, JSON, CSV, PDF reports) of at least
+    minimum_size bytes with the best coding the client accepts: brotli when
+    the brotli package is installed, otherwise gzip. Streamed bodies are
+    compressed chunk by chunk. Responses that already have a
+    Content-Encoding, such as precompressed static files, pass through.
+
+    A compressed body is a different representation, so a strong ETag on it
+    is sent weak (as nginx does); etag_matches compares weakly, so the
+    route's own validator still matches on the next request.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        metrics: CompressionMetrics = compression_metrics
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.metrics = metrics
+
+    @staticmethod
+    def compressible(headers: Headers) -> bool:
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return (
+            media_type in COMPRESSIBLE_TYPES
+            and "content-encoding" not in headers
+            and "no-transform" not in headers.get("cache-control", "")
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), ENCODINGS)
+        start_message = None
+        encoder: Optional[_Encoder] = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    # Sent with the headers the 200 would have had
+                    MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                    await send(message)
+                elif message["status"] == 204 or not self.compressible(Headers(raw=message["headers"])):
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether it's worth it
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or (start_message is None and encoder is None):
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                # Even an identity body depends on Accept-Encoding for shared caches
+                headers.add_vary_header("Accept-Encoding")
+                if encoding is None or (not more_body and len(body) < self.minimum_size):
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                body = encoder.compress(body, last=not more_body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start_message)
+                start_message = None
+            else:
+                body = encoder.compress(body, last=not more_body)
+
+            await send({**message, "body": body})
+            if not more_body:
+                self.metrics.observe(encoding, encoder.bytes_in, encoder.bytes_out, encoder.elapsed_ms)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,10 +12,73 @@ class Settings:
     WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "webhook-secret")
     PORT: int = int(os.getenv("PORT", "8000"))
     
+    # Keys the access code permutation; changing it once codes are issued can
+    # produce codes that clash with existing ones (caught, but wasteful)
+    ACCESS_CODE_KEY: str = os.getenv("ACCESS_CODE_KEY") or SECRET_KEY
+    
     # Railway deployment check
     RAILWAY_ENVIRONMENT: str = os.getenv("RAILWAY_ENVIRONMENT", "development")
     
     SESSION_COOKIE_NAME: str = "session"
     SESSION_MAX_AGE: int = 86400 * 7  # 7 days
+    
+    # Seconds a cached module catalog snapshot is trusted before reloading
+    MODULE_CATALOG_TTL: int = int(os.getenv("MODULE_CATALOG_TTL", "60"))
+    
+    # Compiled module assessments kept in memory (LRU)
+    ASSESSMENT_CACHE_SIZE: int = int(os.getenv("ASSESSMENT_CACHE_SIZE", "256"))
+    
+    # Verified session cookies and Student rows kept per process (0 TTL disables)
+    PRINCIPAL_CACHE_TTL: int = int(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    
+    # PDF report rendering: process pool size and cache of rendered reports
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", "2"))
+    PDF_CACHE_SIZE: int = int(os.getenv("PDF_CACHE_SIZE", "512"))
+    PDF_CACHE_TTL: int = int(os.getenv("PDF_CACHE_TTL", "86400"))
+
+    # Connection pool, per worker process. Size workers so that
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below max_connections.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    
+    # Set when DATABASE_URL points at a transaction-mode pooler (PgBouncer,
+    # Supavisor); disables asyncpg's prepared statement caches
+    DB_POOLER_MODE: bool = os.getenv("DB_POOLER_MODE", "false").lower() == "true"
+
+    # What startup does about the schema: "check" only compares the Alembic
+    # revision with the shipped migrations (`alembic upgrade head` runs before
+    # each deploy); "create_all" creates missing tables from the models, for
+    # databases that were never migrated
+    DB_SCHEMA_STARTUP: str = os.getenv("DB_SCHEMA_STARTUP", "check").lower()
+
+    # Compiled templates are cached here as bytecode so new workers start warm;
+    # auto-reload re-checks template files on every render (development only)
+    TEMPLATE_CACHE_DIR: str = os.getenv("TEMPLATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "cifix-jinja"))
+    TEMPLATE_AUTO_RELOAD: bool = os.getenv(
+        "TEMPLATE_AUTO_RELOAD", str(RAILWAY_ENVIRONMENT == "development")
+    ).lower() == "true"
+
+    # Gzip (or brotli, when installed) for text responses of at least this many bytes
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+    # Prometheus text at /metrics, and X-Query-Count / X-DB-Time-Ms response headers
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_DEBUG_HEADERS: bool = os.getenv("METRICS_DEBUG_HEADERS", "false").lower() == "true"
+
+    # Most results accepted by one /assessment/webhook/batch call
+    WEBHOOK_BATCH_LIMIT: int = int(os.getenv("WEBHOOK_BATCH_LIMIT", "1000"))
+
+    # Accept webhooks into the webhook_outbox table (202) and ingest them in the
+    # background; past WEBHOOK_OUTBOX_LIMIT pending rows senders get 503
+    WEBHOOK_ASYNC: bool = os.getenv("WEBHOOK_ASYNC", "false").lower() == "true"
+    WEBHOOK_OUTBOX_LIMIT: int = int(os.getenv("WEBHOOK_OUTBOX_LIMIT", "10000"))
+    WEBHOOK_OUTBOX_BATCH: int = int(os.getenv("WEBHOOK_OUTBOX_BATCH", "500"))
+    WEBHOOK_OUTBOX_POLL_SECONDS: float = float(os.getenv("WEBHOOK_OUTBOX_POLL_SECONDS", "1"))
+    WEBHOOK_OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("WEBHOOK_OUTBOX_MAX_ATTEMPTS", "5"))
 
 settings = Settings()
\ No newline at end of file
@@ -3,32 +3,51 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from itsdangerous import URLSafeTimedSerializer
 from typing import Optional
+import time
 from .models import async_session, Student
 from .config import settings
+from .services.principal_cache import StudentSnapshot, session_cache, student_cache
+
+_serializer = URLSafeTimedSerializer(settings.SECRET_KEY)
 
 async def get_db():
     async with async_session() as session:
         yield session
 
 def get_serializer():
-    return URLSafeTimedSerializer(settings.SECRET_KEY)
+    return _serializer
 
 def get_session_data(request: Request) -> Optional[dict]:
-    serializer = get_serializer()
     cookie_value = request.cookies.get(settings.SESSION_COOKIE_NAME)
     
     if not cookie_value:
         return None
     
+    session_data = session_cache.get(cookie_value)
+    if session_data is not None:
+        return session_data
+    
     try:
-        return serializer.loads(cookie_value, max_age=settings.SESSION_MAX_AGE)
+        session_data, signed_at = _serializer.loads(
+            cookie_value, max_age=settings.SESSION_MAX_AGE, return_timestamp=True
+        )
     except:
         return None
+    
+    # Never trust the memoised result past the cookie's own expiry
+    remaining = settings.SESSION_MAX_AGE - (time.time() - signed_at.timestamp())
+    session_cache.set(cookie_value, session_data, ttl=remaining)
+    return session_data
+
+def forget_session(request: Request):
+    cookie_value = request.cookies.get(settings.SESSION_COOKIE_NAME)
+    if cookie_value:
+        session_cache.pop(cookie_value)
 
 async def get_current_student(
     request: Request, 
     db: AsyncSession = Depends(get_db)
-) -> Optional[Student]:
+) -> Optional[StudentSnapshot]:
     session_data = get_session_data(request)
     if not session_data or session_data.get("type") != "student":
         return None
@@ -37,14 +56,24 @@ async def get_current_student(
     if not student_id:
         return None
     
+    student = student_cache.get(student_id)
+    if student is not None:
+        return student
+    
     stmt = select(Student).where(Student.id == student_id)
     result = await db.execute(stmt)
-    return result.scalar_one_or_none()
+    row = result.scalar_one_or_none()
+    if not row:
+        return None
+    
+    student = StudentSnapshot.from_model(row)
+    student_cache.set(student_id, student)
+    return student
 
 async def require_student(
     request: Request, 
     db: AsyncSession = Depends(get_db)
-) -> Student:
+) -> StudentSnapshot:
     student = await get_current_student(request, db)
     if not student:
         raise HTTPException(
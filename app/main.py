@@ -1,25 +1,47 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 
 from .routes import public, student, parent, admin, assessment, module_assessment
-from .models import engine, Base
-from .templates_config import templates
+from .models import engine, Base, async_session
+from .templates_config import precompile_templates
+from .services.pdf_renderer import pdf_renderer
+from .services.webhook_outbox import webhook_outbox
+from .services.counters import CounterService
+from .services.cohort_analytics import CohortAnalytics
+from .services.student_stats import StudentStatsService
+from .services.static_assets import AssetFiles, STATIC_DIR
+from .services.schema_check import check_schema
+from .config import settings
+from .metrics import MetricsMiddleware, install_query_tracking, render_prometheus
+from .compression import CompressionMiddleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Parse every template now (or load its bytecode) rather than on first use
+    precompile_templates()
     try:
-        # Create database tables
         async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        print("Database tables created successfully")
+            if settings.DB_SCHEMA_STARTUP == "check":
+                problem = await check_schema(conn)
+                print(f"Database schema out of date: {problem}" if problem else "Database schema is at head")
+            else:
+                # Create database tables
+                await conn.run_sync(Base.metadata.create_all)
+                print("Database tables created successfully")
+        async with async_session() as db:
+            await CounterService.initialize(db)
+            await CohortAnalytics.initialize(db)
+            await StudentStatsService.initialize(db)
     except Exception as e:
         print(f"Database connection failed: {e}")
         print("Make sure PostgreSQL service is added in Railway dashboard")
         # Don't fail startup - let the app run and show error pages
+    if settings.WEBHOOK_ASYNC:
+        webhook_outbox.start()
     yield
+    await webhook_outbox.stop()
+    pdf_renderer.shutdown()
 
 app = FastAPI(
     title="CIFIX Kids Hub",
@@ -28,8 +50,23 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Added before metrics so request timings include compression
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+if settings.METRICS_ENABLED:
+    install_query_tracking(engine)
+    app.add_middleware(MetricsMiddleware, debug_headers=settings.METRICS_DEBUG_HEADERS)
+
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(
+            render_prometheus(pool=engine.pool, outbox=webhook_outbox if settings.WEBHOOK_ASYNC else None),
+            media_type="text/plain; version=0.0.4"
+        )
+
+# Mount static files; built assets get immutable caching and precompressed bodies
+app.mount("/static", AssetFiles(directory=STATIC_DIR), name="static")
 
 # Include routers
 app.include_router(public.router, tags=["Public"])
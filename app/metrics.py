@@ -0,0 +1,356 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+import time
+
+# Milliseconds; roughly logarithmic from sub-millisecond to a pool timeout
+DEFAULT_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class Histogram:
+    """
+    Fixed-bucket histogram, of durations in milliseconds unless other
+    buckets are given. Bucket counts are per-bucket (not cumulative); the
+    last count is everything above the largest bound.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float):
+        index = bisect_left(self.buckets, value_ms)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value_ms
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        return {
+            "count": count,
+            "sum_ms": round(total, 3),
+            "mean_ms": round(total / count, 3) if count else 0.0,
+            "buckets": {
+                **{f"le_{bound:g}": n for bound, n in zip(self.buckets, counts)},
+                "le_inf": counts[-1]
+            }
+        }
+
+    def cumulative(self) -> Tuple[List[Tuple[float, int]], float, int]:
+        """(upper bound, count at or below it) pairs ending with +Inf, plus sum and count"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        running = 0
+        pairs = []
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            pairs.append((bound, running))
+        return pairs, total, count
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+            self._count = 0
+
+# Queries per request; an N+1 shows up as a shift to the right
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+@dataclass
+class RequestDbStats:
+    queries: int = 0
+    db_time_ms: float = 0.0
+
+# Set by MetricsMiddleware for the duration of each request; SQLAlchemy runs
+# the async driver in a greenlet that shares the task's context
+_request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+def current_db_stats() -> Optional[RequestDbStats]:
+    return _request_db_stats.get()
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram()
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram()
+        self.statuses: Dict[int, int] = {}
+
+class MetricsRegistry:
+    """Per-route request metrics for this process, keyed by (method, route template)"""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, route: str, status: int, latency_ms: float, db: RequestDbStats):
+        key = (method, route)
+        metrics = self.routes.get(key)
+        if metrics is None:
+            with self._lock:
+                metrics = self.routes.setdefault(key, RouteMetrics())
+        metrics.latency.observe(latency_ms)
+        metrics.queries.observe(db.queries)
+        metrics.db_time.observe(db.db_time_ms)
+        with self._lock:
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.routes.clear()
+
+registry = MetricsRegistry()
+
+class TemplateMetrics:
+    """Render time per template for this process, keyed by template name"""
+
+    def __init__(self):
+        self.templates: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, latency_ms: float):
+        histogram = self.templates.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.templates.setdefault(name, Histogram())
+        histogram.observe(latency_ms)
+
+    def reset(self):
+        with self._lock:
+            self.templates.clear()
+
+template_metrics = TemplateMetrics()
+
+class CompressionMetrics:
+    """Responses compressed by CompressionMiddleware, their size before and after, and time spent, per coding"""
+
+    def __init__(self):
+        self.encodings: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, encoding: str, bytes_in: int, bytes_out: int, elapsed_ms: float):
+        with self._lock:
+            totals = self.encodings.setdefault(
+                encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "time_ms": 0.0}
+            )
+            totals["responses"] += 1
+            totals["bytes_in"] += bytes_in
+            totals["bytes_out"] += bytes_out
+            totals["time_ms"] += elapsed_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                encoding: {
+                    **totals,
+                    "time_ms": round(totals["time_ms"], 3),
+                    "ratio": round(totals["bytes_out"] / totals["bytes_in"], 4) if totals["bytes_in"] else 0.0
+                }
+                for encoding, totals in sorted(self.encodings.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self.encodings.clear()
+
+compression_metrics = CompressionMetrics()
+
+def install_query_tracking(engine):
+    """Count statements and their execution time against the current request"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time_ms += (time.perf_counter() - start) * 1000
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request from receipt to the last body chunk and records
+    it, with its status and SQL counts, under the matched route template.
+    With debug_headers the response carries X-Query-Count and X-DB-Time-Ms
+    (counted up to the moment headers are sent, so streamed bodies may run
+    more queries afterwards).
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = registry, debug_headers: bool = False):
+        self.app = app
+        self.registry = registry
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats()
+        token = _request_db_stats.set(stats)
+        root_path = scope.get("root_path", "")
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.debug_headers:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-query-count", str(stats.queries).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.db_time_ms:.2f}".encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_db_stats.reset(token)
+            self.registry.record(
+                scope["method"],
+                self.route_label(scope, root_path),
+                status,
+                (time.perf_counter() - start) * 1000,
+                stats
+            )
+
+    @staticmethod
+    def route_label(scope, original_root_path: str) -> str:
+        # The router writes the matched route into the (shared) scope dict
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        root_path = scope.get("root_path", "")
+        if root_path != original_root_path:
+            return root_path[len(original_root_path):] + "/{path}"  # Mounted app, e.g. /static
+        return "unmatched"
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(str(v))}"' for k, v in labels.items()) + "}"
+
+def _histogram_lines(name: str, labels: Dict[str, str], histogram: Histogram, scale: float = 1.0) -> List[str]:
+    pairs, total, count = histogram.cumulative()
+    lines = []
+    for bound, n in pairs:
+        le = "+Inf" if bound == float("inf") else f"{bound * scale:g}"
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {n}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {total * scale:g}")
+    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return lines
+
+def render_prometheus(
+    registry: MetricsRegistry = registry,
+    pool=None,
+    outbox=None,
+    templates: TemplateMetrics = template_metrics,
+    compression: CompressionMetrics = compression_metrics
+) -> str:
+    """Prometheus text exposition (format 0.0.4) for this process"""
+    lines = []
+    routes = sorted(registry.routes.items())
+
+    lines += ["# HELP http_request_duration_seconds Time from request receipt to the last response byte.",
+              "# TYPE http_request_duration_seconds histogram"]
+    for (method, route), metrics in routes:
+        lines += _histogram_lines("http_request_duration_seconds", {"method": method, "route": route},
+                                  metrics.latency, scale=0.001)
+
+    lines += ["# HELP http_requests_total Requests by route and response status.",
+              "# TYPE http_requests_total counter"]
+    for (method, route), metrics in routes:
+        for status, n in sorted(metrics.statuses.items()):
+            lines.append(f"http_requests_total{_format_labels({'method': method, 'route': route, 'status': str(status)})} {n}")
+
+    lines += ["# HELP http_request_db_queries SQL statements executed per request.",
+              "# TYPE http_request_db_queries histogram"]
+    for (method, route), metrics in routes:
+        lines += _histogram_lines("http_request_db_queries", {"method": method, "route": route}, metrics.queries)
+
+    lines += ["# HELP http_request_db_duration_seconds Time spent executing SQL per request.",
+              "# TYPE http_request_db_duration_seconds histogram"]
+    for (method, route), metrics in routes:
+        lines += _histogram_lines("http_request_db_duration_seconds", {"method": method, "route": route},
+                                  metrics.db_time, scale=0.001)
+
+    lines += ["# HELP template_render_duration_seconds Time to render a page template, layout included.",
+              "# TYPE template_render_duration_seconds histogram"]
+    for name, histogram in sorted(templates.templates.items()):
+        lines += _histogram_lines("template_render_duration_seconds", {"template": name}, histogram, scale=0.001)
+
+    compressed = compression.snapshot()
+    for key, metric, help_text, scale in (
+        ("responses", "http_compressed_responses_total", "Responses compressed on the fly, by coding.", 1),
+        ("bytes_in", "http_compression_input_bytes_total", "Response bytes before compression.", 1),
+        ("bytes_out", "http_compression_output_bytes_total", "Response bytes after compression.", 1),
+        ("time_ms", "http_compression_seconds_total", "Time spent compressing responses.", 0.001)
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for encoding, totals in compressed.items():
+            lines.append(f"{metric}{_format_labels({'encoding': encoding})} {round(totals[key] * scale, 6)}")
+
+    if pool is not None and hasattr(pool, "stats"):
+        stats = pool.stats()
+        for key, help_text in (
+            ("pool_size", "Configured connection pool size."),
+            ("open", "Connections currently open."),
+            ("checked_out", "Connections currently checked out."),
+            ("overflow", "Connections open beyond the pool size."),
+            ("capacity", "Maximum connections this process will open.")
+        ):
+            lines += [f"# HELP db_pool_{key} {help_text}", f"# TYPE db_pool_{key} gauge",
+                      f"db_pool_{key} {stats[key]}"]
+        lines += ["# HELP db_pool_checkout_timeouts_total Checkouts that gave up after pool_timeout.",
+                  "# TYPE db_pool_checkout_timeouts_total counter",
+                  f"db_pool_checkout_timeouts_total {stats['checkout_timeouts']}",
+                  "# HELP db_pool_checkout_wait_seconds Time spent waiting for a pooled connection.",
+                  "# TYPE db_pool_checkout_wait_seconds histogram"]
+        lines += _histogram_lines("db_pool_checkout_wait_seconds", {}, pool.checkout_wait, scale=0.001)
+
+    if outbox is not None:
+        lines += ["# HELP webhook_outbox_depth Accepted webhook payloads waiting to be ingested.",
+                  "# TYPE webhook_outbox_depth gauge",
+                  f"webhook_outbox_depth {outbox.depth}",
+                  "# HELP webhook_outbox_dead Payloads that failed ingestion too often and were set aside.",
+                  "# TYPE webhook_outbox_dead gauge",
+                  f"webhook_outbox_dead {outbox.dead}",
+                  "# HELP webhook_outbox_lag_seconds Age of the oldest pending payload.",
+                  "# TYPE webhook_outbox_lag_seconds gauge",
+                  f"webhook_outbox_lag_seconds {outbox.lag_seconds():.3f}",
+                  "# HELP webhook_outbox_rejected_total Payloads refused with 503 because the outbox was full.",
+                  "# TYPE webhook_outbox_rejected_total counter",
+                  f"webhook_outbox_rejected_total {outbox.rejected}",
+                  "# HELP webhook_outbox_ingested_total Payloads drained from the outbox, by outcome.",
+                  "# TYPE webhook_outbox_ingested_total counter"]
+        for outcome, n in sorted(outbox.outcomes.items()):
+            lines.append(f"webhook_outbox_ingested_total{_format_labels({'outcome': outcome})} {n}")
+        lines += ["# HELP webhook_outbox_drain_failures_total Drain batches that failed and were retried.",
+                  "# TYPE webhook_outbox_drain_failures_total counter",
+                  f"webhook_outbox_drain_failures_total {outbox.failures}",
+                  "# HELP webhook_outbox_delivery_lag_seconds Time from acceptance to ingestion.",
+                  "# TYPE webhook_outbox_delivery_lag_seconds histogram"]
+        lines += _histogram_lines("webhook_outbox_delivery_lag_seconds", {}, outbox.delivery_lag, scale=0.001)
+
+    return "\n".join(lines) + "\n"
@@ -1,12 +1,16 @@
 from .base import Base, engine, async_session
-from .student import Student
+from .student import Student, student_access_code_seq
 from .module import Module
 from .progress import EnrollmentProgress, Badge, StudentBadge, ProgressStatus
 from .assessment import AssessmentResult
 from .module_assessment import ModuleAssessment, ModuleAssessmentAttempt
+from .outbox import WebhookOutboxEntry
+from .stats import StatCounter, StudentStats
+from .cohort import CohortStat
 
 __all__ = [
     "Base", "engine", "async_session",
-    "Student", "Module", "EnrollmentProgress", "Badge", "StudentBadge", 
-    "AssessmentResult", "ProgressStatus", "ModuleAssessment", "ModuleAssessmentAttempt"
+    "Student", "student_access_code_seq", "Module", "EnrollmentProgress", "Badge", "StudentBadge", 
+    "AssessmentResult", "ProgressStatus", "ModuleAssessment", "ModuleAssessmentAttempt",
+    "WebhookOutboxEntry", "StatCounter", "StudentStats", "CohortStat"
 ]
\ No newline at end of file
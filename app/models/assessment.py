@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Float, Text
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Float, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -6,6 +6,11 @@ from .base import Base
 
 class AssessmentResult(Base):
     __tablename__ = "assessment_results"
+    __table_args__ = (
+        Index("ix_assessment_results_student_completed", "student_id", "completed_at"),
+        Index("ix_assessment_results_completed_at", "completed_at"),
+        Index("uq_assessment_results_idempotency_key", "idempotency_key", unique=True),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     student_id: Mapped[int] = mapped_column(ForeignKey("students.id"), nullable=False)
@@ -15,5 +20,6 @@ class AssessmentResult(Base):
     stars_earned: Mapped[int] = mapped_column(Integer, default=3)  # Stars awarded for completing assessment
     recommendation: Mapped[str] = mapped_column(Text, nullable=True)  # Personalized recommendation
     completed_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    idempotency_key: Mapped[str] = mapped_column(String(100), nullable=True)  # Supplied by the webhook caller, else generated
     
     student: Mapped["Student"] = relationship(back_populates="assessments")
\ No newline at end of file
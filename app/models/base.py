@@ -1,9 +1,31 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from app.config import settings
+from .pool import InstrumentedQueuePool
+import uuid
 
 class Base(DeclarativeBase):
     pass
 
-engine = create_async_engine(settings.DATABASE_URL)
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
\ No newline at end of file
+def engine_options() -> dict:
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING
+    }
+    if settings.DB_POOLER_MODE:
+        # A transaction-mode pooler hands each transaction to any server
+        # connection, so statements prepared on one are missing on the next.
+        # Unique names also keep unnamed statements from colliding.
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__"
+        }
+    return options
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options())
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
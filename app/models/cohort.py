@@ -0,0 +1,17 @@
+from sqlalchemy import String, BigInteger, Float
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class CohortStat(Base):
+    """
+    One running aggregate for a class: a count and a sum, keyed by metric
+    and, for per-module, per-level and per-domain metrics, by that key
+    (see services/cohort_analytics.py). Averages are total / count.
+    """
+    __tablename__ = "cohort_stats"
+    
+    class_label: Mapped[str] = mapped_column(String(50), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(30), primary_key=True)
+    key: Mapped[str] = mapped_column(String(100), primary_key=True, default="")
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
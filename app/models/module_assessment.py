@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Boolean, Text, JSON
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Boolean, Text, JSON, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -8,6 +8,9 @@ from .base import Base
 class ModuleAssessment(Base):
     """Built-in 10 MCQ assessments for each module"""
     __tablename__ = "module_assessments"
+    __table_args__ = (
+        Index("ix_module_assessments_module_active", "module_id", "is_active"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     module_id: Mapped[int] = mapped_column(ForeignKey("modules.id"), nullable=False)
@@ -23,6 +26,12 @@ class ModuleAssessment(Base):
 class ModuleAssessmentAttempt(Base):
     """Student attempts at module assessments"""
     __tablename__ = "module_assessment_attempts"
+    __table_args__ = (
+        Index(
+            "ix_module_assessment_attempts_student_assessment_completed",
+            "student_id", "assessment_id", "completed_at"
+        ),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     assessment_id: Mapped[int] = mapped_column(ForeignKey("module_assessments.id"), nullable=False)
@@ -0,0 +1,15 @@
+from sqlalchemy import Integer, BigInteger, DateTime, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from datetime import datetime
+from .base import Base
+
+class WebhookOutboxEntry(Base):
+    """Accepted webhook payloads waiting for the background worker to ingest them"""
+    __tablename__ = "webhook_outbox"
+    
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # Validated AssessmentWebhookPayload JSON
+    received_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
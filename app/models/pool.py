@@ -0,0 +1,49 @@
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+import time
+from app.metrics import Histogram
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default async queue pool, plus a histogram of how long each checkout
+    waited for a connection (including opening a new one) and a count of
+    checkouts that gave up after pool_timeout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = Histogram()
+        self.checkout_timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            self.checkout_wait.observe((time.perf_counter() - start) * 1000)
+
+    def recreate(self):
+        # Called by engine.dispose(); keep the counters with the engine
+        pool = super().recreate()
+        pool.checkout_wait = self.checkout_wait
+        pool.checkout_timeouts = self.checkout_timeouts
+        return pool
+
+    def stats(self) -> dict:
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            "recycle": self._recycle,
+            "pre_ping": self._pre_ping,
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "open": self.size() + self.overflow(),
+            "overflow": max(self.overflow(), 0),
+            "capacity": self.size() + self._max_overflow,
+            "checkout_timeouts": self.checkout_timeouts,
+            "checkout_wait": self.checkout_wait.snapshot()
+        }
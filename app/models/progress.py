@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Enum
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -12,6 +12,9 @@ class ProgressStatus(PyEnum):
 
 class EnrollmentProgress(Base):
     __tablename__ = "enrollment_progress"
+    __table_args__ = (
+        Index("ix_enrollment_progress_student_module", "student_id", "module_id"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     student_id: Mapped[int] = mapped_column(ForeignKey("students.id"), nullable=False)
@@ -0,0 +1,35 @@
+from sqlalchemy import String, Integer, BigInteger, DateTime, ForeignKey, Computed
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+from .base import Base
+
+class StatCounter(Base):
+    """
+    Running row counts for the admin dashboard. Each counter is split over a
+    few shard rows so concurrent writers rarely wait on the same row lock;
+    its value is the sum of its shards.
+    """
+    __tablename__ = "stat_counters"
+    
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+class StudentStats(Base):
+    """
+    A student's totals, kept by the write paths in the same transaction as
+    the progress and assessment rows they summarise (see
+    services/student_stats.py). Students with no activity have no row.
+    """
+    __tablename__ = "student_stats"
+    
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    module_stars: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    assessment_stars: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_stars: Mapped[int] = mapped_column(Integer, Computed("module_stars + assessment_stars"))
+    modules_completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Latest result by completed_at, then id
+    latest_assessment_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    latest_assessment_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_activity_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, DateTime, Text
+from sqlalchemy import String, Integer, DateTime, Text, Index, Sequence
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -11,7 +11,7 @@ class Student(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     first_name: Mapped[str] = mapped_column(String(100), nullable=False)
     age: Mapped[int] = mapped_column(Integer, nullable=True)
-    parent_email: Mapped[str] = mapped_column(String(255), nullable=False)
+    parent_email: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     access_code: Mapped[str] = mapped_column(String(20), unique=True, nullable=False)
     class_label: Mapped[str] = mapped_column(String(50), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
@@ -19,4 +19,22 @@ class Student(Base):
     progress: Mapped[List["EnrollmentProgress"]] = relationship(back_populates="student")
     assessments: Mapped[List["AssessmentResult"]] = relationship(back_populates="student")
     badges: Mapped[List["StudentBadge"]] = relationship(back_populates="student")
-    module_attempts: Mapped[List["ModuleAssessmentAttempt"]] = relationship(back_populates="student")
\ No newline at end of file
+    module_attempts: Mapped[List["ModuleAssessmentAttempt"]] = relationship(back_populates="student")
+
+# Registration checks for an existing child case-insensitively by name + age
+Index("ix_students_lower_first_name_age", func.lower(Student.first_name), Student.age)
+
+# Admin student directory: newest-first keyset pages, and prefix search
+# (text_pattern_ops so LIKE 'abc%' can use them under any collation)
+Index("ix_students_created_at_id", Student.created_at, Student.id)
+Index("ix_students_lower_first_name_pattern", func.lower(Student.first_name).label("lower_first_name"),
+      postgresql_ops={"lower_first_name": "text_pattern_ops"})
+Index("ix_students_lower_parent_email_pattern", func.lower(Student.parent_email).label("lower_parent_email"),
+      postgresql_ops={"lower_parent_email": "text_pattern_ops"})
+Index("ix_students_access_code_pattern", Student.access_code,
+      postgresql_ops={"access_code": "text_pattern_ops"})
+Index("ix_students_lower_class_label_pattern", func.lower(Student.class_label).label("lower_class_label"),
+      postgresql_ops={"lower_class_label": "text_pattern_ops"})
+# Numbers behind generated access codes (see services/access_codes.py); each
+# value reserves a block of 64 for the process that drew it
+student_access_code_seq = Sequence("student_access_code_seq", start=0, minvalue=0, increment=64, metadata=Base.metadata)
@@ -1,19 +1,30 @@
 from fastapi import APIRouter, Request, Form, Response, Depends, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
-from ..models import Student, Module, AssessmentResult, EnrollmentProgress
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from ..models import Student, Module, engine
 from ..deps import get_db, get_serializer, require_admin, get_admin_session
 from ..config import settings
-from fastapi.responses import Response as FastAPIResponse
-import csv
-import io
-from datetime import datetime
+from ..services.module_catalog import module_catalog
+from ..services.export_service import ExportService
+from ..services.bulk_report_service import BulkReportService
+from ..services.assessment_cache import assessment_cache
+from ..services.principal_cache import session_cache, student_cache
+from ..services.pdf_renderer import pdf_cache
+from ..services.webhook_outbox import webhook_outbox
+from ..services.access_codes import access_codes
+from ..services.student_directory import StudentDirectory, InvalidCursor
+from ..services.counters import CounterService
+from ..services.cohort_analytics import CohortAnalytics, CohortDelta
+from ..templates_config import templates
+from ..metrics import template_metrics, compression_metrics
+from dataclasses import asdict
+from datetime import datetime, date
+from typing import Optional
+import os
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/admin", response_class=HTMLResponse)
 async def admin_login_page(request: Request):
@@ -60,28 +71,25 @@ async def admin_dashboard(
     session: dict = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get basic stats
-    students_count = await db.scalar(select(func.count(Student.id)))
-    modules_count = await db.scalar(select(func.count(Module.id)))
-    assessments_count = await db.scalar(select(func.count(AssessmentResult.id)))
+    # Get basic stats, from counters kept by the write paths
+    catalog = await module_catalog.get(db)
+    counts = await CounterService.read(db)
+    students_count = counts["students"]
+    modules_count = counts["modules"]
+    assessments_count = counts["assessment_results"]
     
     # Get recent students
     recent_students_stmt = select(Student).order_by(Student.created_at.desc()).limit(5)
     recent_students_result = await db.execute(recent_students_stmt)
     recent_students = recent_students_result.scalars().all()
     
-    # Get all modules
-    modules_stmt = select(Module).order_by(Module.week_no)
-    modules_result = await db.execute(modules_stmt)
-    modules = modules_result.scalars().all()
-    
     return templates.TemplateResponse("admin/index.html", {
         "request": request,
         "students_count": students_count,
         "modules_count": modules_count,
         "assessments_count": assessments_count,
         "recent_students": recent_students,
-        "modules": modules
+        "modules": catalog.modules
     })
 
 @router.get("/admin/modules", response_class=HTMLResponse)
@@ -90,13 +98,11 @@ async def admin_modules(
     session: dict = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    modules_stmt = select(Module).order_by(Module.week_no)
-    modules_result = await db.execute(modules_stmt)
-    modules = modules_result.scalars().all()
+    catalog = await module_catalog.get(db)
     
     return templates.TemplateResponse("admin/modules.html", {
         "request": request,
-        "modules": modules
+        "modules": catalog.modules
     })
 
 @router.post("/admin/modules")
@@ -120,96 +126,239 @@ async def create_module(
     )
     
     db.add(module)
+    await CounterService.add(db, "modules")
     await db.commit()
+    module_catalog.invalidate()
     
     return RedirectResponse("/admin/modules", status_code=302)
 
+async def load_student_page(db: AsyncSession, q: str, after: Optional[str], before: Optional[str], limit: int):
+    try:
+        return await StudentDirectory.page(db, q=q, after=after, before=before, limit=limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/admin/students", response_class=HTMLResponse)
 async def admin_students(
     request: Request,
+    q: str = "",
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = StudentDirectory.PAGE_SIZE,
     session: dict = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    students_stmt = select(Student).order_by(Student.created_at.desc())
-    students_result = await db.execute(students_stmt)
-    students = students_result.scalars().all()
+    page = await load_student_page(db, q, after, before, limit)
     
     return templates.TemplateResponse("admin/students.html", {
         "request": request,
-        "students": students
+        "students": page.students,
+        "stats": page.stats,
+        "q": q,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor
     })
 
+@router.get("/admin/students.json")
+async def admin_students_json(
+    q: str = "",
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = StudentDirectory.PAGE_SIZE,
+    session: dict = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    page = await load_student_page(db, q, after, before, limit)
+    
+    return {
+        "students": [
+            {
+                "id": student.id,
+                "first_name": student.first_name,
+                "age": student.age,
+                "parent_email": student.parent_email,
+                "access_code": student.access_code,
+                "class_label": student.class_label,
+                "created_at": student.created_at.isoformat() if student.created_at else None,
+                "total_stars": page.stats[student.id].total_stars if student.id in page.stats else 0,
+                "modules_completed": page.stats[student.id].modules_completed if student.id in page.stats else 0
+            }
+            for student in page.students
+        ],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor
+    }
+
 @router.post("/admin/students")
 async def create_student(
     first_name: str = Form(...),
     age: int = Form(...),
     parent_email: str = Form(...),
-    access_code: str = Form(...),
+    access_code: str = Form(""),
     class_label: str = Form(""),
     session: dict = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    # Check if access code already exists
-    existing_stmt = select(Student).where(Student.access_code == access_code)
-    existing_result = await db.execute(existing_stmt)
-    if existing_result.scalar_one_or_none():
+    # Leave the access code blank to have one generated; a chosen code that
+    # is already taken is caught by the unique constraint
+    access_code = access_code.strip()
+    for _ in range(1 if access_code else 3):
+        student_values = {
+            "first_name": first_name,
+            "age": age,
+            "parent_email": parent_email,
+            "access_code": access_code or await access_codes.allocate(db),
+            "class_label": class_label if class_label else None
+        }
+        try:
+            await db.execute(insert(Student).values(**student_values))
+            await CounterService.add(db, "students")
+            cohort = CohortDelta()
+            cohort.student(student_values["class_label"])
+            await cohort.apply(db)
+            await db.commit()
+            break
+        except IntegrityError:
+            await db.rollback()
+    else:
         raise HTTPException(status_code=400, detail="Access code already exists")
     
-    student = Student(
-        first_name=first_name,
-        age=age,
-        parent_email=parent_email,
-        access_code=access_code,
-        class_label=class_label if class_label else None
-    )
+    return RedirectResponse("/admin/students", status_code=302)
+
+@router.get("/admin/cohorts", response_class=HTMLResponse)
+async def admin_cohorts(
+    request: Request,
+    class_label: str = "",
+    session: dict = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    classes = await CohortAnalytics.class_sizes(db)
+    if not class_label and classes:
+        class_label = next(iter(classes))
+    report = None
+    if class_label:
+        catalog = await module_catalog.get(db)
+        report = await CohortAnalytics.report(db, class_label, catalog)
     
-    db.add(student)
-    await db.commit()
+    return templates.TemplateResponse("admin/cohorts.html", {
+        "request": request,
+        "classes": classes,
+        "class_label": class_label,
+        "report": report
+    })
+
+@router.get("/admin/cohorts.json")
+async def admin_cohorts_json(
+    class_label: Optional[str] = None,
+    session: dict = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    classes = await CohortAnalytics.class_sizes(db)
+    if not class_label:
+        return {"classes": classes}
     
-    return RedirectResponse("/admin/students", status_code=302)
+    catalog = await module_catalog.get(db)
+    return asdict(await CohortAnalytics.report(db, class_label, catalog))
 
 @router.get("/admin/assessments.csv")
 async def export_assessments_csv(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    class_label: Optional[str] = None,
+    gzip: bool = False,
+    session: dict = Depends(require_admin)
+):
+    chunks = ExportService.iter_assessments_csv(start_date, end_date, class_label or None)
+    filename = f"assessments_{datetime.now().strftime('%Y%m%d')}.csv"
+    
+    if gzip:
+        return StreamingResponse(
+            ExportService.gzip_chunks(chunks),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f"attachment; filename={filename}.gz"}
+        )
+    
+    return StreamingResponse(
+        chunks,
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+@router.get("/admin/reports.zip")
+async def export_class_reports(
+    class_label: Optional[str] = None,
     session: dict = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get all assessments with student info
-    assessments_stmt = select(AssessmentResult).options(
-        selectinload(AssessmentResult.student)
-    ).order_by(AssessmentResult.completed_at.desc())
-    assessments_result = await db.execute(assessments_stmt)
-    assessments = assessments_result.scalars().all()
-    
-    # Create CSV content
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow([
-        "Student ID", "First Name", "Parent Email", "Access Code",
-        "Raw Score", "Level", "Completed At", "Domain Breakdown"
-    ])
-    
-    # Write data
-    for assessment in assessments:
-        writer.writerow([
-            assessment.student_id,
-            assessment.student.first_name,
-            assessment.student.parent_email,
-            assessment.student.access_code,
-            assessment.raw_score,
-            assessment.level,
-            assessment.completed_at.strftime("%Y-%m-%d %H:%M:%S"),
-            assessment.domain_breakdown or ""
-        ])
-    
-    csv_content = output.getvalue()
-    output.close()
-    
-    return FastAPIResponse(
-        content=csv_content,
-        media_type="text/csv",
+    payloads = await BulkReportService.load_cohort(db, class_label or None)
+    if not payloads:
+        raise HTTPException(status_code=404, detail="No students found")
+    
+    job = BulkReportService.start_job(class_label or None, len(payloads))
+    scope = BulkReportService.safe_name(class_label or "", "all")
+    filename = f"reports_{scope}_{datetime.now().strftime('%Y%m%d')}.zip"
+    
+    return StreamingResponse(
+        BulkReportService.iter_zip(payloads, job),
+        media_type="application/zip",
         headers={
-            "Content-Disposition": f"attachment; filename=assessments_{datetime.now().strftime('%Y%m%d')}.csv"
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Report-Job": job.id,
+            "X-Report-Count": str(job.total)
         }
-    )
\ No newline at end of file
+    )
+
+@router.get("/admin/reports/jobs/{job_id}")
+async def class_reports_progress(
+    job_id: str,
+    session: dict = Depends(require_admin)
+):
+    job = BulkReportService.jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job.progress()
+
+@router.post("/admin/assessments/{assessment_id}/regrade")
+async def regrade_module_assessment(
+    assessment_id: int,
+    dry_run: bool = Form(True),
+    session: dict = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Re-score all attempts against the assessment's current answer key"""
+    # Imported here so numpy loads on the first regrade, not at startup
+    from ..services.regrade_service import RegradeService
+    
+    try:
+        report = await RegradeService.regrade(db, assessment_id, dry_run=dry_run)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return asdict(report)
+
+@router.get("/admin/cache-stats")
+async def cache_stats(session: dict = Depends(require_admin)):
+    return {
+        "module_catalog": module_catalog.stats(),
+        "assessment_cache": assessment_cache.stats(),
+        "session_cache": session_cache.stats(),
+        "student_cache": student_cache.stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "templates": {
+            name: histogram.snapshot() for name, histogram in sorted(template_metrics.templates.items())
+        },
+        "compression": compression_metrics.snapshot()
+    }
+
+@router.get("/admin/pool-stats")
+async def pool_stats(session: dict = Depends(require_admin)):
+    # Per worker process; multiply by the worker count when sizing max_connections
+    return {
+        "pid": os.getpid(),
+        "pooler_mode": settings.DB_POOLER_MODE,
+        **engine.pool.stats()
+    }
+
+@router.get("/admin/webhook-outbox")
+async def webhook_outbox_stats(session: dict = Depends(require_admin)):
+    return {"enabled": settings.WEBHOOK_ASYNC, **webhook_outbox.stats()}
\ No newline at end of file
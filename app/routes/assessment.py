@@ -1,103 +1,159 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Header
+from fastapi.responses import JSONResponse
+from starlette.datastructures import UploadFile
+from fastapi.exceptions import RequestValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from ..models import Student, AssessmentResult
+from pydantic import ValidationError
+from collections import Counter
+from dataclasses import asdict
+from typing import Optional
 from ..schemas.assessment import AssessmentWebhookPayload
-from ..deps import get_db
+from ..services.assessment_ingest import AssessmentIngestService, IngestOutcome
+from ..services.import_service import ImportService, CsvImportError
+from ..services.webhook_outbox import webhook_outbox, OutboxFull
+from ..deps import get_db, require_admin
 from ..config import settings
 import json
-import hmac
-import hashlib
 
 router = APIRouter()
 
-def generate_recommendation(raw_score: float, level: str, domains: dict) -> str:
-    """Generate personalized learning recommendations based on assessment results"""
+async def read_signed_body(request: Request, signature: Optional[str]) -> bytes:
+    # Read the raw body once: it is both the HMAC input and what gets parsed
+    body = await request.body()
     
-    # Base recommendations based on overall performance
-    if raw_score >= 80:
-        base_rec = "Excellent work! You're showing strong skills across multiple areas. "
-        next_steps = "Continue challenging yourself with advanced topics and consider helping classmates who might need support."
-    elif raw_score >= 65:
-        base_rec = "Good job! You're making solid progress in your learning journey. "
-        next_steps = "Focus on strengthening areas where you scored lower to build a well-rounded foundation."
-    elif raw_score >= 50:
-        base_rec = "You're on the right track! There are areas where you can improve. "
-        next_steps = "Spend extra time practicing the concepts that were challenging in this assessment."
-    else:
-        base_rec = "Keep working hard! Learning takes time and practice. "
-        next_steps = "Consider reviewing the basics and don't hesitate to ask for help when needed."
-    
-    # Find the strongest and weakest domains
-    if domains:
-        sorted_domains = sorted(domains.items(), key=lambda x: x[1], reverse=True)
-        strongest = sorted_domains[0] if sorted_domains else None
-        weakest = sorted_domains[-1] if len(sorted_domains) > 1 else None
-        
-        strength_note = ""
-        if strongest and strongest[1] > 70:
-            domain_name = strongest[0].replace('_', ' ').title()
-            strength_note = f" Your strongest area is {domain_name} - great work there!"
-        
-        improvement_note = ""
-        if weakest and weakest[1] < 60:
-            domain_name = weakest[0].replace('_', ' ').title()
-            improvement_note = f" Focus on improving your {domain_name} skills through extra practice."
-        
-        return base_rec + strength_note + improvement_note + " " + next_steps
+    # Verify webhook signature (optional but recommended)
+    if signature and not AssessmentIngestService.signature_valid(body, signature):
+        raise HTTPException(status_code=401, detail="Invalid signature")
     
-    return base_rec + next_steps
+    return body
+
+async def enqueue_payloads(db: AsyncSession, payloads: list):
+    try:
+        await webhook_outbox.enqueue(db, payloads)
+    except OutboxFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Assessment queue is full, retry later",
+            headers={"Retry-After": str(max(int(webhook_outbox.poll_interval * 10), 1))}
+        )
 
 @router.post("/assessment/webhook")
 async def assessment_webhook(
-    payload: AssessmentWebhookPayload,
     request: Request,
     x_hub_signature: str = Header(None),
+    idempotency_key: str = Header(None),
     db: AsyncSession = Depends(get_db)
 ):
-    # Verify webhook signature (optional but recommended)
-    if x_hub_signature:
-        request_body = await request.body()
-        expected_signature = hmac.new(
-            settings.WEBHOOK_SECRET.encode('utf-8'),
-            request_body,
-            hashlib.sha256
-        ).hexdigest()
-        
-        if not hmac.compare_digest(f"sha256={expected_signature}", x_hub_signature):
-            raise HTTPException(status_code=401, detail="Invalid signature")
+    body = await read_signed_body(request, x_hub_signature)
+    try:
+        payload = AssessmentWebhookPayload.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
     
-    # Verify student exists
-    student_stmt = select(Student).where(Student.id == payload.student_id)
-    student_result = await db.execute(student_stmt)
-    student = student_result.scalar_one_or_none()
+    if payload.idempotency_key is None and idempotency_key:
+        payload = payload.model_copy(update={"idempotency_key": idempotency_key})
     
-    if not student:
+    if settings.WEBHOOK_ASYNC:
+        await enqueue_payloads(db, [payload])
+        return JSONResponse(
+            status_code=202,
+            content={"status": "accepted", "message": "Assessment result queued"}
+        )
+    
+    outcome, = await AssessmentIngestService.ingest(db, [(0, payload)])
+    
+    if outcome.status == "student_not_found":
         raise HTTPException(status_code=404, detail="Student not found")
+    if outcome.status == "duplicate":
+        return {"status": "success", "message": "Assessment result already recorded"}
     
-    # Generate personalized recommendation based on assessment results
-    recommendation = generate_recommendation(payload.raw_score, payload.level, payload.domains)
+    return {"status": "success", "message": "Assessment result saved"}
+
+@router.post("/assessment/webhook/batch")
+async def assessment_webhook_batch(
+    request: Request,
+    x_hub_signature: str = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Accepts a JSON array of webhook payloads (or {"results": [...]}) under one
+    signature and reports an outcome per item, in request order.
+    """
+    body = await read_signed_body(request, x_hub_signature)
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    if isinstance(items, dict):
+        items = items.get("results")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="Expected an array of assessment results")
+    if len(items) > settings.WEBHOOK_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.WEBHOOK_BATCH_LIMIT} results per batch"
+        )
     
-    # Create assessment result
-    assessment = AssessmentResult(
-        student_id=payload.student_id,
-        raw_score=payload.raw_score,
-        level=payload.level,
-        domain_breakdown=json.dumps(payload.domains),
-        stars_earned=3,  # Award 3 stars for completing assessment
-        recommendation=recommendation
-    )
+    payloads, outcomes = AssessmentIngestService.validate_items(items)
     
-    db.add(assessment)
-    await db.commit()
+    if settings.WEBHOOK_ASYNC:
+        await enqueue_payloads(db, [payload for _, payload in payloads])
+        outcomes += [
+            IngestOutcome(index=index, status="queued", student_id=payload.student_id,
+                          idempotency_key=payload.idempotency_key)
+            for index, payload in payloads
+        ]
+        outcomes.sort(key=lambda o: o.index)
+        return JSONResponse(status_code=202, content={
+            "status": "accepted" if len(payloads) == len(outcomes) else "partial",
+            "received": len(outcomes),
+            "queued": len(payloads),
+            "failed": len(outcomes) - len(payloads),
+            "results": [asdict(o) for o in outcomes]
+        })
     
-    return {"status": "success", "message": "Assessment result saved"}
+    outcomes += await AssessmentIngestService.ingest(db, payloads)
+    outcomes.sort(key=lambda o: o.index)
+    
+    counts = Counter(o.status for o in outcomes)
+    return {
+        "status": "success" if counts["created"] + counts["duplicate"] == len(outcomes) else "partial",
+        "received": len(outcomes),
+        "created": counts["created"],
+        "duplicates": counts["duplicate"],
+        "failed": len(outcomes) - counts["created"] - counts["duplicate"],
+        "results": [asdict(o) for o in outcomes]
+    }
+
+async def iter_upload(upload: UploadFile, chunk_size: int = 64 * 1024):
+    while chunk := await upload.read(chunk_size):
+        yield chunk
 
 @router.post("/assessment/import-csv")
 async def import_assessments_csv(
     request: Request,
+    session: dict = Depends(require_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    # This endpoint would handle CSV import if needed
-    # Implementation would depend on how you want to structure the CSV
-    pass
\ No newline at end of file
+    """
+    Bulk-load historical results from a CSV sent as the raw request body
+    (text/csv) or as a multipart "file" field. Needs student_id, raw_score and
+    level columns; domain_breakdown, completed_at, stars_earned and
+    idempotency_key are optional. The assessments.csv export is accepted as is.
+    """
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        # Starlette spools uploads to disk past 1MB, so memory stays bounded either way
+        form = await request.form()
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(status_code=400, detail="Expected a CSV in the \"file\" field")
+        chunks = iter_upload(upload)
+    else:
+        chunks = request.stream()
+    
+    try:
+        summary = await ImportService.import_assessments_csv(db, chunks)
+    except CsvImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"status": "success", **asdict(summary)}
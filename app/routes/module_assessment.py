@@ -1,18 +1,23 @@
 from fastapi import APIRouter, Request, Depends, Form, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func
 from typing import List
 import json
 import time
 from datetime import datetime
 
 from ..models import (
-    Student, Module, ModuleAssessment, ModuleAssessmentAttempt, 
+    Student, ModuleAssessment, ModuleAssessmentAttempt,
     EnrollmentProgress, ProgressStatus
 )
 from ..deps import require_student, get_db
+from ..services.assessment_cache import assessment_cache
+from ..services.module_catalog import module_catalog
+from ..services.cohort_analytics import CohortDelta
+from ..services.student_stats import StudentStatsDelta
+from ..services.page_validators import page_etag
+from ..services.http_cache import etag_matches, not_modified, private_validators
 from ..templates_config import templates
 
 router = APIRouter()
@@ -25,35 +30,30 @@ async def show_module_assessment(
     db: AsyncSession = Depends(get_db)
 ):
     # Get module and assessment
-    module_stmt = select(Module).options(
-        selectinload(Module.module_assessment)
-    ).where(Module.id == module_id)
-    module_result = await db.execute(module_stmt)
-    module = module_result.scalar_one_or_none()
+    catalog = await module_catalog.get(db)
+    module = catalog.get_published(module_id)
     
-    if not module or not module.is_published:
+    if not module:
         raise HTTPException(status_code=404, detail="Module not found")
     
-    if not module.module_assessment or not module.module_assessment.is_active:
+    compiled = await assessment_cache.get_active_for_module(db, module_id)
+    if not compiled:
         raise HTTPException(status_code=404, detail="Assessment not available")
     
     # Check if student has already completed this assessment
     attempt_stmt = select(ModuleAssessmentAttempt).where(
-        ModuleAssessmentAttempt.assessment_id == module.module_assessment.id,
+        ModuleAssessmentAttempt.assessment_id == compiled.assessment_id,
         ModuleAssessmentAttempt.student_id == student.id
-    ).order_by(ModuleAssessmentAttempt.completed_at.desc())
+    ).order_by(ModuleAssessmentAttempt.completed_at.desc()).limit(1)
     attempt_result = await db.execute(attempt_stmt)
     latest_attempt = attempt_result.scalar_one_or_none()
     
-    # Parse assessment questions
-    assessment_data = json.loads(module.module_assessment.questions)
-    
     return templates.TemplateResponse("module_assessment.html", {
         "request": request,
         "student": student,
         "module": module,
-        "assessment": module.module_assessment,
-        "assessment_data": assessment_data,
+        "assessment": compiled,
+        "assessment_data": compiled.data,
         "latest_attempt": latest_attempt,
         "can_retake": True  # Allow retakes for learning
     })
@@ -64,55 +64,20 @@ async def submit_module_assessment(
     module_id: int,
     student: Student = Depends(require_student),
     db: AsyncSession = Depends(get_db),
-    start_time: int = Form(...),
-    **form_data
+    start_time: int = Form(...)
 ):
     # Get assessment
-    assessment_stmt = select(ModuleAssessment).where(
-        ModuleAssessment.module_id == module_id,
-        ModuleAssessment.is_active == True
-    )
-    assessment_result = await db.execute(assessment_stmt)
-    assessment = assessment_result.scalar_one_or_none()
+    compiled = await assessment_cache.get_active_for_module(db, module_id)
     
-    if not assessment:
+    if not compiled:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    # Parse questions and calculate score
-    assessment_data = json.loads(assessment.questions)
-    questions = assessment_data['questions']
-    
-    # Extract answers from form data
-    answers = {}
-    for i in range(1, len(questions) + 1):
-        answer_key = f"question_{i}"
-        if answer_key in form_data:
-            answers[str(i)] = int(form_data[answer_key])
-    
-    # Calculate score
-    correct_count = 0
-    for question in questions:
-        q_id = str(question['id'])
-        if q_id in answers and answers[q_id] == question['correct_answer']:
-            correct_count += 1
-    
-    score = correct_count
-    percentage = int((correct_count / len(questions)) * 100)
-    
-    # Calculate stars based on scoring rules
-    scoring = assessment_data['scoring']
-    stars_earned = 1  # Minimum 1 star for attempting
-    
-    for score_range, stars in scoring['star_rewards'].items():
-        if '-' in score_range:
-            min_score, max_score = map(int, score_range.split('-'))
-            if min_score <= score <= max_score:
-                stars_earned = stars
-                break
-        else:
-            if score >= int(score_range):
-                stars_earned = stars
-                break
+    # Grade answers against the precompiled answer key and star table
+    form_data = await request.form()
+    grade = compiled.grade(form_data)
+    score = grade.score
+    percentage = grade.percentage
+    stars_earned = grade.stars_earned
     
     # Calculate time taken
     end_time = int(time.time())
@@ -120,9 +85,9 @@ async def submit_module_assessment(
     
     # Save attempt
     attempt = ModuleAssessmentAttempt(
-        assessment_id=assessment.id,
+        assessment_id=compiled.assessment_id,
         student_id=student.id,
-        answers=json.dumps(answers),
+        answers=json.dumps(grade.answers),
         score=score,
         percentage=percentage,
         stars_earned=stars_earned,
@@ -130,15 +95,27 @@ async def submit_module_assessment(
     )
     db.add(attempt)
     
-    # Update module progress if this is first completion or better score
+    # Update module progress if this is first completion or better score.
+    # Concurrent submits for this student and module queue here until commit,
+    # so each derives its stats deltas from the row the previous one left; the
+    # advisory lock also covers a first submit, before there is a row to lock.
+    await db.execute(select(func.pg_advisory_xact_lock(student.id, module_id)))
     progress_stmt = select(EnrollmentProgress).where(
         EnrollmentProgress.student_id == student.id,
         EnrollmentProgress.module_id == module_id
-    )
+    ).with_for_update()
     progress_result = await db.execute(progress_stmt)
     progress = progress_result.scalar_one_or_none()
     
+    now = datetime.utcnow()
+    cohort = CohortDelta()
+    cohort.module_attempt(student.class_label, module_id, percentage)
+    stats = StudentStatsDelta()
+    stats.module_attempt(student.id, now)
+    
     if not progress:
+        cohort.module_progress(student.class_label, module_id, None, stars_earned)
+        stats.module_progress(student.id, None, stars_earned, now)
         # Create progress entry
         progress = EnrollmentProgress(
             student_id=student.id,
@@ -150,9 +127,14 @@ async def submit_module_assessment(
     else:
         # Update if better performance or first completion
         if progress.status != ProgressStatus.DONE or stars_earned > progress.stars:
+            old_stars = progress.stars if progress.status == ProgressStatus.DONE else None
             progress.status = ProgressStatus.DONE
             progress.stars = max(progress.stars, stars_earned)
+            cohort.module_progress(student.class_label, module_id, old_stars, progress.stars)
+            stats.module_progress(student.id, old_stars, progress.stars, now)
     
+    await cohort.apply(db)
+    await stats.apply(db)
     await db.commit()
     
     return RedirectResponse(
@@ -168,32 +150,45 @@ async def show_assessment_results(
     student: Student = Depends(require_student),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get attempt with related data
-    attempt_stmt = select(ModuleAssessmentAttempt).options(
-        selectinload(ModuleAssessmentAttempt.assessment),
-        selectinload(ModuleAssessmentAttempt.student)
+    # Get attempt with the hash of its assessment's questions
+    attempt_stmt = select(
+        ModuleAssessmentAttempt,
+        func.md5(ModuleAssessment.questions)
+    ).join(
+        ModuleAssessment, ModuleAssessment.id == ModuleAssessmentAttempt.assessment_id
     ).where(
         ModuleAssessmentAttempt.id == attempt_id,
         ModuleAssessmentAttempt.student_id == student.id
     )
     attempt_result = await db.execute(attempt_stmt)
-    attempt = attempt_result.scalar_one_or_none()
+    row = attempt_result.first()
     
-    if not attempt:
+    if not row:
         raise HTTPException(status_code=404, detail="Assessment results not found")
     
+    attempt, questions_hash = row
+    catalog = await module_catalog.get(db)
+    
+    # The attempt only changes when it is regraded; check before compiling or rendering
+    etag = page_etag(
+        "assessment-results", student.id, student.first_name, module_id, attempt.id,
+        attempt.score, attempt.percentage, attempt.stars_earned, attempt.time_taken,
+        attempt.completed_at, questions_hash, catalog.fingerprint
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    compiled = await assessment_cache.get(db, attempt.assessment_id, questions_hash)
+    
     # Get module
-    module_stmt = select(Module).where(Module.id == module_id)
-    module_result = await db.execute(module_stmt)
-    module = module_result.scalar_one_or_none()
+    module = catalog.by_id.get(module_id)
     
-    # Parse assessment data and student answers
-    assessment_data = json.loads(attempt.assessment.questions)
+    # Parse student answers
     student_answers = json.loads(attempt.answers)
     
     # Add result info to questions
     questions_with_results = []
-    for question in assessment_data['questions']:
+    for question in compiled.data['questions']:
         q_id = str(question['id'])
         student_answer = student_answers.get(q_id)
         is_correct = student_answer == question['correct_answer'] if student_answer is not None else False
@@ -210,6 +205,6 @@ async def show_assessment_results(
         "module": module,
         "attempt": attempt,
         "questions": questions_with_results,
-        "total_questions": len(assessment_data['questions']),
-        "passing_score": assessment_data['scoring']['passing_score']
-    })
\ No newline at end of file
+        "total_questions": compiled.total_questions,
+        "passing_score": compiled.passing_score
+    }, headers=private_validators(etag))
\ No newline at end of file
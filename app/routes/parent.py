@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Request, Form, Response, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from ..models import Student
 from ..deps import get_db, get_serializer, require_parent, get_parent_session
 from ..services.report_service import ReportService
+from ..services.pdf_renderer import pdf_renderer, pdf_cache
+from ..services.module_catalog import module_catalog
+from ..services.http_cache import etag_matches, not_modified, private_validators
+from ..services.page_validators import StudentVersion
 from ..config import settings
+from ..templates_config import templates
 from fastapi.responses import Response as FastAPIResponse
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/parent", response_class=HTMLResponse)
 async def parent_login_page(request: Request):
@@ -76,15 +79,24 @@ async def parent_report(
     if not student:
         return RedirectResponse("/parent", status_code=302)
     
+    catalog = await module_catalog.get(db)
+    if request.headers.get("if-none-match"):
+        version = await StudentVersion.load(db, student.id)
+        etag = ReportService.etag(version, student, catalog, "report")
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
     report_data = await ReportService.get_student_report_data(student, db)
+    etag = ReportService.etag(report_data["version"], student, catalog, "report")
     
     return templates.TemplateResponse("parent_report.html", {
         "request": request,
         **report_data
-    })
+    }, headers=private_validators(etag))
 
 @router.get("/parent/report.pdf")
 async def parent_report_pdf(
+    request: Request,
     session: dict = Depends(require_parent),
     db: AsyncSession = Depends(get_db)
 ):
@@ -96,13 +108,25 @@ async def parent_report_pdf(
     if not student:
         return RedirectResponse("/parent", status_code=302)
     
-    report_data = await ReportService.get_student_report_data(student, db)
-    pdf_content = ReportService.generate_pdf_report(report_data)
+    # Validate before doing any report queries or rendering
+    catalog = await module_catalog.get(db)
+    etag = await ReportService.report_etag(student, db, catalog)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    pdf_content = pdf_cache.get(etag)
+    if pdf_content is None:
+        report_data = await ReportService.get_student_report_data(student, db)
+        pdf_content = await pdf_renderer.render(ReportService.pdf_payload(report_data))
+        pdf_cache.set(etag, pdf_content)
     
     filename = f"{student.first_name}_progress_report.pdf"
     
     return FastAPIResponse(
         content=pdf_content,
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            **private_validators(etag)
+        }
     )
\ No newline at end of file
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Request, Form, HTTPException, Depends, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, exists, literal, func
+from sqlalchemy.exc import IntegrityError
 from ..models import Student
-from ..deps import get_db, get_serializer, get_current_student
+from ..deps import get_db, get_serializer, get_current_student, forget_session
 from ..config import settings
+from ..services.access_codes import access_codes
+from ..services.counters import CounterService
+from ..templates_config import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/", response_class=HTMLResponse)
 async def landing_page(request: Request):
@@ -63,6 +65,7 @@ async def login_student(
 
 @router.get("/logout")
 async def logout(request: Request):
+    forget_session(request)
     response = RedirectResponse("/", status_code=302)
     response.delete_cookie(settings.SESSION_COOKIE_NAME)
     return response
@@ -80,8 +83,6 @@ async def register_student(
     parent_email: str = Form(...),
     db: AsyncSession = Depends(get_db)
 ):
-    import random
-    import string
     import re
     
     # Input validation
@@ -104,25 +105,6 @@ async def register_student(
     if not re.match(email_pattern, parent_email):
         errors.append("Please enter a valid email address")
     
-    # Check for duplicate email
-    if not errors:
-        email_stmt = select(Student).where(Student.parent_email == parent_email)
-        email_result = await db.execute(email_stmt)
-        existing_emails = email_result.scalars().all()
-        if existing_emails:
-            errors.append("A student with this parent email is already registered")
-    
-    # Check for duplicate name + age combination (same child)
-    if not errors:
-        name_age_stmt = select(Student).where(
-            Student.first_name.ilike(first_name),
-            Student.age == age
-        )
-        name_age_result = await db.execute(name_age_stmt)
-        existing_students = name_age_result.scalars().all()
-        if existing_students:
-            errors.append("A student with this name and age is already registered")
-    
     # If validation errors, return with errors
     if errors:
         return templates.TemplateResponse("register.html", {
@@ -133,31 +115,64 @@ async def register_student(
             "parent_email": parent_email
         })
     
-    # Generate unique access code
-    while True:
-        access_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        stmt = select(Student).where(Student.access_code == access_code)
-        result = await db.execute(stmt)
-        if not result.scalar_one_or_none():
-            break
-    
-    # Create new student
+    # Insert only if neither the email nor this child (name + age) is
+    # registered yet, with a fresh access code, in one statement. Sign-ups for
+    # the same email or child first queue on transaction-scoped advisory
+    # locks, so a concurrent one's NOT EXISTS sees the other's committed row;
+    # admins adding siblings by hand aren't held to these rules.
+    registration_locks = select(
+        func.pg_advisory_xact_lock(func.hashtext(f"register-email:{parent_email}")),
+        func.pg_advisory_xact_lock(func.hashtext(f"register-child:{first_name.lower()}:{age}"))
+    )
+    email_taken = exists().where(Student.parent_email == parent_email)
+    child_taken = exists().where(
+        func.lower(Student.first_name) == first_name.lower(),
+        Student.age == age
+    )
+    student = Student(first_name=first_name.title(), age=age, parent_email=parent_email)
     try:
-        student = Student(
-            first_name=first_name.title(),  # Proper case
-            age=age,
-            parent_email=parent_email,
-            access_code=access_code
-        )
-        db.add(student)
-        await db.commit()
-        await db.refresh(student)
+        for _ in range(3):
+            student.access_code = await access_codes.allocate(db)
+            await db.execute(registration_locks)
+            stmt = insert(Student).from_select(
+                ["first_name", "age", "parent_email", "access_code"],
+                select(
+                    literal(student.first_name), literal(age), literal(parent_email), literal(student.access_code)
+                ).where(~email_taken, ~child_taken)
+            ).returning(Student.id)
+            try:
+                student.id = (await db.execute(stmt)).scalar_one_or_none()
+                if student.id is not None:
+                    await CounterService.add(db, "students")
+                await db.commit()
+                break
+            except IntegrityError:
+                # Clashed with a hand-picked or legacy code; take the next one
+                await db.rollback()
+        else:
+            raise RuntimeError("Could not allocate an access code")
+        
+        if student.id is None:
+            email_exists, child_exists = (await db.execute(select(email_taken, child_taken))).one()
+            if email_exists:
+                errors.append("A student with this parent email is already registered")
+            elif child_exists:
+                errors.append("A student with this name and age is already registered")
+            else:
+                errors.append("Registration failed, please try again")
+            return templates.TemplateResponse("register.html", {
+                "request": request,
+                "errors": errors,
+                "first_name": first_name,
+                "age": age,
+                "parent_email": parent_email
+            })
         
         # Show success page with access code
         return templates.TemplateResponse("register_success.html", {
             "request": request,
             "student": student,
-            "access_code": access_code
+            "access_code": student.access_code
         })
         
     except Exception as e:
@@ -2,9 +2,15 @@ from fastapi import APIRouter, Request, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from ..models import Student, Module, EnrollmentProgress, AssessmentResult, ProgressStatus
+from datetime import datetime
+from ..models import Student, EnrollmentProgress, AssessmentResult, ProgressStatus
 from ..deps import require_student, get_db
+from ..services.dashboard_service import DashboardSnapshot
+from ..services.module_catalog import module_catalog
+from ..services.cohort_analytics import CohortDelta
+from ..services.student_stats import StudentStatsDelta
+from ..services.page_validators import StudentVersion
+from ..services.http_cache import etag_matches, not_modified, private_validators
 from ..templates_config import templates
 
 router = APIRouter()
@@ -15,57 +21,32 @@ async def student_dashboard(
     student: Student = Depends(require_student),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get published modules
-    modules_stmt = select(Module).where(Module.is_published == True).order_by(Module.week_no)
-    modules_result = await db.execute(modules_stmt)
-    modules = modules_result.scalars().all()
-    
-    # Get student progress
-    progress_stmt = select(EnrollmentProgress).where(
-        EnrollmentProgress.student_id == student.id
-    ).options(selectinload(EnrollmentProgress.module))
-    progress_result = await db.execute(progress_stmt)
-    progress_data = {p.module_id: p for p in progress_result.scalars().all()}
-    
-    # Get latest assessment
-    assessment_stmt = select(AssessmentResult).where(
-        AssessmentResult.student_id == student.id
-    ).order_by(AssessmentResult.completed_at.desc()).limit(1)
-    assessment_result = await db.execute(assessment_stmt)
-    latest_assessment = assessment_result.scalar_one_or_none()
-    
-    # Get all assessment results for star calculation
-    all_assessments_stmt = select(AssessmentResult).where(
-        AssessmentResult.student_id == student.id
-    )
-    all_assessments_result = await db.execute(all_assessments_stmt)
-    all_assessments = all_assessments_result.scalars().all()
-    
-    # Calculate progress stats
-    total_modules = len(modules)
-    completed_modules = sum(1 for m in modules if progress_data.get(m.id) and progress_data[m.id].status == ProgressStatus.DONE)
-    module_stars = sum(p.stars for p in progress_data.values())
-    assessment_stars = sum(a.stars_earned for a in all_assessments)
-    total_stars = module_stars + assessment_stars
-    
-    # Find current week module
-    current_module = modules[0] if modules else None
+    catalog = await module_catalog.get(db)
+    # A revisit is checked with one cheap query before loading anything;
+    # a first visit takes its ETag from the snapshot instead
+    if request.headers.get("if-none-match"):
+        version = await StudentVersion.load(db, student.id)
+        etag = version.etag("dashboard", student, catalog)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    snapshot = await DashboardSnapshot.load(db, student.id, catalog)
+    etag = snapshot.version.etag("dashboard", student, catalog)
     
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
         "student": student,
-        "modules": modules,
-        "progress_data": progress_data,
-        "latest_assessment": latest_assessment,
-        "all_assessments": all_assessments,
-        "current_module": current_module,
-        "total_modules": total_modules,
-        "completed_modules": completed_modules,
-        "total_stars": total_stars,
-        "module_stars": module_stars,
-        "assessment_stars": assessment_stars,
+        "modules": snapshot.modules,
+        "progress_data": snapshot.progress_data,
+        "latest_assessment": snapshot.latest_assessment,
+        "current_module": snapshot.current_module,
+        "total_modules": snapshot.total_modules,
+        "completed_modules": snapshot.completed_modules,
+        "total_stars": snapshot.total_stars,
+        "module_stars": snapshot.module_stars,
+        "assessment_stars": snapshot.assessment_stars,
         "progress_status": ProgressStatus
-    })
+    }, headers=private_validators(etag))
 
 @router.get("/modules/{module_id}", response_class=HTMLResponse)
 async def module_detail(
@@ -75,9 +56,8 @@ async def module_detail(
     db: AsyncSession = Depends(get_db)
 ):
     # Get module
-    module_stmt = select(Module).where(Module.id == module_id, Module.is_published == True)
-    module_result = await db.execute(module_stmt)
-    module = module_result.scalar_one_or_none()
+    catalog = await module_catalog.get(db)
+    module = catalog.get_published(module_id)
     
     if not module:
         return RedirectResponse("/dashboard", status_code=302)
@@ -119,17 +99,25 @@ async def complete_module(
     student: Student = Depends(require_student),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get or create progress
+    # Lock the progress row until commit, so a concurrent completion (a
+    # double-click) waits and then sees DONE instead of counting it twice
     progress_stmt = select(EnrollmentProgress).where(
         EnrollmentProgress.student_id == student.id,
         EnrollmentProgress.module_id == module_id
-    )
+    ).with_for_update()
     progress_result = await db.execute(progress_stmt)
     progress = progress_result.scalar_one_or_none()
     
     if progress and progress.status != ProgressStatus.DONE:
         progress.status = ProgressStatus.DONE
         progress.stars = 3  # Award 3 stars for completion
+        
+        cohort = CohortDelta()
+        cohort.module_progress(student.class_label, module_id, None, progress.stars)
+        await cohort.apply(db)
+        stats = StudentStatsDelta()
+        stats.module_progress(student.id, None, progress.stars, datetime.utcnow())
+        await stats.apply(db)
         await db.commit()
     
     return RedirectResponse(f"/modules/{module_id}", status_code=302)
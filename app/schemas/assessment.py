@@ -1,8 +1,10 @@
-from pydantic import BaseModel
-from typing import Dict, Any
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Optional
 
 class AssessmentWebhookPayload(BaseModel):
     student_id: int
     raw_score: float
     level: str
-    domains: Dict[str, Any]
\ No newline at end of file
+    domains: Dict[str, Any]
+    # Retries carrying the same key are acknowledged without a second insert
+    idempotency_key: Optional[str] = Field(None, max_length=100)
\ No newline at end of file
@@ -0,0 +1,62 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+import hashlib
+import hmac
+import string
+from ..models import student_access_code_seq
+from ..config import settings
+
+class AccessCodeAllocator:
+    """
+    Hands out 6-character access codes that never collide with each other.
+    Each code is a sequence number run through a keyed Feistel permutation
+    of the 36^6 code space, so consecutive students get unrelated codes and
+    nothing needs to be looked up before inserting. The sequence steps by
+    BLOCK and each process hands out a block locally, so most allocations
+    don't touch the database at all. Codes typed in by an admin or issued
+    before this scheme can still clash; the unique constraint on
+    students.access_code catches those and callers take the next code.
+    """
+
+    ALPHABET = string.ascii_uppercase + string.digits
+    LENGTH = 6
+    HALF = len(ALPHABET) ** (LENGTH // 2)
+    SPACE = HALF * HALF
+    ROUNDS = 4
+    BLOCK = 64  # Must match the sequence's INCREMENT BY
+
+    def __init__(self, key: str):
+        self._key = key.encode("utf-8")
+        self._next = 0
+        self._end = 0
+
+    def _round(self, i: int, value: int) -> int:
+        digest = hmac.new(self._key, bytes([i]) + value.to_bytes(4, "big"), hashlib.sha256).digest()
+        return int.from_bytes(digest[:8], "big") % self.HALF
+
+    def encode(self, n: int) -> str:
+        """Access code for sequence number n; distinct n give distinct codes"""
+        if not 0 <= n < self.SPACE:
+            raise ValueError("Access code space exhausted")
+        left, right = divmod(n, self.HALF)
+        for i in range(self.ROUNDS):
+            left, right = right, (left + self._round(i, right)) % self.HALF
+        value = left * self.HALF + right
+
+        chars = []
+        for _ in range(self.LENGTH):
+            value, digit = divmod(value, len(self.ALPHABET))
+            chars.append(self.ALPHABET[digit])
+        return "".join(reversed(chars))
+
+    async def allocate(self, db: AsyncSession) -> str:
+        while self._next >= self._end:
+            base = await db.scalar(select(student_access_code_seq.next_value()))
+            # Another request may have refilled while we waited; its block wins
+            if self._next >= self._end:
+                self._next, self._end = base, base + self.BLOCK
+        n = self._next
+        self._next += 1
+        return self.encode(n)
+
+access_codes = AccessCodeAllocator(key=settings.ACCESS_CODE_KEY)
@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+import hashlib
+import json
+from ..models import ModuleAssessment
+from ..config import settings
+
+def content_hash(questions: str) -> str:
+    """Same digest Postgres returns for md5(questions), so either side can build a cache key"""
+    return hashlib.md5(questions.encode("utf-8")).hexdigest()
+
+def build_star_table(star_rewards: Mapping[str, int], max_score: int) -> Tuple[int, ...]:
+    """Resolve the "8-9" / "10" range rules into a direct score -> stars lookup"""
+    table = []
+    for score in range(max_score + 1):
+        stars_earned = 1  # Minimum 1 star for attempting
+        for score_range, stars in star_rewards.items():
+            if '-' in score_range:
+                min_score, max_score_in_range = map(int, score_range.split('-'))
+                if min_score <= score <= max_score_in_range:
+                    stars_earned = stars
+                    break
+            else:
+                if score >= int(score_range):
+                    stars_earned = stars
+                    break
+        table.append(stars_earned)
+    return tuple(table)
+
+@dataclass(frozen=True)
+class GradeResult:
+    answers: Dict[str, int]
+    score: int
+    percentage: int
+    stars_earned: int
+
+@dataclass(frozen=True)
+class CompiledAssessment:
+    """Parsed questions plus everything grading needs, built once per content hash"""
+    assessment_id: int
+    content_hash: str
+    data: Dict[str, Any]  # Parsed questions JSON; shared between requests, treat as read-only
+    field_names: Tuple[str, ...]
+    answer_key: Tuple[int, ...]
+    option_counts: Tuple[int, ...]
+    stars_by_score: Tuple[int, ...]
+    passing_score: int
+
+    @classmethod
+    def compile(cls, assessment_id: int, questions: str) -> "CompiledAssessment":
+        data = json.loads(questions)
+        question_list = data['questions']
+        return cls(
+            assessment_id=assessment_id,
+            content_hash=content_hash(questions),
+            data=data,
+            field_names=tuple(f"question_{i}" for i in range(1, len(question_list) + 1)),
+            answer_key=tuple(q['correct_answer'] for q in question_list),
+            option_counts=tuple(len(q['options']) for q in question_list),
+            stars_by_score=build_star_table(data['scoring']['star_rewards'], len(question_list)),
+            passing_score=data['scoring']['passing_score']
+        )
+
+    @property
+    def total_questions(self) -> int:
+        return len(self.answer_key)
+
+    @staticmethod
+    def _choice(value: Any, options: int) -> Optional[int]:
+        # Anything that isn't one of the question's options is stored as unanswered
+        try:
+            choice = int(value)
+        except (TypeError, ValueError):
+            return None
+        return choice if 0 <= choice < options else None
+
+    def grade(self, form_data: Mapping[str, Any]) -> GradeResult:
+        # Question n is answered by form field question_n and stored under key "n"
+        chosen = [
+            self._choice(form_data.get(name), options)
+            for name, options in zip(self.field_names, self.option_counts)
+        ]
+
+        score = sum(1 for answer, correct in zip(chosen, self.answer_key) if answer == correct)
+        answers = {str(i): answer for i, answer in enumerate(chosen, 1) if answer is not None}
+
+        return GradeResult(
+            answers=answers,
+            score=score,
+            percentage=int((score / self.total_questions) * 100),
+            stars_earned=self.stars_by_score[score]
+        )
+
+class AssessmentCache:
+    """
+    LRU cache of CompiledAssessment keyed by (assessment id, md5 of questions).
+
+    Callers read the hash alongside the assessment row (md5 is computed by
+    Postgres, so the questions text only crosses the wire on a miss). When
+    setup_module_assessment.py or an admin rewrites the questions the hash
+    changes, the next read recompiles, and the stale entry is dropped.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[int, str], CompiledAssessment]" = OrderedDict()
+
+    def invalidate(self, assessment_id: Optional[int] = None):
+        if assessment_id is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == assessment_id]:
+            del self._entries[key]
+
+    def put(self, compiled: CompiledAssessment) -> CompiledAssessment:
+        self.invalidate(compiled.assessment_id)
+        self._entries[(compiled.assessment_id, compiled.content_hash)] = compiled
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return compiled
+
+    async def get(self, db: AsyncSession, assessment_id: int, questions_hash: str) -> CompiledAssessment:
+        key = (assessment_id, questions_hash)
+        compiled = self._entries.get(key)
+        if compiled is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return compiled
+
+        self.misses += 1
+        questions = await db.scalar(
+            select(ModuleAssessment.questions).where(ModuleAssessment.id == assessment_id)
+        )
+        return self.put(CompiledAssessment.compile(assessment_id, questions))
+
+    async def get_active_for_module(self, db: AsyncSession, module_id: int) -> Optional[CompiledAssessment]:
+        stmt = select(
+            ModuleAssessment.id,
+            func.md5(ModuleAssessment.questions)
+        ).where(
+            ModuleAssessment.module_id == module_id,
+            ModuleAssessment.is_active == True
+        ).order_by(ModuleAssessment.id).limit(1)
+        row = (await db.execute(stmt)).first()
+        if not row:
+            return None
+        return await self.get(db, row[0], row[1])
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+assessment_cache = AssessmentCache(maxsize=settings.ASSESSMENT_CACHE_SIZE)
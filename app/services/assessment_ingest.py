@@ -0,0 +1,168 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from pydantic import ValidationError
+import hashlib
+import hmac
+import json
+import uuid
+from ..models import Student, AssessmentResult
+from ..schemas.assessment import AssessmentWebhookPayload
+from ..config import settings
+from .counters import CounterService
+from .cohort_analytics import CohortDelta
+from .student_stats import StudentStatsDelta
+
+def generate_recommendation(raw_score: float, level: str, domains: dict) -> str:
+    """Generate personalized learning recommendations based on assessment results"""
+    
+    # Base recommendations based on overall performance
+    if raw_score >= 80:
+        base_rec = "Excellent work! You're showing strong skills across multiple areas. "
+        next_steps = "Continue challenging yourself with advanced topics and consider helping classmates who might need support."
+    elif raw_score >= 65:
+        base_rec = "Good job! You're making solid progress in your learning journey. "
+        next_steps = "Focus on strengthening areas where you scored lower to build a well-rounded foundation."
+    elif raw_score >= 50:
+        base_rec = "You're on the right track! There are areas where you can improve. "
+        next_steps = "Spend extra time practicing the concepts that were challenging in this assessment."
+    else:
+        base_rec = "Keep working hard! Learning takes time and practice. "
+        next_steps = "Consider reviewing the basics and don't hesitate to ask for help when needed."
+    
+    # Find the strongest and weakest domains
+    if domains:
+        sorted_domains = sorted(domains.items(), key=lambda x: x[1], reverse=True)
+        strongest = sorted_domains[0] if sorted_domains else None
+        weakest = sorted_domains[-1] if len(sorted_domains) > 1 else None
+        
+        strength_note = ""
+        if strongest and strongest[1] > 70:
+            domain_name = strongest[0].replace('_', ' ').title()
+            strength_note = f" Your strongest area is {domain_name} - great work there!"
+        
+        improvement_note = ""
+        if weakest and weakest[1] < 60:
+            domain_name = weakest[0].replace('_', ' ').title()
+            improvement_note = f" Focus on improving your {domain_name} skills through extra practice."
+        
+        return base_rec + strength_note + improvement_note + " " + next_steps
+    
+    return base_rec + next_steps
+
+@dataclass
+class IngestOutcome:
+    index: int
+    status: str  # created | duplicate | student_not_found | invalid | queued
+    student_id: Optional[int] = None
+    idempotency_key: Optional[str] = None
+    id: Optional[int] = None
+    errors: Optional[List[Dict[str, Any]]] = None
+
+class AssessmentIngestService:
+
+    @staticmethod
+    def signature_valid(body: bytes, signature: str) -> bool:
+        expected_signature = hmac.new(
+            settings.WEBHOOK_SECRET.encode('utf-8'),
+            body,
+            hashlib.sha256
+        ).hexdigest()
+        return hmac.compare_digest(f"sha256={expected_signature}", signature)
+
+    @staticmethod
+    def validate_items(items: List[Any]) -> Tuple[List[Tuple[int, AssessmentWebhookPayload]], List[IngestOutcome]]:
+        """Validate each item on its own so one bad row doesn't reject the batch"""
+        payloads, invalid = [], []
+        for index, item in enumerate(items):
+            try:
+                payloads.append((index, AssessmentWebhookPayload.model_validate(item)))
+            except ValidationError as e:
+                invalid.append(IngestOutcome(
+                    index=index,
+                    status="invalid",
+                    errors=e.errors(include_url=False, include_context=False)
+                ))
+        return payloads, invalid
+
+    @staticmethod
+    async def ingest(
+        db: AsyncSession,
+        payloads: List[Tuple[int, AssessmentWebhookPayload]]
+    ) -> List[IngestOutcome]:
+        """
+        Record (index, payload) pairs in one transaction: a single query to
+        check every student id, then one multi-row INSERT that skips keys
+        already recorded. Payloads without an idempotency key always insert,
+        under a generated key so RETURNING rows map back to their payloads.
+        """
+        if not payloads:
+            return []
+
+        student_ids = {payload.student_id for _, payload in payloads}
+        class_labels = dict((await db.execute(
+            select(Student.id, Student.class_label).where(Student.id.in_(student_ids))
+        )).all())
+
+        outcomes: Dict[int, IngestOutcome] = {}
+        rows, pending = [], []
+        seen_keys = set()
+        for index, payload in payloads:
+            key = payload.idempotency_key or None
+            outcome = IngestOutcome(index=index, status="created", student_id=payload.student_id, idempotency_key=key)
+            outcomes[index] = outcome
+
+            if payload.student_id not in class_labels:
+                outcome.status = "student_not_found"
+                continue
+            if key is not None:
+                if key in seen_keys:
+                    outcome.status = "duplicate"  # Repeated within this batch
+                    continue
+                seen_keys.add(key)
+
+            rows.append({
+                "student_id": payload.student_id,
+                "raw_score": payload.raw_score,
+                "level": payload.level,
+                "domain_breakdown": json.dumps(payload.domains),
+                "stars_earned": 3,  # Award 3 stars for completing assessment
+                "recommendation": generate_recommendation(payload.raw_score, payload.level, payload.domains),
+                # RETURNING order isn't guaranteed, so every row needs a key to match it by
+                "idempotency_key": key or uuid.uuid4().hex
+            })
+            pending.append((outcome, payload, rows[-1]["idempotency_key"]))
+
+        if rows:
+            stmt = insert(AssessmentResult).values(rows).on_conflict_do_nothing(
+                index_elements=[AssessmentResult.idempotency_key]
+            ).returning(
+                AssessmentResult.id,
+                AssessmentResult.idempotency_key,
+                AssessmentResult.student_id,
+                AssessmentResult.stars_earned,
+                AssessmentResult.completed_at
+            )
+            inserted = (await db.execute(stmt)).all()
+
+            ids_by_key = {row.idempotency_key: row.id for row in inserted}
+            stats = StudentStatsDelta()
+            for row in inserted:
+                stats.assessment(row.student_id, row.id, row.stars_earned, row.completed_at)
+            cohort = CohortDelta()
+            for outcome, payload, row_key in pending:
+                if row_key in ids_by_key:
+                    outcome.id = ids_by_key[row_key]
+                else:
+                    outcome.status = "duplicate"  # Recorded by an earlier delivery
+                    continue
+                cohort.assessment(class_labels[payload.student_id], payload.raw_score, payload.level, payload.domains)
+
+            await CounterService.add(db, "assessment_results", len(inserted))
+            await cohort.apply(db)
+            await stats.apply(db)
+            await db.commit()
+
+        return [outcomes[index] for index, _ in payloads]
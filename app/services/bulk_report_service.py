@@ -0,0 +1,229 @@
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+import asyncio
+import json
+import re
+import time
+import uuid
+import zipfile
+from ..models import Student, EnrollmentProgress, AssessmentResult, StudentStats
+from .module_catalog import module_catalog
+from .dashboard_service import ProgressSummary, AssessmentSummary
+from .principal_cache import StudentSnapshot
+from .pdf_renderer import pdf_renderer
+
+@dataclass
+class BulkReportJob:
+    id: str
+    class_label: Optional[str]
+    total: int
+    rendered: int = 0
+    failed: int = 0
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is None:
+            return "running"
+        return "complete" if self.rendered + self.failed == self.total else "aborted"
+
+    def progress(self) -> dict:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        done = self.rendered + self.failed
+        return {
+            **asdict(self),
+            "status": self.status,
+            "percent": round(100 * done / self.total, 1) if self.total else 100.0,
+            "elapsed_seconds": round(elapsed, 2),
+            "reports_per_second": round(self.rendered / elapsed, 2) if elapsed > 0 else 0.0
+        }
+
+class _ZipBuffer:
+    """Write-only sink for ZipFile; the bytes written so far are drained after each entry"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class BulkReportService:
+
+    # Finished jobs kept for the progress endpoint
+    MAX_JOBS = 50
+    jobs: Dict[str, BulkReportJob] = {}
+
+    @staticmethod
+    async def load_cohort(db: AsyncSession, class_label: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Report payloads for every student in a class (or everyone), in the
+        shape ReportService.pdf_payload produces. Three queries regardless of
+        cohort size: students, their progress rows, and their stats rows
+        with the latest assessment each points at.
+        """
+        catalog = await module_catalog.get(db)
+        modules = catalog.published
+
+        students_stmt = select(Student).order_by(Student.first_name, Student.id)
+        if class_label:
+            students_stmt = students_stmt.where(Student.class_label == class_label)
+        students = [
+            StudentSnapshot.from_model(s) for s in (await db.execute(students_stmt)).scalars().all()
+        ]
+        if not students:
+            return []
+
+        cohort_ids = select(Student.id)
+        if class_label:
+            cohort_ids = cohort_ids.where(Student.class_label == class_label)
+
+        progress_stmt = select(
+            EnrollmentProgress.student_id,
+            EnrollmentProgress.module_id,
+            EnrollmentProgress.status,
+            EnrollmentProgress.stars
+        ).where(EnrollmentProgress.student_id.in_(cohort_ids))
+        progress_by_student: Dict[int, Dict[int, ProgressSummary]] = {}
+        for row in await db.execute(progress_stmt):
+            progress_by_student.setdefault(row.student_id, {})[row.module_id] = ProgressSummary(row.status, row.stars)
+
+        # Totals and the latest result by primary key, from each student's stats row
+        stats_stmt = select(
+            StudentStats.student_id,
+            StudentStats.modules_completed,
+            StudentStats.total_stars,
+            AssessmentResult.id,
+            AssessmentResult.level,
+            AssessmentResult.raw_score,
+            AssessmentResult.stars_earned,
+            AssessmentResult.recommendation,
+            AssessmentResult.completed_at,
+            AssessmentResult.domain_breakdown
+        ).outerjoin(
+            AssessmentResult, AssessmentResult.id == StudentStats.latest_assessment_id
+        ).where(StudentStats.student_id.in_(cohort_ids))
+        stats_by_student = {row.student_id: row for row in await db.execute(stats_stmt)}
+
+        report_date = datetime.now().strftime("%B %d, %Y")
+        payloads = []
+        for student in students:
+            progress_data = progress_by_student.get(student.id, {})
+            stats = stats_by_student.get(student.id)
+            latest = stats if stats and stats.id is not None else None
+
+            domain_breakdown = None
+            if latest and latest.domain_breakdown:
+                try:
+                    domain_breakdown = json.loads(latest.domain_breakdown)
+                except ValueError:
+                    pass
+
+            total_modules = len(modules)
+            completed_modules = stats.modules_completed if stats else 0
+            payloads.append({
+                "student": student,
+                "modules": modules,
+                "progress_data": progress_data,
+                "latest_assessment": AssessmentSummary(
+                    id=latest.id,
+                    level=latest.level,
+                    raw_score=latest.raw_score,
+                    stars_earned=latest.stars_earned,
+                    recommendation=latest.recommendation,
+                    completed_at=latest.completed_at
+                ) if latest else None,
+                "domain_breakdown": domain_breakdown,
+                "total_modules": total_modules,
+                "completed_modules": completed_modules,
+                "total_stars": stats.total_stars if stats else 0,
+                "progress_percentage": min(int((completed_modules / total_modules) * 100), 100) if total_modules > 0 else 0,
+                "report_date": report_date
+            })
+        return payloads
+
+    @staticmethod
+    def safe_name(text: str, default: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_-]+", "_", text).strip("_") or default
+
+    @staticmethod
+    def report_filename(student: StudentSnapshot) -> str:
+        name = BulkReportService.safe_name(student.first_name, "student")
+        return f"{name}_{student.id}_progress_report.pdf"
+
+    @classmethod
+    def start_job(cls, class_label: Optional[str], total: int) -> BulkReportJob:
+        job = BulkReportJob(
+            id=uuid.uuid4().hex[:12],
+            class_label=class_label,
+            total=total,
+            started_at=time.monotonic()
+        )
+        cls.jobs[job.id] = job
+        while len(cls.jobs) > cls.MAX_JOBS:
+            cls.jobs.pop(next(iter(cls.jobs)))
+        return job
+
+    @staticmethod
+    async def iter_zip(payloads: List[Dict[str, Any]], job: BulkReportJob) -> AsyncIterator[bytes]:
+        """
+        Render every payload on the PDF process pool and yield the ZIP archive
+        as each report finishes, in completion order. Only a small window of
+        renders is queued at once so single-report requests still get pool
+        slots while a class is being generated.
+        """
+        # The renderer admits twice its worker count; leave half for other requests
+        window = max(pdf_renderer.workers, 1)
+        buffer = _ZipBuffer()
+        archive = zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED)
+        errors = []
+
+        async def render(payload):
+            try:
+                return payload["student"], await pdf_renderer.render(payload), None
+            except Exception as e:
+                return payload["student"], None, e
+
+        pending = set()
+        queued = iter(payloads)
+        try:
+            while True:
+                for payload in queued:
+                    pending.add(asyncio.ensure_future(render(payload)))
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    student, pdf, error = task.result()
+                    if error is not None:
+                        job.failed += 1
+                        errors.append(f"{student.id} {student.first_name}: {error.__class__.__name__}: {error}")
+                        continue
+                    archive.writestr(BulkReportService.report_filename(student), pdf)
+                    job.rendered += 1
+                yield buffer.drain()
+
+            if errors:
+                archive.writestr("errors.txt", "\n".join(errors) + "\n")
+            archive.close()
+            yield buffer.drain()
+        finally:
+            # Client disconnected or a render raised out of the loop
+            for task in pending:
+                task.cancel()
+            job.finished_at = time.monotonic()
@@ -0,0 +1,236 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+from sqlalchemy import select, delete, text
+from sqlalchemy.dialects.postgresql import insert
+from ..models import CohortStat
+from .module_catalog import CatalogSnapshot
+
+# Metrics kept per class in cohort_stats (count / total):
+#   students                      class size
+#   module_done     <module_id>   students who finished the module / their stars
+#   module_attempts <module_id>   module assessment attempts / their percentages
+#   assessments                   external assessment results / raw scores
+#   level           <level>       results at that level
+#   domain          <domain>      results with that domain / its scores
+KEY_LENGTH = 100
+
+class CohortDelta:
+    """
+    Changes to per-class aggregates gathered during one request, applied in
+    the same transaction as the rows they describe. Students without a
+    class label belong to no cohort and are skipped.
+    """
+
+    def __init__(self):
+        self.rows: Dict[Tuple[str, str, str], List[float]] = defaultdict(lambda: [0, 0.0])
+
+    def add(self, class_label: Optional[str], metric: str, key: Any = "", count: int = 0, total: float = 0.0):
+        if not class_label:
+            return
+        row = self.rows[(class_label, metric, str(key)[:KEY_LENGTH])]
+        row[0] += count
+        row[1] += total
+
+    def student(self, class_label: Optional[str]):
+        self.add(class_label, "students", count=1)
+
+    def module_progress(self, class_label: Optional[str], module_id: int, old_stars: Optional[int], stars: int):
+        """A progress row is now DONE with `stars`; old_stars is None if it wasn't DONE before"""
+        if old_stars is None:
+            self.add(class_label, "module_done", module_id, count=1, total=stars)
+        elif stars != old_stars:
+            self.add(class_label, "module_done", module_id, total=stars - old_stars)
+
+    def module_attempt(self, class_label: Optional[str], module_id: int, percentage: float):
+        self.add(class_label, "module_attempts", module_id, count=1, total=percentage)
+
+    def assessment(self, class_label: Optional[str], raw_score: float, level: str, domains: Dict[str, Any]):
+        self.add(class_label, "assessments", count=1, total=raw_score)
+        self.add(class_label, "level", level, count=1)
+        for domain, score in (domains or {}).items():
+            if isinstance(score, (int, float)) and not isinstance(score, bool):
+                self.add(class_label, "domain", domain, count=1, total=score)
+
+    async def apply(self, db: Union[AsyncSession, AsyncConnection]):
+        """One upsert for everything gathered; the caller commits"""
+        if not self.rows:
+            return
+        # Sorted so concurrent transactions lock shared rows in the same order
+        values = [
+            {"class_label": class_label, "metric": metric, "key": key, "count": count, "total": total}
+            for (class_label, metric, key), (count, total) in sorted(self.rows.items())
+        ]
+        stmt = insert(CohortStat).values(values)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[CohortStat.class_label, CohortStat.metric, CohortStat.key],
+            set_={
+                "count": CohortStat.count + stmt.excluded.count,
+                "total": CohortStat.total + stmt.excluded.total
+            }
+        ))
+        self.rows.clear()
+
+@dataclass
+class CohortReport:
+    class_label: str
+    students: int = 0
+    modules: List[Dict[str, Any]] = field(default_factory=list)
+    average_stars: float = 0.0  # Module stars per student
+    assessments: int = 0
+    average_score: Optional[float] = None
+    levels: Dict[str, int] = field(default_factory=dict)
+    domains: Dict[str, float] = field(default_factory=dict)  # Average score per domain
+
+def _average(total: float, count: int) -> Optional[float]:
+    return round(total / count, 1) if count else None
+
+class CohortAnalytics:
+    """
+    Per-class views built from cohort_stats alone: the number of rows read
+    depends on modules, levels and domains, never on class size.
+    """
+
+    @staticmethod
+    async def class_sizes(db: AsyncSession) -> Dict[str, int]:
+        rows = (await db.execute(
+            select(CohortStat.class_label, CohortStat.count)
+            .where(CohortStat.metric == "students", CohortStat.count > 0)
+            .order_by(CohortStat.class_label)
+        )).all()
+        return {class_label: count for class_label, count in rows}
+
+    @staticmethod
+    async def report(db: AsyncSession, class_label: str, catalog: CatalogSnapshot) -> CohortReport:
+        rows = (await db.execute(
+            select(CohortStat).where(CohortStat.class_label == class_label)
+        )).scalars().all()
+        stats = {(row.metric, row.key): row for row in rows}
+
+        def get(metric: str, key: str = "") -> Tuple[int, float]:
+            row = stats.get((metric, key))
+            return (row.count, row.total) if row else (0, 0.0)
+
+        report = CohortReport(class_label=class_label, students=get("students")[0])
+        module_stars = 0.0
+        for module in catalog.modules:
+            done, stars = get("module_done", str(module.id))
+            attempts, percentages = get("module_attempts", str(module.id))
+            module_stars += stars
+            report.modules.append({
+                "module_id": module.id,
+                "week_no": module.week_no,
+                "title": module.title,
+                "completed": done,
+                "completion_rate": round(100 * done / report.students, 1) if report.students else 0.0,
+                "average_stars": _average(stars, done),
+                "attempts": attempts,
+                "average_percentage": _average(percentages, attempts)
+            })
+        report.average_stars = _average(module_stars, report.students) or 0.0
+
+        report.assessments, scores = get("assessments")
+        report.average_score = _average(scores, report.assessments)
+        for (metric, key), row in sorted(stats.items()):
+            if metric == "level":
+                report.levels[key] = row.count
+            elif metric == "domain":
+                report.domains[key] = _average(row.total, row.count)
+        return report
+
+    # Every aggregate recomputed from the source tables, as (class, metric, key, count, total)
+    REBUILD_SQL = """
+        WITH cohort AS (
+            SELECT id, class_label FROM students WHERE class_label <> ''
+        ),
+        results AS (
+            SELECT c.class_label, r.raw_score, r.level, r.domain_breakdown
+            FROM assessment_results r JOIN cohort c ON c.id = r.student_id
+        )
+        SELECT class_label, 'students', '', count(*), 0 FROM cohort GROUP BY class_label
+        UNION ALL
+        SELECT c.class_label, 'module_done', p.module_id::text, count(*), coalesce(sum(p.stars), 0)
+        FROM enrollment_progress p JOIN cohort c ON c.id = p.student_id
+        WHERE p.status = 'DONE'
+        GROUP BY c.class_label, p.module_id
+        UNION ALL
+        SELECT c.class_label, 'module_attempts', a.module_id::text, count(*), sum(t.percentage)
+        FROM module_assessment_attempts t
+        JOIN module_assessments a ON a.id = t.assessment_id
+        JOIN cohort c ON c.id = t.student_id
+        GROUP BY c.class_label, a.module_id
+        UNION ALL
+        SELECT class_label, 'assessments', '', count(*), sum(raw_score) FROM results GROUP BY class_label
+        UNION ALL
+        SELECT class_label, 'level', left(level, 100), count(*), 0 FROM results GROUP BY 1, 3
+        UNION ALL
+        SELECT r.class_label, 'domain', left(d.key, 100), count(*), sum(d.value::text::float)
+        FROM results r, json_each(r.domain_breakdown::json) d
+        WHERE r.domain_breakdown LIKE '{%' AND json_typeof(d.value) = 'number'
+        GROUP BY 1, 3
+    """
+
+    @staticmethod
+    async def reconcile(db: Union[AsyncSession, AsyncConnection], fix: bool = True) -> Dict[Tuple[str, str, str], Tuple[Tuple[int, float], Tuple[int, float]]]:
+        """
+        (stored, actual) for every aggregate that has drifted from the source
+        tables, rebuilding the table set-based when fix is set. Writers are
+        held back by the table lock until the caller commits.
+        """
+        await db.execute(text("LOCK TABLE cohort_stats IN EXCLUSIVE MODE"))
+        stored = {
+            (row.class_label, row.metric, row.key): (row.count, row.total)
+            for row in (await db.execute(select(CohortStat))).scalars().all()
+        }
+        actual = {
+            (class_label, metric, key): (int(count), float(total))
+            for class_label, metric, key, count, total in (await db.execute(text(CohortAnalytics.REBUILD_SQL))).all()
+        }
+
+        drifted = {}
+        for key in stored.keys() | actual.keys():
+            old, new = stored.get(key, (0, 0.0)), actual.get(key, (0, 0.0))
+            if old[0] != new[0] or abs(old[1] - new[1]) > 1e-6 * max(1.0, abs(new[1])):
+                drifted[key] = (old, new)
+
+        if fix and drifted:
+            await db.execute(delete(CohortStat))
+            await db.execute(text(
+                "INSERT INTO cohort_stats (class_label, metric, key, count, total) " + CohortAnalytics.REBUILD_SQL
+            ))
+        return drifted
+
+    # The two per-module metrics for one module, for writes that rescore it in bulk
+    MODULE_REBUILD_SQL = """
+        SELECT s.class_label, 'module_done', p.module_id::text, count(*), coalesce(sum(p.stars), 0)
+        FROM enrollment_progress p JOIN students s ON s.id = p.student_id
+        WHERE p.status = 'DONE' AND p.module_id = :module_id AND s.class_label <> ''
+        GROUP BY s.class_label, p.module_id
+        UNION ALL
+        SELECT s.class_label, 'module_attempts', a.module_id::text, count(*), sum(t.percentage)
+        FROM module_assessment_attempts t
+        JOIN module_assessments a ON a.id = t.assessment_id
+        JOIN students s ON s.id = t.student_id
+        WHERE a.module_id = :module_id AND s.class_label <> ''
+        GROUP BY s.class_label, a.module_id
+    """
+
+    @staticmethod
+    async def rebuild_module(db: AsyncSession, module_id: int):
+        """Recompute one module's aggregates in the caller's transaction (the caller commits)"""
+        await db.execute(delete(CohortStat).where(
+            CohortStat.metric.in_(("module_done", "module_attempts")),
+            CohortStat.key == str(module_id)
+        ))
+        await db.execute(text(
+            "INSERT INTO cohort_stats (class_label, metric, key, count, total) "
+            + CohortAnalytics.MODULE_REBUILD_SQL
+        ), {"module_id": module_id})
+
+    @staticmethod
+    async def initialize(db: AsyncSession):
+        """Build the aggregates the first time the app starts against a database"""
+        if await db.scalar(select(CohortStat.class_label).limit(1)) is None:
+            await CohortAnalytics.reconcile(db)
+            await db.commit()
@@ -0,0 +1,79 @@
+from typing import Dict, Tuple, Union
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+from sqlalchemy import select, func, delete, text
+from sqlalchemy.dialects.postgresql import insert
+import random
+from ..models import Student, Module, AssessmentResult, StatCounter
+
+class CounterService:
+    """
+    Row counts for the admin dashboard, kept in stat_counters by the code
+    that inserts the rows, inside the same transaction, so reading them is a
+    handful of primary-key rows instead of COUNT(*) over growing tables.
+    Anything that writes around these paths (bulk SQL, manual deletes)
+    should finish with reconcile().
+    """
+
+    SHARDS = 8
+    COUNTED = {
+        "students": Student,
+        "modules": Module,
+        "assessment_results": AssessmentResult,
+    }
+
+    @staticmethod
+    async def add(db: Union[AsyncSession, AsyncConnection], name: str, n: int = 1):
+        """Add n to a counter as part of the caller's transaction (the caller commits)"""
+        if not n:
+            return
+        stmt = insert(StatCounter).values(name=name, shard=random.randrange(CounterService.SHARDS), value=n)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[StatCounter.name, StatCounter.shard],
+            set_={"value": StatCounter.value + stmt.excluded.value}
+        ))
+
+    @staticmethod
+    async def read(db: Union[AsyncSession, AsyncConnection]) -> Dict[str, int]:
+        rows = (await db.execute(
+            select(StatCounter.name, func.sum(StatCounter.value)).group_by(StatCounter.name)
+        )).all()
+        counts = {name: 0 for name in CounterService.COUNTED}
+        counts.update({name: int(value) for name, value in rows})
+        return counts
+
+    @staticmethod
+    async def actual(db: Union[AsyncSession, AsyncConnection]) -> Dict[str, int]:
+        return {
+            name: await db.scalar(select(func.count()).select_from(model))
+            for name, model in CounterService.COUNTED.items()
+        }
+
+    @staticmethod
+    async def reconcile(db: Union[AsyncSession, AsyncConnection], fix: bool = True) -> Dict[str, Tuple[int, int]]:
+        """
+        (counter, actual) for every counter that disagrees with COUNT(*),
+        rewriting them when fix is set. The table lock waits for writers
+        that already bumped a counter to commit and holds new ones back until
+        the caller commits, so no increment is lost or counted twice.
+        """
+        await db.execute(text("LOCK TABLE stat_counters IN EXCLUSIVE MODE"))
+        counters = await CounterService.read(db)
+        actual = await CounterService.actual(db)
+        mismatched = {
+            name: (counters[name], count)
+            for name, count in actual.items()
+            if counters[name] != count
+        }
+        if fix and mismatched:
+            await db.execute(delete(StatCounter).where(StatCounter.name.in_(mismatched)))
+            await db.execute(insert(StatCounter).values([
+                {"name": name, "shard": 0, "value": actual[name]} for name in mismatched
+            ]))
+        return mismatched
+
+    @staticmethod
+    async def initialize(db: AsyncSession):
+        """Seed the counters from real counts the first time the app starts against a database"""
+        if await db.scalar(select(func.count()).select_from(StatCounter)) == 0:
+            await CounterService.reconcile(db)
+            await db.commit()
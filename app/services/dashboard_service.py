@@ -0,0 +1,140 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, true, literal
+from ..models import EnrollmentProgress, AssessmentResult, ProgressStatus, StudentStats
+from .module_catalog import CatalogSnapshot, ModuleInfo
+from .page_validators import StudentVersion
+
+@dataclass(frozen=True)
+class ProgressSummary:
+    status: ProgressStatus
+    stars: int
+
+@dataclass(frozen=True)
+class AssessmentSummary:
+    id: int
+    level: str
+    raw_score: float
+    stars_earned: int
+    recommendation: Optional[str]
+    completed_at: datetime
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """Everything /dashboard renders for one student, loaded in a single query"""
+    modules: Tuple[ModuleInfo, ...] = ()
+    progress_data: Dict[int, ProgressSummary] = field(default_factory=dict)
+    latest_assessment: Optional[AssessmentSummary] = None
+    # Totals come from student_stats, which the parent report and admin pages read too
+    completed_modules: int = 0
+    module_stars: int = 0
+    assessment_stars: int = 0
+    # Validator for the page, from the same rows (see StudentVersion.load)
+    version: Optional[StudentVersion] = None
+
+    @property
+    def total_modules(self) -> int:
+        return len(self.modules)
+
+    @property
+    def total_stars(self) -> int:
+        return self.module_stars + self.assessment_stars
+
+    @property
+    def current_module(self) -> Optional[ModuleInfo]:
+        return self.modules[0] if self.modules else None
+
+    @staticmethod
+    def build_query(student_id: int):
+        # Modules come from the cached catalog, so only per-student rows are fetched
+        progress = select(
+            EnrollmentProgress.module_id,
+            EnrollmentProgress.status,
+            EnrollmentProgress.stars,
+            EnrollmentProgress.updated_at
+        ).where(EnrollmentProgress.student_id == student_id).subquery("progress")
+
+        # The stats row points at the latest result, so no per-student sort or sum
+        totals = select(
+            StudentStats.module_stars,
+            StudentStats.assessment_stars,
+            StudentStats.modules_completed,
+            StudentStats.latest_assessment_id,
+            AssessmentResult.id,
+            AssessmentResult.level,
+            AssessmentResult.raw_score,
+            AssessmentResult.stars_earned,
+            AssessmentResult.recommendation,
+            AssessmentResult.completed_at
+        ).outerjoin(
+            AssessmentResult, AssessmentResult.id == StudentStats.latest_assessment_id
+        ).where(StudentStats.student_id == student_id).subquery("totals")
+
+        # One-row anchor so totals and the latest assessment come back even
+        # when the student has no progress rows or stats row yet
+        anchor = select(literal(student_id).label("student_id")).subquery("anchor")
+
+        return select(
+            progress.c.module_id,
+            progress.c.status,
+            progress.c.stars,
+            progress.c.updated_at,
+            totals.c.module_stars,
+            totals.c.assessment_stars,
+            totals.c.modules_completed,
+            totals.c.latest_assessment_id,
+            totals.c.id.label("assessment_id"),
+            totals.c.level.label("assessment_level"),
+            totals.c.raw_score.label("assessment_raw_score"),
+            totals.c.stars_earned.label("assessment_stars_earned"),
+            totals.c.recommendation.label("assessment_recommendation"),
+            totals.c.completed_at.label("assessment_completed_at")
+        ).select_from(anchor).outerjoin(
+            progress, true()
+        ).outerjoin(
+            totals, true()
+        ).order_by(progress.c.module_id)
+
+    @classmethod
+    async def load(
+        cls, db: AsyncSession, student_id: int, catalog: CatalogSnapshot
+    ) -> "DashboardSnapshot":
+        result = await db.execute(cls.build_query(student_id))
+        rows = result.all()
+
+        progress_data = {}
+        progress_updated_at = []
+        for row in rows:
+            # A student without progress gives a single all-NULL progress row
+            if row.module_id is None:
+                continue
+            progress_updated_at.append(row.updated_at)
+            if catalog.get_published(row.module_id):
+                progress_data[row.module_id] = ProgressSummary(row.status, row.stars or 0)
+
+        first = rows[0]
+        latest_assessment = None
+        if first.assessment_id is not None:
+            latest_assessment = AssessmentSummary(
+                id=first.assessment_id,
+                level=first.assessment_level,
+                raw_score=first.assessment_raw_score,
+                stars_earned=first.assessment_stars_earned,
+                recommendation=first.assessment_recommendation,
+                completed_at=first.assessment_completed_at
+            )
+
+        return cls(
+            modules=catalog.published,
+            progress_data=progress_data,
+            latest_assessment=latest_assessment,
+            completed_modules=first.modules_completed or 0,
+            module_stars=first.module_stars or 0,
+            assessment_stars=first.assessment_stars or 0,
+            version=StudentVersion.from_loaded(
+                progress_updated_at, first.module_stars, first.assessment_stars,
+                first.modules_completed, first.latest_assessment_id
+            )
+        )
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+from typing import AsyncIterator, Optional
+from sqlalchemy import select
+import csv
+import io
+import zlib
+from ..models import async_session, Student, AssessmentResult
+
+class ExportService:
+
+    CHUNK_ROWS = 2000
+
+    HEADER = [
+        "Student ID", "First Name", "Parent Email", "Access Code",
+        "Raw Score", "Level", "Completed At", "Domain Breakdown"
+    ]
+
+    @staticmethod
+    def assessments_query(
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        class_label: Optional[str] = None
+    ):
+        stmt = select(
+            AssessmentResult.student_id,
+            Student.first_name,
+            Student.parent_email,
+            Student.access_code,
+            AssessmentResult.raw_score,
+            AssessmentResult.level,
+            AssessmentResult.completed_at,
+            AssessmentResult.domain_breakdown
+        ).join(Student, Student.id == AssessmentResult.student_id)
+
+        if start_date:
+            stmt = stmt.where(AssessmentResult.completed_at >= start_date)
+        if end_date:
+            # Inclusive of the whole end day
+            stmt = stmt.where(AssessmentResult.completed_at < end_date + timedelta(days=1))
+        if class_label:
+            stmt = stmt.where(Student.class_label == class_label)
+
+        return stmt.order_by(AssessmentResult.completed_at.desc())
+
+    @staticmethod
+    async def iter_assessments_csv(
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        class_label: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Yield the assessments CSV in chunks as rows arrive from a server-side cursor"""
+        stmt = ExportService.assessments_query(start_date, end_date, class_label)
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(ExportService.HEADER)
+
+        # The streaming response outlives the request's own session, so use a dedicated one
+        async with async_session() as db:
+            result = await db.stream(stmt.execution_options(yield_per=ExportService.CHUNK_ROWS))
+            async for rows in result.partitions():
+                for row in rows:
+                    writer.writerow([
+                        row.student_id,
+                        row.first_name,
+                        row.parent_email,
+                        row.access_code,
+                        row.raw_score,
+                        row.level,
+                        row.completed_at.strftime("%Y-%m-%d %H:%M:%S"),
+                        row.domain_breakdown or ""
+                    ])
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+
+        if output.tell():
+            yield output.getvalue()
+
+    @staticmethod
+    async def gzip_chunks(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+        compressor = zlib.compressobj(wbits=31)  # gzip container
+        async for chunk in chunks:
+            data = compressor.compress(chunk.encode("utf-8"))
+            if data:
+                yield data
+        yield compressor.flush()
@@ -0,0 +1,56 @@
+from typing import Dict, Iterable, Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    True when If-None-Match lists this ETag or is *. The comparison is weak,
+    as RFC 9110 asks for If-None-Match, so a tag CompressionMiddleware
+    weakened still matches the strong one the route computes.
+    """
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(",")]
+    return "*" in candidates or any(
+        c.removeprefix("W/") == etag.removeprefix("W/") for c in candidates
+    )
+
+def private_validators(etag: str) -> Dict[str, str]:
+    """Headers for a per-user page that browsers may keep but must revalidate"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def not_modified(etag: str, cache_control: str = "private, no-cache") -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    """Content codings from an Accept-Encoding header with their q-values; q=0 means refused"""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+def negotiate_encoding(header: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """
+    The coding to send out of `available` (in server preference order), or
+    None for identity. Highest q wins; ties go to the server's order.
+    """
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
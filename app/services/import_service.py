@@ -0,0 +1,265 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+import codecs
+import csv
+import io
+import json
+import time
+from ..models import Student
+from .assessment_ingest import generate_recommendation
+from .counters import CounterService
+from .cohort_analytics import CohortDelta
+from .student_stats import StudentStatsDelta
+
+class CsvImportError(ValueError):
+    """The upload can't be imported at all (bad header, not text)"""
+
+@dataclass
+class ImportSummary:
+    rows: int = 0
+    inserted: int = 0
+    skipped_student_not_found: int = 0
+    skipped_duplicate: int = 0
+    errors: int = 0
+    error_samples: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    def add_error(self, row: int, message: str):
+        self.errors += 1
+        if len(self.error_samples) < ImportService.MAX_ERROR_SAMPLES:
+            self.error_samples.append({"row": row, "error": message})
+
+class ImportService:
+
+    CHUNK_ROWS = 5000
+    MAX_ERROR_SAMPLES = 100
+
+    # Normalised header -> column; the export's own headers are accepted too
+    COLUMNS = {
+        "student_id": "student_id",
+        "raw_score": "raw_score",
+        "level": "level",
+        "domain_breakdown": "domains",
+        "domains": "domains",
+        "completed_at": "completed_at",
+        "stars_earned": "stars_earned",
+        "idempotency_key": "idempotency_key",
+    }
+    REQUIRED = ("student_id", "raw_score", "level")
+
+    # Staging table columns, in COPY order
+    COPY_COLUMNS = (
+        "student_id", "raw_score", "level", "domain_breakdown",
+        "stars_earned", "recommendation", "completed_at", "idempotency_key"
+    )
+
+    @staticmethod
+    async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+        """
+        Parse CSV rows from a byte stream without holding more than one chunk
+        of text. Text is only handed to the csv module up to the last newline
+        that is outside a quoted field, so quoted values may span chunks.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        pending = ""
+        async for chunk in chunks:
+            try:
+                pending += decoder.decode(chunk)
+            except UnicodeDecodeError:
+                raise CsvImportError("File must be UTF-8 encoded CSV")
+
+            cut = ImportService._last_row_boundary(pending)
+            if cut > 0:
+                for row in csv.reader(io.StringIO(pending[:cut])):
+                    yield row
+                pending = pending[cut:]
+
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            for row in csv.reader(io.StringIO(pending)):
+                yield row
+
+    @staticmethod
+    def _last_row_boundary(text: str) -> int:
+        """Index just past the last newline not inside quotes, or 0"""
+        end = text.rfind("\n")
+        while end >= 0:
+            # Escaped quotes are doubled, so an even count means we're outside a field
+            if text.count('"', 0, end) % 2 == 0:
+                return end + 1
+            end = text.rfind("\n", 0, end)
+        return 0
+
+    @staticmethod
+    def column_indexes(header: List[str]) -> Dict[str, int]:
+        indexes = {}
+        for i, name in enumerate(header):
+            key = ImportService.COLUMNS.get(name.strip().lower().replace(" ", "_"))
+            if key and key not in indexes:
+                indexes[key] = i
+        missing = [name for name in ImportService.REQUIRED if name not in indexes]
+        if missing:
+            raise CsvImportError(f"Missing required column(s): {', '.join(missing)}")
+        return indexes
+
+    @staticmethod
+    def parse_row(row: List[str], columns: Dict[str, int], now: datetime) -> Tuple[int, tuple]:
+        """(student_id, staging record) for one CSV row; raises ValueError with a readable message"""
+        def value(name: str) -> str:
+            index = columns.get(name)
+            return row[index].strip() if index is not None and index < len(row) else ""
+
+        try:
+            student_id = int(value("student_id"))
+        except ValueError:
+            raise ValueError("student_id must be an integer")
+        try:
+            raw_score = float(value("raw_score"))
+        except ValueError:
+            raise ValueError("raw_score must be a number")
+
+        level = value("level")
+        if not level or len(level) > 50:
+            raise ValueError("level must be 1-50 characters")
+
+        domains_text = value("domains")
+        try:
+            domains = json.loads(domains_text) if domains_text else {}
+        except ValueError:
+            raise ValueError("domain_breakdown must be a JSON object")
+        if not isinstance(domains, dict):
+            raise ValueError("domain_breakdown must be a JSON object")
+
+        completed_text = value("completed_at")
+        if completed_text:
+            try:
+                completed_at = datetime.fromisoformat(completed_text)
+            except ValueError:
+                raise ValueError("completed_at must be an ISO date/time")
+            if completed_at.tzinfo is not None:
+                completed_at = completed_at.astimezone(timezone.utc).replace(tzinfo=None)
+        else:
+            completed_at = now
+
+        stars_text = value("stars_earned")
+        try:
+            stars_earned = int(stars_text) if stars_text else 3  # Same award as the webhook
+        except ValueError:
+            raise ValueError("stars_earned must be an integer")
+
+        idempotency_key = value("idempotency_key") or None
+        if idempotency_key and len(idempotency_key) > 100:
+            raise ValueError("idempotency_key must be at most 100 characters")
+
+        return student_id, (
+            student_id,
+            raw_score,
+            level,
+            json.dumps(domains),
+            stars_earned,
+            generate_recommendation(raw_score, level, domains),
+            completed_at,
+            idempotency_key
+        )
+
+    @staticmethod
+    async def load_chunk(
+        db: AsyncSession,
+        records: List[tuple],
+        class_labels: Dict[int, Optional[str]],
+        summary: ImportSummary
+    ):
+        """
+        COPY one validated chunk into a staging table and move it across in one
+        statement. DO NOTHING also skips keys repeated within the chunk.
+        """
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        await db.execute(text(
+            "CREATE TEMP TABLE assessment_import "
+            "(LIKE assessment_results INCLUDING DEFAULTS) ON COMMIT DROP"
+        ))
+        await raw.driver_connection.copy_records_to_table(
+            "assessment_import", records=records, columns=ImportService.COPY_COLUMNS
+        )
+        columns = ", ".join(ImportService.COPY_COLUMNS)
+        result = await db.execute(text(
+            f"INSERT INTO assessment_results ({columns}) "
+            f"SELECT {columns} FROM assessment_import "
+            "ON CONFLICT (idempotency_key) DO NOTHING "
+            "RETURNING id, student_id, raw_score, level, domain_breakdown, stars_earned, completed_at"
+        ))
+        inserted = result.all()
+        cohort = CohortDelta()
+        stats = StudentStatsDelta()
+        for row in inserted:
+            if class_labels.get(row.student_id):
+                cohort.assessment(class_labels[row.student_id], row.raw_score, row.level, json.loads(row.domain_breakdown))
+            stats.assessment(row.student_id, row.id, row.stars_earned, row.completed_at)
+        await CounterService.add(db, "assessment_results", len(inserted))
+        await cohort.apply(db)
+        await stats.apply(db)
+        await db.commit()
+        summary.inserted += len(inserted)
+        summary.skipped_duplicate += len(records) - len(inserted)
+
+    @staticmethod
+    async def import_assessments_csv(db: AsyncSession, chunks: AsyncIterator[bytes]) -> ImportSummary:
+        """
+        Stream a CSV of assessment results into assessment_results, committing
+        every CHUNK_ROWS rows. Student ids are checked with one query per
+        chunk; rows for unknown students and repeated idempotency keys are
+        skipped, malformed rows are counted as errors. Re-running an import
+        whose rows carry idempotency keys is safe.
+        """
+        summary = ImportSummary()
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        columns: Optional[Dict[str, int]] = None
+        batch: List[Tuple[int, tuple]] = []
+
+        async def flush():
+            student_ids = {student_id for student_id, _ in batch}
+            class_labels = dict((await db.execute(
+                select(Student.id, Student.class_label).where(Student.id.in_(student_ids))
+            )).all())
+            records = []
+            for student_id, record in batch:
+                if student_id in class_labels:
+                    records.append(record)
+                else:
+                    summary.skipped_student_not_found += 1
+            if records:
+                await ImportService.load_chunk(db, records, class_labels, summary)
+            batch.clear()
+
+        row_number = 0
+        async for row in ImportService.iter_csv_rows(chunks):
+            row_number += 1
+            if columns is None:
+                columns = ImportService.column_indexes(row)
+                continue
+            if not any(cell.strip() for cell in row):
+                continue
+
+            summary.rows += 1
+            try:
+                student_id, record = ImportService.parse_row(row, columns, now)
+            except ValueError as e:
+                summary.add_error(row_number, str(e))
+                continue
+
+            batch.append((student_id, record))
+            if len(batch) >= ImportService.CHUNK_ROWS:
+                await flush()
+
+        if columns is None:
+            raise CsvImportError("File is empty")
+        if batch:
+            await flush()
+
+        summary.elapsed_seconds = round(time.perf_counter() - started, 3)
+        return summary
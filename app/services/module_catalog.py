@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+import asyncio
+import hashlib
+import time
+from ..models import Module
+from ..config import settings
+
+@dataclass(frozen=True)
+class ModuleInfo:
+    """Read-only copy of a Module row, safe to share between requests"""
+    id: int
+    title: str
+    week_no: int
+    video_url: Optional[str]
+    resource_url: Optional[str]
+    meet_url: Optional[str]
+    is_published: bool
+    created_at: datetime
+
+    @classmethod
+    def from_model(cls, module: Module) -> "ModuleInfo":
+        return cls(
+            id=module.id,
+            title=module.title,
+            week_no=module.week_no,
+            video_url=module.video_url,
+            resource_url=module.resource_url,
+            meet_url=module.meet_url,
+            is_published=bool(module.is_published),
+            created_at=module.created_at
+        )
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    fingerprint: str  # Content hash, comparable across processes unlike version
+    loaded_at: float
+    modules: Tuple[ModuleInfo, ...]
+    published: Tuple[ModuleInfo, ...]
+    by_id: Dict[int, ModuleInfo]
+
+    def get_published(self, module_id: int) -> Optional[ModuleInfo]:
+        module = self.by_id.get(module_id)
+        return module if module and module.is_published else None
+
+class ModuleCatalog:
+    """
+    Per-process cache of the full module list, ordered by week.
+
+    Every admin write calls invalidate(), which bumps the version so the next
+    read reloads. Writes made by another worker or a script only bump that
+    process's version, so snapshots also expire after MODULE_CATALOG_TTL
+    seconds (0 disables the cache).
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> int:
+        self.version += 1
+        return self.version
+
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self.version
+            and time.monotonic() - snapshot.loaded_at < self.ttl
+        )
+
+    async def get(self, db: AsyncSession) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            self.hits += 1
+            return snapshot
+
+        async with self._lock:
+            # Another request may have reloaded while we waited
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                self.hits += 1
+                return snapshot
+
+            self.misses += 1
+            version = self.version
+            result = await db.execute(select(Module).order_by(Module.week_no, Module.id))
+            modules = tuple(ModuleInfo.from_model(m) for m in result.scalars().all())
+
+            snapshot = CatalogSnapshot(
+                version=version,
+                fingerprint=hashlib.md5(repr(modules).encode("utf-8")).hexdigest(),
+                loaded_at=time.monotonic(),
+                modules=modules,
+                published=tuple(m for m in modules if m.is_published),
+                by_id={m.id: m for m in modules}
+            )
+            self._snapshot = snapshot
+            return snapshot
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "modules": len(self._snapshot.modules) if self._snapshot else 0
+        }
+
+module_catalog = ModuleCatalog(ttl=settings.MODULE_CATALOG_TTL)
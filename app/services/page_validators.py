@@ -0,0 +1,69 @@
+from dataclasses import dataclass, astuple
+from datetime import datetime
+from typing import Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+import hashlib
+from ..models import EnrollmentProgress, StudentStats
+from .module_catalog import CatalogSnapshot
+
+def page_etag(*parts) -> str:
+    """Strong ETag over the str() of every part"""
+    key = "|".join(str(part) for part in parts)
+    return f'"{hashlib.md5(key.encode("utf-8")).hexdigest()}"'
+
+@dataclass(frozen=True)
+class StudentVersion:
+    """
+    Everything per-student that the dashboard and reports show, reduced to a
+    few numbers: any progress, star or assessment change moves at least one.
+    Read with one aggregate query before a page is loaded (load), or taken
+    from rows the page has loaded anyway (from_loaded); both give the same
+    value for the same data.
+    """
+    progress_rows: int
+    progress_updated_at: Optional[datetime]
+    module_stars: int
+    assessment_stars: int
+    modules_completed: int
+    latest_assessment_id: Optional[int]
+
+    @staticmethod
+    def build_query(student_id: int):
+        progress = select(
+            func.count(EnrollmentProgress.id).label("rows"),
+            func.max(EnrollmentProgress.updated_at).label("updated_at")
+        ).where(EnrollmentProgress.student_id == student_id).subquery("progress")
+        # The aggregate always returns one row, so the stats row can hang off it
+        return select(
+            progress.c.rows,
+            progress.c.updated_at,
+            StudentStats.module_stars,
+            StudentStats.assessment_stars,
+            StudentStats.modules_completed,
+            StudentStats.latest_assessment_id
+        ).select_from(progress).outerjoin(StudentStats, StudentStats.student_id == student_id)
+
+    @classmethod
+    async def load(cls, db: AsyncSession, student_id: int) -> "StudentVersion":
+        row = (await db.execute(cls.build_query(student_id))).one()
+        return cls(row.rows, row.updated_at, row.module_stars or 0, row.assessment_stars or 0,
+                   row.modules_completed or 0, row.latest_assessment_id)
+
+    @classmethod
+    def from_loaded(
+        cls,
+        progress_updated_at: Sequence[Optional[datetime]],
+        module_stars: Optional[int],
+        assessment_stars: Optional[int],
+        modules_completed: Optional[int],
+        latest_assessment_id: Optional[int]
+    ) -> "StudentVersion":
+        """From every progress row's updated_at and the stats row's values (None without one)"""
+        stamps = [stamp for stamp in progress_updated_at if stamp is not None]
+        return cls(len(progress_updated_at), max(stamps, default=None), module_stars or 0,
+                   assessment_stars or 0, modules_completed or 0, latest_assessment_id)
+
+    def etag(self, page: str, student, catalog: CatalogSnapshot, *extra) -> str:
+        """ETag for one student's page; extra covers anything else the page shows (e.g. the date)"""
+        return page_etag(page, student.id, student.first_name, *astuple(self), catalog.fingerprint, *extra)
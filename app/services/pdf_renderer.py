@@ -0,0 +1,60 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+import asyncio
+import multiprocessing
+from ..config import settings
+from .report_service import ReportService
+from .cache import TTLCache
+
+class PdfRenderer:
+    """
+    Runs ReportService.generate_pdf_report on a process pool so ReportLab
+    never blocks the event loop. At most twice as many renders as there are
+    workers are in flight; further requests wait their turn. PDF_WORKERS=0
+    renders on the default thread pool instead.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.rendered = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        if self._pool is None:
+            # spawn so workers don't inherit the parent's event loop and DB connections
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def render(self, payload: Dict[str, Any]) -> bytes:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(self.workers, 1) * 2)
+
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            try:
+                pdf = await loop.run_in_executor(
+                    self._get_pool(), ReportService.generate_pdf_report, payload
+                )
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for the next request
+                self._pool = None
+                raise
+        self.rendered += 1
+        return pdf
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+pdf_renderer = PdfRenderer(workers=settings.PDF_WORKERS)
+
+# Rendered PDFs keyed by ReportService.report_etag
+pdf_cache = TTLCache(maxsize=settings.PDF_CACHE_SIZE, ttl=settings.PDF_CACHE_TTL)
@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import event
+from ..models import Student
+from ..config import settings
+from .cache import TTLCache
+
+@dataclass(frozen=True)
+class StudentSnapshot:
+    """Read-only copy of a Student row, shared between requests"""
+    id: int
+    first_name: str
+    age: Optional[int]
+    parent_email: str
+    access_code: str
+    class_label: Optional[str]
+    created_at: datetime
+
+    @classmethod
+    def from_model(cls, student: Student) -> "StudentSnapshot":
+        return cls(
+            id=student.id,
+            first_name=student.first_name,
+            age=student.age,
+            parent_email=student.parent_email,
+            access_code=student.access_code,
+            class_label=student.class_label,
+            created_at=student.created_at
+        )
+
+# Consistency guarantees:
+# - A verified cookie is reused for at most PRINCIPAL_CACHE_TTL seconds and
+#   never past its own SESSION_MAX_AGE expiry.
+# - Student snapshots are dropped as soon as this process updates or deletes
+#   the row through the ORM. Changes made by another worker, a script or raw
+#   SQL are visible after at most PRINCIPAL_CACHE_TTL seconds.
+session_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+student_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+@event.listens_for(Student, "after_update")
+@event.listens_for(Student, "after_delete")
+def _invalidate_student(mapper, connection, target: Student):
+    student_cache.pop(target.id)
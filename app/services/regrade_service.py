@@ -0,0 +1,227 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+import numpy as np
+from ..models import ModuleAssessment
+from .assessment_cache import CompiledAssessment, assessment_cache
+from .cohort_analytics import CohortAnalytics
+from .student_stats import StudentStatsService
+
+UNANSWERED = -1
+CHOICE_OFFSET = ord("0")
+
+@dataclass
+class AnswerMatrix:
+    """All attempts for one assessment as dense arrays, one row per attempt"""
+    attempt_ids: np.ndarray
+    student_ids: np.ndarray
+    answers: np.ndarray  # (attempts x questions), UNANSWERED where no choice was stored
+    score: np.ndarray
+    percentage: np.ndarray
+    stars: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.attempt_ids)
+
+@dataclass
+class RegradeReport:
+    assessment_id: int
+    module_id: int
+    dry_run: bool
+    attempts_total: int = 0
+    attempts_changed: int = 0
+    score_delta: Dict[int, int] = field(default_factory=dict)
+    stars_delta: Dict[int, int] = field(default_factory=dict)
+    progress_changed: int = 0
+    sample: List[Dict[str, Any]] = field(default_factory=list)
+
+class RegradeService:
+    """
+    Re-scores every attempt of a module assessment against its current
+    answer key after a correction, and rewrites the derived
+    EnrollmentProgress.stars, all in one transaction.
+    """
+
+    BATCH_SIZE = 50000
+    SAMPLE_SIZE = 20
+
+    @staticmethod
+    async def load_answer_matrix(db: AsyncSession, assessment_id: int, option_counts: Sequence[int]) -> AnswerMatrix:
+        # Unpack the answers JSON in Postgres (parsed once per row by
+        # json_to_record) and encode each attempt's choices as one character
+        # per question, offset from '0', so a whole batch decodes with a
+        # single frombuffer instead of per-row lists. Choices outside the
+        # question's options (or missing) are encoded as UNANSWERED, which
+        # keeps every character within latin-1 and chr()'s valid range.
+        total_questions = len(option_counts)
+        columns = ", ".join(f'"{i}" int' for i in range(1, total_questions + 1))
+        choices = " || ".join(
+            f'chr({CHOICE_OFFSET} + CASE WHEN r."{i}" BETWEEN 0 AND {options - 1} '
+            f'THEN r."{i}" ELSE {UNANSWERED} END)'
+            for i, options in enumerate(option_counts, 1)
+        )
+        stmt = text(f"""
+            SELECT a.id, a.student_id, a.score, a.percentage, a.stars_earned, {choices} AS choices
+            FROM module_assessment_attempts AS a
+            CROSS JOIN LATERAL json_to_record(a.answers::json) AS r({columns})
+            WHERE a.assessment_id = :assessment_id
+        """).bindparams(assessment_id=assessment_id)
+
+        count = await db.scalar(text(
+            "SELECT count(*) FROM module_assessment_attempts WHERE assessment_id = :assessment_id"
+        ).bindparams(assessment_id=assessment_id))
+
+        matrix = AnswerMatrix(
+            attempt_ids=np.empty(count, dtype=np.int64),
+            student_ids=np.empty(count, dtype=np.int64),
+            answers=np.empty((count, total_questions), dtype=np.int16),
+            score=np.empty(count, dtype=np.int16),
+            percentage=np.empty(count, dtype=np.int16),
+            stars=np.empty(count, dtype=np.int16)
+        )
+
+        offset = 0
+        result = await db.stream(stmt.execution_options(yield_per=RegradeService.BATCH_SIZE))
+        async for rows in result.partitions():
+            end = offset + len(rows)
+            ids, students, scores, percentages, stars, answers = zip(*rows)
+            matrix.attempt_ids[offset:end] = ids
+            matrix.student_ids[offset:end] = students
+            matrix.score[offset:end] = scores
+            matrix.percentage[offset:end] = percentages
+            matrix.stars[offset:end] = stars
+            matrix.answers[offset:end] = np.frombuffer(
+                "".join(answers).encode("latin-1"), dtype=np.uint8
+            ).reshape(len(rows), total_questions).astype(np.int16) - CHOICE_OFFSET
+            offset = end
+
+        # Attempts inserted between the count and the scan are picked up next run
+        if offset < count:
+            matrix = AnswerMatrix(
+                matrix.attempt_ids[:offset], matrix.student_ids[:offset], matrix.answers[:offset],
+                matrix.score[:offset], matrix.percentage[:offset], matrix.stars[:offset]
+            )
+        return matrix
+
+    @staticmethod
+    def score_matrix(answers: np.ndarray, compiled: CompiledAssessment):
+        """Vectorised equivalent of CompiledAssessment.grade for every row at once"""
+        answer_key = np.asarray(compiled.answer_key, dtype=answers.dtype)
+        stars_by_score = np.asarray(compiled.stars_by_score, dtype=np.int16)
+
+        score = (answers == answer_key).sum(axis=1).astype(np.int16)
+        # Same float arithmetic as int((score / n) * 100) on submission
+        percentage = ((score / compiled.total_questions) * 100).astype(np.int16)
+        stars = stars_by_score[score]
+        return score, percentage, stars
+
+    @staticmethod
+    def best_stars_per_student(student_ids: np.ndarray, stars: np.ndarray):
+        students, index = np.unique(student_ids, return_inverse=True)
+        best = np.zeros(len(students), dtype=np.int16)
+        np.maximum.at(best, index, stars)
+        return students, best
+
+    @staticmethod
+    async def regrade(db: AsyncSession, assessment_id: int, dry_run: bool = True) -> RegradeReport:
+        assessment = await db.get(ModuleAssessment, assessment_id)
+        if assessment is None:
+            raise LookupError(f"Module assessment {assessment_id} not found")
+
+        compiled = assessment_cache.put(CompiledAssessment.compile(assessment.id, assessment.questions))
+        report = RegradeReport(assessment_id=assessment.id, module_id=assessment.module_id, dry_run=dry_run)
+
+        matrix = await RegradeService.load_answer_matrix(db, assessment.id, compiled.option_counts)
+        report.attempts_total = len(matrix)
+        if not len(matrix):
+            return report
+
+        score, percentage, stars = RegradeService.score_matrix(matrix.answers, compiled)
+        changed = (score != matrix.score) | (percentage != matrix.percentage) | (stars != matrix.stars)
+        report.attempts_changed = int(changed.sum())
+
+        for name, old, new in (("score_delta", matrix.score, score), ("stars_delta", matrix.stars, stars)):
+            deltas, counts = np.unique((new - old)[changed], return_counts=True)
+            setattr(report, name, {int(d): int(c) for d, c in zip(deltas, counts) if d != 0})
+
+        for i in np.flatnonzero(changed)[:RegradeService.SAMPLE_SIZE]:
+            report.sample.append({
+                "attempt_id": int(matrix.attempt_ids[i]),
+                "student_id": int(matrix.student_ids[i]),
+                "score": [int(matrix.score[i]), int(score[i])],
+                "percentage": [int(matrix.percentage[i]), int(percentage[i])],
+                "stars": [int(matrix.stars[i]), int(stars[i])]
+            })
+
+        if not report.attempts_changed:
+            return report
+
+        # Progress stars follow the best attempt unless they were already above
+        # it (e.g. 3 stars from marking the module complete first)
+        students, old_best = RegradeService.best_stars_per_student(matrix.student_ids, matrix.stars)
+        _, new_best = RegradeService.best_stars_per_student(matrix.student_ids, stars)
+        moved = old_best != new_best
+        students, old_best, new_best = students[moved], old_best[moved], new_best[moved]
+
+        progress_params = {
+            "module_id": assessment.module_id,
+            "student_ids": students.tolist(),
+            "old_best": old_best.tolist(),
+            "new_best": new_best.tolist()
+        }
+        new_progress_stars = """
+            CASE WHEN p.stars <= v.old_best THEN v.new_best ELSE GREATEST(p.stars, v.new_best) END
+        """
+        best_values = """
+            unnest(:student_ids, :old_best, :new_best) AS v(student_id, old_best, new_best)
+        """
+        array_params = [
+            bindparam("student_ids", type_=ARRAY(Integer)),
+            bindparam("old_best", type_=ARRAY(Integer)),
+            bindparam("new_best", type_=ARRAY(Integer))
+        ]
+
+        if dry_run:
+            report.progress_changed = await db.scalar(text(f"""
+                SELECT count(*) FROM enrollment_progress p, {best_values}
+                WHERE p.student_id = v.student_id AND p.module_id = :module_id
+                  AND p.stars <> {new_progress_stars}
+            """).bindparams(*array_params), progress_params)
+            return report
+
+        attempt_update = text("""
+            UPDATE module_assessment_attempts AS a
+            SET score = v.score, percentage = v.percentage, stars_earned = v.stars
+            FROM unnest(:ids, :scores, :percentages, :stars) AS v(id, score, percentage, stars)
+            WHERE a.id = v.id
+        """).bindparams(
+            bindparam("ids", type_=ARRAY(Integer)),
+            bindparam("scores", type_=ARRAY(Integer)),
+            bindparam("percentages", type_=ARRAY(Integer)),
+            bindparam("stars", type_=ARRAY(Integer))
+        )
+        rows = np.flatnonzero(changed)
+        for start in range(0, len(rows), RegradeService.BATCH_SIZE):
+            batch = rows[start:start + RegradeService.BATCH_SIZE]
+            await db.execute(attempt_update, {
+                "ids": matrix.attempt_ids[batch].tolist(),
+                "scores": score[batch].tolist(),
+                "percentages": percentage[batch].tolist(),
+                "stars": stars[batch].tolist()
+            })
+
+        progress_result = await db.execute(text(f"""
+            UPDATE enrollment_progress AS p
+            SET stars = {new_progress_stars}
+            FROM {best_values}
+            WHERE p.student_id = v.student_id AND p.module_id = :module_id
+              AND p.stars <> {new_progress_stars}
+        """).bindparams(*array_params), progress_params)
+        report.progress_changed = progress_result.rowcount
+        await CohortAnalytics.rebuild_module(db, assessment.module_id)
+        await StudentStatsService.rebuild_students(db, students.tolist())
+
+        await db.commit()
+        return report
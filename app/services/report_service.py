@@ -1,21 +1,27 @@
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 from datetime import datetime
 from typing import Dict, Any
 import json
 import io
-from ..models import Student, Module, EnrollmentProgress, AssessmentResult, ProgressStatus
+from ..models import Student, EnrollmentProgress, AssessmentResult, ProgressStatus, StudentStats
+from .module_catalog import module_catalog, CatalogSnapshot
+from .dashboard_service import ProgressSummary, AssessmentSummary
+from .principal_cache import StudentSnapshot
+from .page_validators import StudentVersion
 
 class ReportService:
     
     @staticmethod
     def generate_pdf_report(student_data: Dict[str, Any]) -> bytes:
+        # ReportLab is imported on first render (normally in a renderer worker),
+        # not when the app boots
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4)
         styles = getSampleStyleSheet()
@@ -156,30 +162,28 @@ class ReportService:
     
     @staticmethod
     async def get_student_report_data(student: Student, db: AsyncSession) -> Dict[str, Any]:
-        # Get all modules
-        modules_stmt = select(Module).where(Module.is_published == True).order_by(Module.week_no)
-        modules_result = await db.execute(modules_stmt)
-        modules = modules_result.scalars().all()
-        
-        # Get student progress
-        progress_stmt = select(EnrollmentProgress).where(
-            EnrollmentProgress.student_id == student.id
-        ).options(selectinload(EnrollmentProgress.module))
+        # Get all published modules
+        catalog = await module_catalog.get(db)
+        modules = catalog.published
+        
+        # Get student progress; module details come from the catalog
+        progress_stmt = select(EnrollmentProgress).where(EnrollmentProgress.student_id == student.id)
         progress_result = await db.execute(progress_stmt)
-        progress_data = {p.module_id: p for p in progress_result.scalars().all()}
+        progress_rows = progress_result.scalars().all()
+        progress_data = {p.module_id: p for p in progress_rows}
         
-        # Get latest assessment
-        assessment_stmt = select(AssessmentResult).where(
-            AssessmentResult.student_id == student.id
-        ).order_by(AssessmentResult.completed_at.desc()).limit(1)
-        assessment_result = await db.execute(assessment_stmt)
-        latest_assessment = assessment_result.scalar_one_or_none()
+        # Totals and the latest assessment, from the same stats row the dashboard reads
+        stats_stmt = select(StudentStats, AssessmentResult).outerjoin(
+            AssessmentResult, AssessmentResult.id == StudentStats.latest_assessment_id
+        ).where(StudentStats.student_id == student.id)
+        stats_row = (await db.execute(stats_stmt)).one_or_none()
+        stats, latest_assessment = stats_row if stats_row else (None, None)
         
         # Calculate stats
         total_modules = len(modules)
-        completed_modules = sum(1 for m in modules if progress_data.get(m.id) and progress_data[m.id].status == ProgressStatus.DONE)
-        total_stars = sum(p.stars for p in progress_data.values())
-        progress_percentage = int((completed_modules / total_modules) * 100) if total_modules > 0 else 0
+        completed_modules = stats.modules_completed if stats else 0
+        total_stars = stats.total_stars if stats else 0
+        progress_percentage = min(int((completed_modules / total_modules) * 100), 100) if total_modules > 0 else 0
         
         # Parse domain breakdown if available
         domain_breakdown = None
@@ -199,5 +203,45 @@ class ReportService:
             "completed_modules": completed_modules,
             "total_stars": total_stars,
             "progress_percentage": progress_percentage,
-            "report_date": datetime.now().strftime("%B %d, %Y")
+            "report_date": datetime.now().strftime("%B %d, %Y"),
+            "version": StudentVersion.from_loaded(
+                [p.updated_at for p in progress_rows],
+                stats.module_stars if stats else None,
+                stats.assessment_stars if stats else None,
+                stats.modules_completed if stats else None,
+                stats.latest_assessment_id if stats else None
+            )
+        }
+    
+    @staticmethod
+    async def report_etag(student: Student, db: AsyncSession, catalog: CatalogSnapshot) -> str:
+        """Cheap validator for everything the PDF shows, without loading the report"""
+        version = await StudentVersion.load(db, student.id)
+        return ReportService.etag(version, student, catalog, "report.pdf")
+    
+    @staticmethod
+    def etag(version: StudentVersion, student: Student, catalog: CatalogSnapshot, page: str) -> str:
+        # The report is dated
+        return version.etag(page, student, catalog, datetime.now().strftime("%Y-%m-%d"))
+    
+    @staticmethod
+    def pdf_payload(report_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of report data with ORM rows replaced by picklable snapshots"""
+        student = report_data["student"]
+        latest = report_data["latest_assessment"]
+        return {
+            **report_data,
+            "student": StudentSnapshot.from_model(student) if isinstance(student, Student) else student,
+            "progress_data": {
+                module_id: ProgressSummary(p.status, p.stars)
+                for module_id, p in report_data["progress_data"].items()
+            },
+            "latest_assessment": AssessmentSummary(
+                id=latest.id,
+                level=latest.level,
+                raw_score=latest.raw_score,
+                stars_earned=latest.stars_earned,
+                recommendation=latest.recommendation,
+                completed_at=latest.completed_at
+            ) if latest else None
         }
\ No newline at end of file
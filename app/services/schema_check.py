@@ -0,0 +1,52 @@
+from typing import Set
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy import text
+import os
+import re
+
+MIGRATIONS_DIR = os.path.join("alembic", "versions")
+
+# Read straight from the migration files: importing Alembic's script loader
+# costs more at startup than the create_all it replaces
+_REVISION = re.compile(r"^revision(?:\s*:[^=]+)?\s*=\s*['\"]([^'\"]+)['\"]", re.MULTILINE)
+_DOWN_REVISION = re.compile(r"^down_revision(?:\s*:[^=]+)?\s*=\s*(.+)$", re.MULTILINE)
+_QUOTED = re.compile(r"['\"]([^'\"]+)['\"]")
+
+def migration_heads(directory: str = MIGRATIONS_DIR) -> Set[str]:
+    """Revisions no other migration builds on, i.e. what `alembic upgrade head` ends at"""
+    revisions, parents = set(), set()
+    for filename in os.listdir(directory):
+        if not filename.endswith(".py"):
+            continue
+        with open(os.path.join(directory, filename)) as f:
+            source = f.read()
+        revision = _REVISION.search(source)
+        if not revision:
+            continue
+        revisions.add(revision.group(1))
+        down = _DOWN_REVISION.search(source)
+        if down:
+            # A merge migration lists several parents
+            parents.update(_QUOTED.findall(down.group(1)))
+    return revisions - parents
+
+async def database_revisions(conn: AsyncConnection) -> Set[str]:
+    """What alembic_version records, or nothing if the database was never migrated"""
+    if await conn.scalar(text("SELECT to_regclass('alembic_version')")) is None:
+        return set()
+    return set((await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars())
+
+async def check_schema(conn: AsyncConnection) -> str:
+    """
+    Compare the database's Alembic revision with the migrations shipped with
+    the app, without reflecting any tables. Returns a description of the
+    mismatch, or "" when the database is at head.
+    """
+    heads = migration_heads()
+    current = await database_revisions(conn)
+    if current == heads:
+        return ""
+    if not current:
+        return f"database has no Alembic revision; run `alembic upgrade head` (head is {', '.join(sorted(heads))})"
+    return (f"database is at {', '.join(sorted(current))} but the app expects "
+            f"{', '.join(sorted(heads))}; run `alembic upgrade head`")
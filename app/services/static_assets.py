@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Optional
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+import anyio
+import json
+import mimetypes
+import os
+import stat
+from .http_cache import negotiate_encoding
+
+STATIC_DIR = "app/static"
+BUILD_DIR = "dist"  # Under STATIC_DIR; written by build_assets.py
+MANIFEST = os.path.join(STATIC_DIR, BUILD_DIR, "manifest.json")
+
+# Built files are named after their content, so they never change under a URL
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+class AssetManifest:
+    """
+    URLs of the optimised, fingerprinted copies of files in app/static, as
+    recorded by build_assets.py. Without a build (e.g. in development) every
+    lookup falls back to the source file under /static, so templates render
+    either way.
+
+    manifest.json holds:
+      assets     source name -> {"url", and for images "width", "height",
+                 "srcset": {mime type: [[width, url], ...]}}
+      encodings  built path -> precompressed codings, preferred first
+    """
+
+    def __init__(self, path: str = MANIFEST):
+        self.path = path
+        self.assets: Dict[str, Dict[str, Any]] = {}
+        self.encodings: Dict[str, List[str]] = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        self.assets = data.get("assets", {})
+        self.encodings = data.get("encodings", {})
+
+    @property
+    def built(self) -> bool:
+        return bool(self.assets)
+
+    def url(self, name: str) -> str:
+        asset = self.assets.get(name)
+        return asset["url"] if asset else f"/static/{name}"
+
+    def image(self, name: str) -> Optional[Dict[str, Any]]:
+        asset = self.assets.get(name)
+        return asset if asset and "srcset" in asset else None
+
+    def srcset(self, name: str, media_type: Optional[str] = None) -> str:
+        """srcset for one of an image's formats (its fallback format by default), or "" if unbuilt"""
+        image = self.image(name)
+        if not image:
+            return ""
+        candidates = image["srcset"].get(media_type or image["type"], [])
+        return ", ".join(f"{url} {width}w" for width, url in candidates)
+
+    @staticmethod
+    def is_built(path: str) -> bool:
+        return path.split(os.sep, 1)[0] == BUILD_DIR and not path.endswith("manifest.json")
+
+asset_manifest = AssetManifest()
+
+class AssetFiles(StaticFiles):
+    """
+    StaticFiles that sends built assets with immutable caching, and their
+    gzip/brotli twin when the client accepts it. Anything else is
+    revalidated with the ETag StaticFiles already sends.
+    """
+
+    def __init__(self, *args, manifest: AssetManifest = asset_manifest, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = None
+        encodings = self.manifest.encodings.get(path.replace(os.sep, "/"))
+        if encodings and scope["method"] in ("GET", "HEAD"):
+            response = await self.encoded_response(path, scope, encodings)
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if response.status_code in (200, 304):
+            response.headers["cache-control"] = IMMUTABLE if self.manifest.is_built(path) else REVALIDATE
+            if encodings:
+                response.headers["vary"] = "Accept-Encoding"
+        return response
+
+    async def encoded_response(self, path: str, scope: Scope, encodings: List[str]) -> Optional[Response]:
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), encodings)
+        if encoding is None:
+            return None
+        full_path, stat_result = await anyio.to_thread.run_sync(
+            self.lookup_path, path + ENCODING_SUFFIXES[encoding]
+        )
+        if not (stat_result and stat.S_ISREG(stat_result.st_mode)):
+            return None
+        response = self.file_response(full_path, stat_result, scope)
+        response.headers["content-encoding"] = encoding
+        response.headers["content-type"] = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return response
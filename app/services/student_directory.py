@@ -0,0 +1,101 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, or_, tuple_
+import base64
+from ..models import Student, StudentStats
+
+class InvalidCursor(ValueError):
+    pass
+
+@dataclass
+class StudentPage:
+    students: List[Student]
+    stats: Dict[int, StudentStats] = field(default_factory=dict)  # Students with activity only
+    next_cursor: Optional[str] = None  # Older students
+    prev_cursor: Optional[str] = None  # Newer students
+
+class StudentDirectory:
+    """
+    Newest-first student listing for the admin pages, paged by keyset on
+    (created_at, id) so every page costs the same however deep it is, with
+    a prefix search over first name, parent email, access code and class
+    label. Cursors are the boundary row's key, base64-encoded.
+    """
+
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    @staticmethod
+    def encode_cursor(student: Student) -> str:
+        raw = f"{student.created_at.isoformat()},{student.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            created_at, student_id = raw.rsplit(",", 1)
+            return datetime.fromisoformat(created_at), int(student_id)
+        except ValueError:
+            raise InvalidCursor("Invalid page cursor")
+
+    @staticmethod
+    def search_filter(q: str):
+        # Escape LIKE wildcards so they match literally
+        prefix = q.strip().lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return or_(
+            func.lower(Student.first_name).like(prefix),
+            func.lower(Student.parent_email).like(prefix),
+            Student.access_code.like(prefix.upper()),
+            func.lower(Student.class_label).like(prefix)
+        )
+
+    @staticmethod
+    async def page(
+        db: AsyncSession,
+        q: Optional[str] = None,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: int = PAGE_SIZE
+    ) -> StudentPage:
+        """
+        One page of students. `after` continues past the last row of a page,
+        `before` goes back from the first row of one; neither gives the newest.
+        """
+        limit = max(1, min(limit, StudentDirectory.MAX_PAGE_SIZE))
+        key = tuple_(Student.created_at, Student.id)
+        stmt = select(Student, StudentStats).outerjoin(StudentStats, StudentStats.student_id == Student.id)
+        if q and q.strip():
+            stmt = stmt.where(StudentDirectory.search_filter(q))
+
+        if before:
+            # Walk forwards from the cursor, then flip back to newest-first
+            stmt = stmt.where(key > tuple_(*StudentDirectory.decode_cursor(before)))
+            stmt = stmt.order_by(Student.created_at.asc(), Student.id.asc())
+        else:
+            if after:
+                stmt = stmt.where(key < tuple_(*StudentDirectory.decode_cursor(after)))
+            stmt = stmt.order_by(Student.created_at.desc(), Student.id.desc())
+
+        # One extra row tells us whether there is another page this way
+        rows = (await db.execute(stmt.limit(limit + 1))).all()
+        more = len(rows) > limit
+        students = [student for student, _ in rows[:limit]]
+        if before:
+            students.reverse()
+
+        page = StudentPage(
+            students=students,
+            stats={student.id: stats for student, stats in rows[:limit] if stats is not None}
+        )
+        if students:
+            # Paging back from a cursor means older rows exist, and vice versa
+            has_older = True if before else more
+            has_newer = more if before else after is not None
+            if has_older:
+                page.next_cursor = StudentDirectory.encode_cursor(students[-1])
+            if has_newer:
+                page.prev_cursor = StudentDirectory.encode_cursor(students[0])
+        return page
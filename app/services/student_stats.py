@@ -0,0 +1,204 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+from sqlalchemy import select, delete, case, func, text, tuple_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from ..models import StudentStats
+
+# Columns compared by reconcile(); last_activity_at is rebuilt but not compared,
+# since the write paths stamp it with the app clock rather than the row's own
+COMPARED = ("module_stars", "assessment_stars", "modules_completed", "latest_assessment_id")
+
+class StudentStatsDelta:
+    """
+    Changes to per-student totals gathered during one request, applied with
+    one upsert in the same transaction as the rows they describe.
+    """
+
+    def __init__(self):
+        self.rows: Dict[int, Dict[str, Any]] = {}
+
+    def _row(self, student_id: int) -> Dict[str, Any]:
+        return self.rows.setdefault(student_id, {
+            "module_stars": 0,
+            "assessment_stars": 0,
+            "modules_completed": 0,
+            "latest": None,
+            "last_activity_at": None
+        })
+
+    def _touch(self, row: Dict[str, Any], at: datetime):
+        if row["last_activity_at"] is None or at > row["last_activity_at"]:
+            row["last_activity_at"] = at
+
+    def module_progress(self, student_id: int, old_stars: Optional[int], stars: int, at: datetime):
+        """A progress row is now DONE with `stars`; old_stars is None if it wasn't DONE before"""
+        row = self._row(student_id)
+        if old_stars is None:
+            row["modules_completed"] += 1
+            row["module_stars"] += stars
+        else:
+            row["module_stars"] += stars - old_stars
+        self._touch(row, at)
+
+    def module_attempt(self, student_id: int, at: datetime):
+        self._touch(self._row(student_id), at)
+
+    def assessment(self, student_id: int, assessment_id: int, stars: int, completed_at: datetime):
+        row = self._row(student_id)
+        row["assessment_stars"] += stars or 0
+        if row["latest"] is None or (completed_at, assessment_id) > row["latest"]:
+            row["latest"] = (completed_at, assessment_id)
+        self._touch(row, completed_at)
+
+    async def apply(self, db: Union[AsyncSession, AsyncConnection]):
+        """One upsert for everything gathered; the caller commits"""
+        if not self.rows:
+            return
+        # Sorted so concurrent transactions lock shared rows in the same order
+        values = []
+        for student_id, row in sorted(self.rows.items()):
+            latest_at, latest_id = row["latest"] or (None, None)
+            values.append({
+                "student_id": student_id,
+                "module_stars": row["module_stars"],
+                "assessment_stars": row["assessment_stars"],
+                "modules_completed": row["modules_completed"],
+                "latest_assessment_id": latest_id,
+                "latest_assessment_at": latest_at,
+                "last_activity_at": row["last_activity_at"]
+            })
+        stmt = insert(StudentStats).values(values)
+        excluded = stmt.excluded
+        # With a NULL on either side the row comparison is NULL, so the stored one is kept
+        newer = (StudentStats.latest_assessment_at.is_(None)) | (
+            tuple_(excluded.latest_assessment_at, excluded.latest_assessment_id)
+            > tuple_(StudentStats.latest_assessment_at, StudentStats.latest_assessment_id)
+        )
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[StudentStats.student_id],
+            set_={
+                "module_stars": StudentStats.module_stars + excluded.module_stars,
+                "assessment_stars": StudentStats.assessment_stars + excluded.assessment_stars,
+                "modules_completed": StudentStats.modules_completed + excluded.modules_completed,
+                "latest_assessment_id": case(
+                    (newer, excluded.latest_assessment_id), else_=StudentStats.latest_assessment_id
+                ),
+                "latest_assessment_at": case(
+                    (newer, excluded.latest_assessment_at), else_=StudentStats.latest_assessment_at
+                ),
+                # GREATEST ignores NULLs
+                "last_activity_at": func.greatest(StudentStats.last_activity_at, excluded.last_activity_at)
+            }
+        ))
+        self.rows.clear()
+
+class StudentStatsService:
+    """
+    Reads and repairs student_stats. Anything that changes stars, progress
+    or assessment results outside the request paths (bulk SQL, manual
+    deletes) should finish with reconcile().
+    """
+
+    # Every student with any activity, recomputed from the source tables.
+    # {where} narrows each aggregate to some students.
+    REBUILD_SQL = """
+        WITH progress AS (
+            SELECT student_id,
+                   coalesce(sum(stars), 0) AS module_stars,
+                   count(*) FILTER (WHERE status = 'DONE') AS modules_completed,
+                   max(updated_at) FILTER (WHERE status = 'DONE') AS last_done
+            FROM enrollment_progress {where}
+            GROUP BY student_id
+        ),
+        results AS (
+            SELECT student_id, coalesce(sum(stars_earned), 0) AS assessment_stars, max(completed_at) AS last_result
+            FROM assessment_results {where}
+            GROUP BY student_id
+        ),
+        latest AS (
+            SELECT DISTINCT ON (student_id) student_id, id, completed_at
+            FROM assessment_results {where}
+            ORDER BY student_id, completed_at DESC, id DESC
+        ),
+        attempts AS (
+            SELECT student_id, max(completed_at) AS last_attempt
+            FROM module_assessment_attempts {where}
+            GROUP BY student_id
+        )
+        SELECT s.id AS student_id,
+               coalesce(p.module_stars, 0)::int AS module_stars,
+               coalesce(r.assessment_stars, 0)::int AS assessment_stars,
+               coalesce(p.modules_completed, 0)::int AS modules_completed,
+               l.id AS latest_assessment_id,
+               l.completed_at AS latest_assessment_at,
+               greatest(p.last_done, r.last_result, a.last_attempt) AS last_activity_at
+        FROM students s
+        LEFT JOIN progress p ON p.student_id = s.id
+        LEFT JOIN results r ON r.student_id = s.id
+        LEFT JOIN latest l ON l.student_id = s.id
+        LEFT JOIN attempts a ON a.student_id = s.id
+        WHERE (p.student_id IS NOT NULL OR r.student_id IS NOT NULL OR a.student_id IS NOT NULL)
+    """
+    COLUMNS = (
+        "student_id, module_stars, assessment_stars, modules_completed, "
+        "latest_assessment_id, latest_assessment_at, last_activity_at"
+    )
+
+    @staticmethod
+    def rebuild_sql(where: str = "") -> str:
+        return StudentStatsService.REBUILD_SQL.format(where=where)
+
+    @staticmethod
+    async def reconcile(
+        db: Union[AsyncSession, AsyncConnection], fix: bool = True
+    ) -> Dict[int, Tuple[Tuple, Tuple]]:
+        """
+        (stored, actual) values of COMPARED for every student whose row has
+        drifted from the source tables, rebuilding the whole table set-based
+        when fix is set. Writers are held back by the table lock until the
+        caller commits.
+        """
+        await db.execute(text("LOCK TABLE student_stats IN EXCLUSIVE MODE"))
+        # A missing row reads as zeros: students who only opened a module have no stored row
+        def values(alias: str) -> str:
+            return ", ".join(
+                f"{alias}.{column}" if column == "latest_assessment_id" else f"coalesce({alias}.{column}, 0)"
+                for column in COMPARED
+            )
+        stored, actual = values("s"), values("a")
+        rows = (await db.execute(text(f"""
+            WITH actual AS ({StudentStatsService.rebuild_sql()})
+            SELECT coalesce(a.student_id, s.student_id), {stored}, {actual}
+            FROM actual a FULL JOIN student_stats s ON s.student_id = a.student_id
+            WHERE ({stored}) IS DISTINCT FROM ({actual})
+            ORDER BY 1
+        """))).all()
+        width = len(COMPARED)
+        drifted = {row[0]: (tuple(row[1:1 + width]), tuple(row[1 + width:])) for row in rows}
+
+        if fix and drifted:
+            await db.execute(delete(StudentStats))
+            await db.execute(text(
+                f"INSERT INTO student_stats ({StudentStatsService.COLUMNS}) {StudentStatsService.rebuild_sql()}"
+            ))
+        return drifted
+
+    @staticmethod
+    async def rebuild_students(db: AsyncSession, student_ids: List[int]):
+        """Recompute some students' rows in the caller's transaction, for bulk rescoring (the caller commits)"""
+        if not student_ids:
+            return
+        ids = bindparam("student_ids", type_=ARRAY(Integer))
+        await db.execute(delete(StudentStats).where(StudentStats.student_id.in_(student_ids)))
+        await db.execute(text(
+            f"INSERT INTO student_stats ({StudentStatsService.COLUMNS}) "
+            + StudentStatsService.rebuild_sql("WHERE student_id = ANY(:student_ids)")
+        ).bindparams(ids), {"student_ids": student_ids})
+
+    @staticmethod
+    async def initialize(db: AsyncSession):
+        """Build the rows the first time the app starts against a database"""
+        if await db.scalar(select(StudentStats.student_id).limit(1)) is None:
+            await StudentStatsService.reconcile(db)
+            await db.commit()
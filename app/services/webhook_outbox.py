@@ -0,0 +1,191 @@
+from collections import Counter
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, delete, func, text
+import asyncio
+import time
+from ..models import async_session, WebhookOutboxEntry
+from ..schemas.assessment import AssessmentWebhookPayload
+from ..config import settings
+from ..metrics import Histogram
+from .assessment_ingest import AssessmentIngestService
+
+# Acceptance to ingestion, up to a 15 minute backlog
+DELIVERY_LAG_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000, 900000)
+
+class OutboxFull(Exception):
+    """The outbox is past its limit; the sender should retry later"""
+
+class WebhookOutbox:
+    """
+    Accept-then-persist queue for assessment webhooks. Requests append
+    validated payloads to the webhook_outbox table and return 202; a worker
+    task started in the app lifespan drains it in batches through
+    AssessmentIngestService.ingest, deleting rows in the same transaction.
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so every worker process
+    can drain the one table. A failing batch is retried at half the size
+    until the bad row is on its own; a row that fails alone max_attempts
+    times is left in the table for inspection.
+    """
+
+    def __init__(self, limit: int, batch_size: int, poll_interval: float, max_attempts: int):
+        self.limit = limit
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        # Refreshed from the table after every drain, bumped by local enqueues
+        self.depth = 0
+        self.dead = 0
+        self._oldest_age = 0.0
+        self._refreshed_at = time.monotonic()
+        self.accepted = 0
+        self.rejected = 0
+        self.failures = 0
+        self.outcomes: Counter = Counter()
+        self.delivery_lag = Histogram(DELIVERY_LAG_BUCKETS_MS)
+        self._batch = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def lag_seconds(self) -> float:
+        """Age of the oldest pending payload"""
+        if not self.depth:
+            return 0.0
+        return self._oldest_age + time.monotonic() - self._refreshed_at
+
+    async def enqueue(self, db: AsyncSession, payloads: List[AssessmentWebhookPayload]):
+        if self.depth + len(payloads) > self.limit:
+            self.rejected += len(payloads)
+            raise OutboxFull()
+        if payloads:
+            await db.execute(insert(WebhookOutboxEntry).values([
+                {"payload": payload.model_dump_json()} for payload in payloads
+            ]))
+            await db.commit()
+        self.depth += len(payloads)
+        self.accepted += len(payloads)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def refresh(self, db: AsyncSession):
+        row = (await db.execute(text(
+            "SELECT count(*) FILTER (WHERE attempts < :max_attempts), "
+            "count(*) FILTER (WHERE attempts >= :max_attempts), "
+            "extract(epoch FROM now() - min(received_at) FILTER (WHERE attempts < :max_attempts)) "
+            "FROM webhook_outbox"
+        ), {"max_attempts": self.max_attempts})).one()
+        self.depth, self.dead = row[0], row[1]
+        self._oldest_age = float(row[2] or 0.0)
+        self._refreshed_at = time.monotonic()
+
+    async def drain_once(self) -> int:
+        """Ingest up to one batch; returns how many rows were claimed"""
+        async with async_session() as db:
+            rows = (await db.execute(
+                select(
+                    WebhookOutboxEntry.id,
+                    WebhookOutboxEntry.payload,
+                    func.extract("epoch", func.now() - WebhookOutboxEntry.received_at).label("age")
+                )
+                .where(WebhookOutboxEntry.attempts < self.max_attempts)
+                .order_by(WebhookOutboxEntry.id)
+                .limit(self._batch)
+                .with_for_update(skip_locked=True)
+            )).all()
+
+            if rows:
+                ids = [row.id for row in rows]
+                try:
+                    payloads = [
+                        (index, AssessmentWebhookPayload.model_validate_json(row.payload))
+                        for index, row in enumerate(rows)
+                    ]
+                    await db.execute(delete(WebhookOutboxEntry).where(WebhookOutboxEntry.id.in_(ids)))
+                    outcomes = await AssessmentIngestService.ingest(db, payloads)
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    if len(ids) == 1:
+                        await db.execute(
+                            update(WebhookOutboxEntry)
+                            .where(WebhookOutboxEntry.id == ids[0])
+                            .values(attempts=WebhookOutboxEntry.attempts + 1, last_error=repr(e)[:1000])
+                        )
+                        await db.commit()
+                    self._batch = max(self._batch // 2, 1)
+                    raise
+
+                self._batch = min(self._batch * 2, self.batch_size)
+                for outcome in outcomes:
+                    self.outcomes[outcome.status] += 1
+                for row in rows:
+                    self.delivery_lag.observe(float(row.age) * 1000)
+
+            await self.refresh(db)
+            return len(rows)
+
+    async def run(self):
+        backoff = self.poll_interval
+        while True:
+            self._wakeup.clear()
+            try:
+                claimed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                print(f"Webhook outbox drain failed: {e!r}")
+                # A lone bad row is retried at once; a struggling database gets room
+                if self._batch > 1:
+                    continue
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            backoff = self.poll_interval
+
+            if claimed < self._batch:
+                # Caught up: sleep until a local enqueue, or poll for other processes' rows
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        # Rows claimed by an unfinished drain roll back and are picked up next start
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "depth": self.depth,
+            "dead": self.dead,
+            "limit": self.limit,
+            "lag_seconds": round(self.lag_seconds(), 3),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "ingested": dict(self.outcomes),
+            "drain_failures": self.failures,
+            "delivery_lag": self.delivery_lag.snapshot()
+        }
+
+webhook_outbox = WebhookOutbox(
+    limit=settings.WEBHOOK_OUTBOX_LIMIT,
+    batch_size=settings.WEBHOOK_OUTBOX_BATCH,
+    poll_interval=settings.WEBHOOK_OUTBOX_POLL_SECONDS,
+    max_attempts=settings.WEBHOOK_OUTBOX_MAX_ATTEMPTS
+)
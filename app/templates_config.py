@@ -1,8 +1,39 @@
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache, Template
 import json
+import os
+import time
+from .config import settings
+from .metrics import template_metrics
+from .services.static_assets import asset_manifest
 
-# Initialize templates with custom filters
-templates = Jinja2Templates(directory="app/templates")
+TEMPLATE_DIR = "app/templates"
+
+class TimedTemplate(Template):
+    """Records how long each page takes to render, under the template's name"""
+
+    def render(self, *args, **kwargs) -> str:
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            template_metrics.observe(self.name, (time.perf_counter() - start) * 1000)
+
+def _bytecode_cache():
+    try:
+        os.makedirs(settings.TEMPLATE_CACHE_DIR, exist_ok=True)
+    except OSError as e:
+        print(f"Template bytecode cache disabled: {e}")
+        return None
+    return FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR)
+
+# The one template environment every router renders with
+templates = Jinja2Templates(
+    directory=TEMPLATE_DIR,
+    bytecode_cache=_bytecode_cache(),
+    auto_reload=settings.TEMPLATE_AUTO_RELOAD
+)
+templates.env.template_class = TimedTemplate
 
 def from_json_filter(value):
     """Custom Jinja2 filter to parse JSON strings"""
@@ -14,4 +45,20 @@ def from_json_filter(value):
         return {}
 
 # Add custom filter
-templates.env.filters['from_json'] = from_json_filter
\ No newline at end of file
+templates.env.filters['from_json'] = from_json_filter
+
+# Fingerprinted URLs from build_assets.py, e.g. {{ asset_url("logo.svg") }}
+templates.env.globals['asset_url'] = asset_manifest.url
+templates.env.globals['asset_srcset'] = asset_manifest.srcset
+templates.env.globals['asset_image'] = asset_manifest.image
+
+def precompile_templates() -> int:
+    """
+    Compile every page template into the environment's cache at startup,
+    so no request pays for parsing; with a warm bytecode cache this is
+    only unmarshalling. Returns the number of templates loaded.
+    """
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for whole-class report generation
+
+Builds a ZIP of progress reports for a class (or every student) with
+BulkReportService and reports reports/second, then times the one-at-a-time
+path the parent download uses (get_student_report_data plus an inline
+ReportLab build) on a sample for comparison. Runs against the configured
+DATABASE_URL; the ZIP is discarded unless --output is given.
+
+    python -m benchmarks.bulk_reports --class-label Y6
+    python -m benchmarks.bulk_reports --workers 4 --output /tmp/reports.zip
+"""
+import argparse
+import asyncio
+import time
+from sqlalchemy import select
+from app.models import async_session, engine, Student
+from app.services.report_service import ReportService
+from app.services.bulk_report_service import BulkReportService
+from app.services.pdf_renderer import pdf_renderer
+
+async def bench_bulk(class_label, output):
+    start = time.perf_counter()
+    async with async_session() as db:
+        payloads = await BulkReportService.load_cohort(db, class_label)
+    loaded = time.perf_counter() - start
+    if not payloads:
+        print("No students found")
+        return
+
+    job = BulkReportService.start_job(class_label, len(payloads))
+    size = 0
+    sink = open(output, "wb") if output else None
+    try:
+        async for chunk in BulkReportService.iter_zip(payloads, job):
+            size += len(chunk)
+            if sink:
+                sink.write(chunk)
+    finally:
+        if sink:
+            sink.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"Bulk: {job.total:,} reports on {pdf_renderer.workers} worker(s)")
+    print(f"  cohort load:     {loaded:8.3f}s")
+    print(f"  total:           {elapsed:8.3f}s  ({job.rendered / elapsed:,.1f} reports/s, "
+          f"{size / 2**20:.1f} MB zip, {job.failed} failed)")
+    return job.rendered / elapsed
+
+async def bench_single(class_label, sample):
+    async with async_session() as db:
+        stmt = select(Student).order_by(Student.first_name, Student.id).limit(sample)
+        if class_label:
+            stmt = stmt.where(Student.class_label == class_label)
+        students = (await db.execute(stmt)).scalars().all()
+
+        start = time.perf_counter()
+        for student in students:
+            report_data = await ReportService.get_student_report_data(student, db)
+            ReportService.generate_pdf_report(report_data)
+        elapsed = time.perf_counter() - start
+
+    print(f"One at a time: {len(students):,} reports")
+    print(f"  total:           {elapsed:8.3f}s  ({len(students) / elapsed:,.1f} reports/s)")
+    return len(students) / elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--class-label", default=None, help="defaults to every student")
+    parser.add_argument("--workers", type=int, default=pdf_renderer.workers)
+    parser.add_argument("--sample", type=int, default=50,
+                        help="students rendered one at a time for comparison")
+    parser.add_argument("--output", default=None, help="write the ZIP here")
+    args = parser.parse_args()
+    pdf_renderer.workers = args.workers
+
+    async def main():
+        try:
+            bulk = await bench_bulk(args.class_label, args.output)
+            if bulk and args.sample:
+                single = await bench_single(args.class_label, args.sample)
+                print(f"  speed-up:        {bulk / single:8.1f}x")
+        finally:
+            pdf_renderer.shutdown()
+            await engine.dispose()
+
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Bytes and CPU saved by conditional GETs and response compression
+
+For each per-student page (dashboard, module assessment results, parent
+report and its PDF) requests are made in-process against a database seeded
+by benchmarks.seed, as:
+
+  identity  first visit, Accept-Encoding: identity
+  gzip, br  first visit with a compressed body (br only when brotli is installed)
+  304       revisit with the ETag from an earlier response
+
+and reports the status, bytes on the wire, median latency, this process's
+CPU time and SQL statements per request. PDF rendering runs in the renderer's
+worker processes, so the PDF's full-render CPU is not counted; the rendered
+PDF cache is cleared before every full request so each one is a real render.
+
+    python -m benchmarks.seed --reset                # throwaway database!
+    python -m benchmarks.conditional
+"""
+import os
+
+# Query counts come from the metrics middleware
+os.environ["METRICS_ENABLED"] = "true"
+
+import argparse
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+import httpx
+from app.compression import ENCODINGS
+from app.metrics import registry
+from app.models import engine
+from app.services.pdf_renderer import pdf_renderer, pdf_cache
+from .routes import BenchUser, login_users, assessment_answers
+
+@dataclass
+class Page:
+    name: str
+    route: str  # Template, as recorded by the metrics middleware
+    client: Callable[[BenchUser], httpx.AsyncClient]
+    url: Callable[[BenchUser], str]
+    before_full: Callable[[], None] = lambda: None
+
+async def results_urls(users: List[BenchUser]) -> Dict[int, str]:
+    """One module assessment attempt per user, to view the results page of"""
+    urls = {}
+    for user in users:
+        response = await user.student.post(f"/modules/{user.module_id}/assessment", data=assessment_answers(user))
+        if response.status_code != 302:
+            raise SystemExit(f"Assessment submit failed with {response.status_code}")
+        urls[id(user)] = response.headers["location"]
+    return urls
+
+async def measure(page: Page, users: List[BenchUser], mode: str, requests: int,
+                  etags: Dict[int, str]) -> dict:
+    registry.reset()
+    timings, cpu, sizes, statuses = [], [], [], set()
+    for i in range(requests):
+        user = users[i % len(users)]
+        if mode == "304":
+            headers = {"Accept-Encoding": ENCODINGS[0], "If-None-Match": etags[id(user)]}
+        else:
+            page.before_full()
+            headers = {"Accept-Encoding": mode}
+        cpu_start, start = time.process_time(), time.perf_counter()
+        response = await page.client(user).get(page.url(user), headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        cpu.append((time.process_time() - cpu_start) * 1000)
+        sizes.append(response.num_bytes_downloaded)
+        statuses.add(response.status_code)
+        if mode != "304":
+            etags[id(user)] = response.headers["etag"]
+
+    metrics = registry.routes[("GET", page.route)]
+    _, total_queries, count = metrics.queries.cumulative()
+    return {
+        "status": "/".join(str(s) for s in sorted(statuses)),
+        "bytes": statistics.mean(sizes),
+        "p50_ms": statistics.median(timings),
+        "cpu_ms": statistics.mean(cpu),
+        "queries": total_queries / count
+    }
+
+def saving(full: float, other: float) -> str:
+    return f"{(1 - other / full) * 100:5.1f}%" if full else "    -"
+
+async def main(args) -> int:
+    users = await login_users(args.users)
+    try:
+        results = await results_urls(users)
+        pages = [
+            Page("dashboard", "/dashboard", lambda u: u.student, lambda u: "/dashboard"),
+            Page("assessment results", "/modules/{module_id}/assessment/results/{attempt_id}",
+                 lambda u: u.student, lambda u: results[id(u)]),
+            Page("parent report", "/parent/report", lambda u: u.parent, lambda u: "/parent/report"),
+            Page("parent report PDF", "/parent/report.pdf", lambda u: u.parent, lambda u: "/parent/report.pdf",
+                 before_full=pdf_cache.clear),
+        ]
+        modes = ["identity", *reversed(ENCODINGS), "304"]
+
+        print(f"{'page':20} {'mode':9} {'status':>7} {'body B':>9} {'p50 ms':>8} {'cpu ms':>8} {'queries':>8}")
+        for page in pages:
+            etags: Dict[int, str] = {}
+            rows = {}
+            for mode in modes:
+                # Warm the caches (catalog, templates, compiled assessments) for this mode
+                await measure(page, users, mode, args.warmup or 1, etags)
+                rows[mode] = row = await measure(page, users, mode, args.requests, etags)
+                print(f"{page.name:20} {mode:9} {row['status']:>7} {row['bytes']:9,.0f} "
+                      f"{row['p50_ms']:8.2f} {row['cpu_ms']:8.2f} {row['queries']:8.2g}")
+            full, compressed, revalidated = rows["identity"], rows[ENCODINGS[0]], rows["304"]
+            print(f"{'':20} {ENCODINGS[0]} saves {saving(full['bytes'], compressed['bytes'])} of bytes; "
+                  f"304 saves {saving(full['bytes'], revalidated['bytes'])} of bytes and "
+                  f"{saving(compressed['cpu_ms'], revalidated['cpu_ms'])} of CPU against a compressed 200")
+    finally:
+        for user in users:
+            await user.student.aclose()
+            await user.parent.aclose()
+            await user.admin.aclose()
+        pdf_renderer.shutdown()
+        await engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50, help="timed requests per page and mode")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--users", type=int, default=10, help="seeded students to rotate through")
+    args = parser.parse_args()
+
+    raise SystemExit(asyncio.run(main(args)))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Memory check for the streamed assessments CSV export
+
+Drives ExportService.iter_assessments_csv over every assessment result in
+the configured database and samples Python heap usage as it goes, so a
+regression back to buffering the whole export shows up as growth between
+checkpoints. Exits non-zero if the traced peak exceeds --max-peak-mb.
+Allocation tracing slows the export several times over, so rows/s is only
+useful for comparing runs of this script.
+
+    python -m benchmarks.csv_export --seed 1000000   # local database only
+    python -m benchmarks.csv_export --gzip
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from sqlalchemy import text, select, func
+from app.models import engine, async_session, AssessmentResult
+from app.services.export_service import ExportService
+from app.services.counters import CounterService
+from app.services.cohort_analytics import CohortAnalytics
+from app.services.student_stats import StudentStatsService
+
+async def seed_results(rows: int):
+    async with engine.begin() as conn:
+        await conn.execute(text("""
+            INSERT INTO assessment_results
+                (student_id, raw_score, level, domain_breakdown, stars_earned, recommendation, completed_at)
+            SELECT s.ids[1 + g % array_length(s.ids, 1)], 40 + g % 60, 'Explorer',
+                   '{"logic": 15, "creativity": 20, "math": 18, "focus": 25}', 3,
+                   'Keep practising!', now() - (g || ' seconds')::interval
+            FROM generate_series(1, :rows) AS g,
+                 (SELECT array_agg(id) AS ids FROM (SELECT id FROM students ORDER BY id LIMIT 1000) t) AS s
+        """), {"rows": rows})
+        await CounterService.reconcile(conn)
+        await CohortAnalytics.reconcile(conn)
+        await StudentStatsService.reconcile(conn)
+        await conn.execute(text("ANALYZE assessment_results"))
+
+async def run_export(use_gzip: bool):
+    async with async_session() as db:
+        total = await db.scalar(select(func.count(AssessmentResult.id)))
+    print(f"Exporting {total:,} assessment results{' (gzip)' if use_gzip else ''}")
+
+    checkpoints = []
+    step = max(total // 10, ExportService.CHUNK_ROWS)
+
+    async def sampled_csv():
+        # Each CSV chunk is one cursor partition of CHUNK_ROWS rows
+        rows = 0
+        next_checkpoint = step
+        async for chunk in ExportService.iter_assessments_csv():
+            rows += ExportService.CHUNK_ROWS
+            if rows >= next_checkpoint:
+                current, peak = tracemalloc.get_traced_memory()
+                checkpoints.append((min(rows, total), current, peak))
+                next_checkpoint += step
+            yield chunk
+
+    chunks = sampled_csv()
+    if use_gzip:
+        chunks = ExportService.gzip_chunks(chunks)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    exported_bytes = 0
+    async for chunk in chunks:
+        exported_bytes += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await engine.dispose()
+
+    for rows, current, peak_so_far in checkpoints:
+        print(f"  {rows:>10,} rows  heap {current / 2**20:7.2f} MB  peak {peak_so_far / 2**20:7.2f} MB")
+    print(f"  {exported_bytes / 2**20:.1f} MB in {elapsed:.1f}s "
+          f"({total / elapsed if elapsed else 0:,.0f} rows/s), traced peak {peak / 2**20:.2f} MB")
+    return peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0, metavar="N",
+                        help="insert N assessment results first")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--max-peak-mb", type=float, default=32.0)
+    args = parser.parse_args()
+
+    async def main():
+        if args.seed:
+            print(f"Seeding {args.seed:,} assessment results...")
+            await seed_results(args.seed)
+        return await run_export(args.gzip)
+
+    peak = asyncio.run(main())
+    if peak > args.max_peak_mb * 2**20:
+        print(f"FAIL: peak memory above {args.max_peak_mb} MB")
+        sys.exit(1)
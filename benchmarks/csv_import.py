@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Memory and throughput check for the streamed assessments CSV import
+
+Generates a synthetic CSV on the fly (it is never held in full) for the
+first --students students in the configured database and feeds it to
+ImportService.import_assessments_csv in upload-sized chunks, sampling the
+Python heap as chunks are committed. Exits non-zero if the traced peak
+exceeds --max-peak-mb. Every row carries an idempotency key derived from
+--run, so repeating a run measures the all-duplicates path.
+
+    python -m benchmarks.csv_import --rows 1000000   # local database only
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from sqlalchemy import select
+from app.models import engine, async_session, Student
+from app.services.import_service import ImportService
+
+async def generate_csv(student_ids, rows: int, run: str, chunk_size: int, checkpoints: list):
+    step = max(rows // 10, ImportService.CHUNK_ROWS)
+    lines = ["student_id,raw_score,level,domain_breakdown,completed_at,idempotency_key\n"]
+    size = len(lines[0])
+    for n in range(1, rows + 1):
+        line = (f'{student_ids[n % len(student_ids)]},{40 + n % 60},Explorer,'
+                f'"{{""logic"": {n % 25}, ""creativity"": 20, ""math"": 18, ""focus"": 25}}",'
+                f'2026-01-01T00:00:00,{run}-{n}\n')
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(lines).encode()
+            lines, size = [], 0
+        if n % step == 0:
+            current, peak = tracemalloc.get_traced_memory()
+            checkpoints.append((n, current, peak))
+    if lines:
+        yield "".join(lines).encode()
+
+async def run_import(rows: int, students: int, run: str, chunk_size: int):
+    async with async_session() as db:
+        student_ids = (await db.execute(select(Student.id).order_by(Student.id).limit(students))).scalars().all()
+    if not student_ids:
+        raise SystemExit("No students; run python -m benchmarks.seed first")
+    print(f"Importing {rows:,} rows for {len(student_ids):,} students")
+
+    checkpoints = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    async with async_session() as db:
+        summary = await ImportService.import_assessments_csv(
+            db, generate_csv(student_ids, rows, run, chunk_size, checkpoints)
+        )
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await engine.dispose()
+
+    for n, current, peak_so_far in checkpoints:
+        print(f"  {n:>10,} rows  heap {current / 2**20:7.2f} MB  peak {peak_so_far / 2**20:7.2f} MB")
+    print(f"  inserted {summary.inserted:,}, duplicates {summary.skipped_duplicate:,}, "
+          f"unknown students {summary.skipped_student_not_found:,}, errors {summary.errors:,}")
+    print(f"  {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s), traced peak {peak / 2**20:.2f} MB")
+    return peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--students", type=int, default=1000, help="spread rows over this many students")
+    parser.add_argument("--run", default=time.strftime("bench-%Y%m%d%H%M%S"), help="idempotency key prefix")
+    parser.add_argument("--chunk-kb", type=int, default=64, help="upload chunk size")
+    parser.add_argument("--max-peak-mb", type=float, default=32.0)
+    args = parser.parse_args()
+
+    peak = asyncio.run(run_import(args.rows, args.students, args.run, args.chunk_kb * 1024))
+    if peak > args.max_peak_mb * 2**20:
+        print(f"FAIL: peak memory above {args.max_peak_mb} MB")
+        sys.exit(1)
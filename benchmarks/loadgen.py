@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Load generator replaying student and parent journeys against a running app
+
+Each virtual user loops over weighted scenarios, with its own cookie jar,
+instead of replaying captured cookies by hand with curl:
+
+  register  GET/POST /register, log in with the issued code, open the dashboard
+  study     log in, dashboard, open a module, complete it, take its
+            assessment with random answers and view the result
+  browse    log in, dashboard, open two modules
+  parent    parent login, report page, PDF download
+
+Existing students come from benchmarks.seed (Bench<n> / BM<n> /
+bench<n>@example.com); students registered during the run join the pool.
+Give several --concurrency levels to step the load up and see where
+throughput stops growing, i.e. where the worker saturates.
+
+    uvicorn app.main:app --workers 1 --port 8000          # seeded database
+    python -m benchmarks.loadgen --concurrency 1,4,16,32 --duration 30
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+import httpx
+
+ACCESS_CODE = re.compile(r'font-mono">\s*([A-Z0-9]+)\s*<')
+MODULE_LINK = re.compile(r'href="/modules/(\d+)"')
+QUESTION_FIELD = re.compile(r'name="(question_\d+)"')
+LETTERS_FOR_HEX = str.maketrans("0123456789", "ghijklmnop")
+
+class StepError(Exception):
+    pass
+
+@dataclass
+class Credentials:
+    first_name: str
+    access_code: str
+    parent_email: str
+
+@dataclass
+class Stats:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Counter = field(default_factory=Counter)
+    scenarios: Counter = field(default_factory=Counter)
+    requests: int = 0
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, stats: Stats, pool: List[Credentials], rng: random.Random):
+        self.client = client
+        self.stats = stats
+        self.pool = pool
+        self.rng = rng
+
+    async def step(self, name: str, method: str, url: str, expect=(200,), **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.errors[(name, e.__class__.__name__)] += 1
+            raise StepError(name)
+        self.stats.requests += 1
+        self.stats.latencies[name].append((time.perf_counter() - start) * 1000)
+        if response.status_code not in expect:
+            self.stats.errors[(name, f"HTTP {response.status_code}")] += 1
+            raise StepError(name)
+        return response
+
+    async def student_login(self) -> str:
+        creds = self.rng.choice(self.pool)
+        self.client.cookies.clear()
+        await self.step("login", "POST", "/login", expect=(302,),
+                        data={"first_name": creds.first_name, "access_code": creds.access_code})
+        dashboard = await self.step("dashboard", "GET", "/dashboard")
+        return dashboard.text
+
+    async def register(self):
+        self.client.cookies.clear()
+        await self.step("register_form", "GET", "/register")
+        # Unique across runs too: names may only contain letters, and name + age must be new
+        token = uuid.uuid4().hex[:12]
+        first_name = token.translate(LETTERS_FOR_HEX).title()
+        parent_email = f"load-{token}@example.com"
+        response = await self.step("register", "POST", "/register", data={
+            "first_name": first_name, "age": str(self.rng.randint(6, 15)), "parent_email": parent_email
+        })
+        match = ACCESS_CODE.search(response.text)
+        if not match:
+            self.stats.errors[("register", "no access code in page")] += 1
+            raise StepError("register")
+        creds = Credentials(first_name, match.group(1), parent_email)
+        await self.step("login", "POST", "/login", expect=(302,),
+                        data={"first_name": creds.first_name, "access_code": creds.access_code})
+        await self.step("dashboard", "GET", "/dashboard")
+        self.pool.append(creds)
+
+    async def study(self):
+        dashboard = await self.student_login()
+        module_ids = MODULE_LINK.findall(dashboard)
+        if not module_ids:
+            return
+        module_id = self.rng.choice(module_ids)
+        await self.step("module", "GET", f"/modules/{module_id}")
+        await self.step("module_complete", "POST", f"/modules/{module_id}/complete", expect=(302,))
+
+        form = await self.step("assessment_form", "GET", f"/modules/{module_id}/assessment", expect=(200, 302, 404))
+        if form.status_code != 200:
+            return  # Module has no assessment, or the student was sent elsewhere
+        answers = {name: str(self.rng.randint(0, 3)) for name in set(QUESTION_FIELD.findall(form.text))}
+        answers["start_time"] = str(int(time.time()) - self.rng.randint(60, 900))
+        result = await self.step("assessment_submit", "POST", f"/modules/{module_id}/assessment",
+                                 expect=(302,), data=answers)
+        await self.step("assessment_result", "GET", result.headers["location"])
+
+    async def browse(self):
+        dashboard = await self.student_login()
+        module_ids = MODULE_LINK.findall(dashboard)
+        for module_id in self.rng.sample(module_ids, min(2, len(module_ids))):
+            await self.step("module", "GET", f"/modules/{module_id}")
+
+    async def parent(self):
+        creds = self.rng.choice(self.pool)
+        self.client.cookies.clear()
+        await self.step("parent_login", "POST", "/parent/login", expect=(302,),
+                        data={"parent_email": creds.parent_email, "access_code": creds.access_code})
+        await self.step("parent_report", "GET", "/parent/report")
+        await self.step("parent_pdf", "GET", "/parent/report.pdf")
+
+SCENARIOS = {
+    "register": VirtualUser.register,
+    "study": VirtualUser.study,
+    "browse": VirtualUser.browse,
+    "parent": VirtualUser.parent,
+}
+
+def parse_weights(text: str) -> Dict[str, int]:
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+async def run_user(base_url: str, stats: Stats, pool: List[Credentials], weights: Dict[str, int],
+                   deadline: float, seed: int, timeout: float):
+    rng = random.Random(seed)
+    names, counts = zip(*weights.items())
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        user = VirtualUser(client, stats, pool, rng)
+        while time.monotonic() < deadline:
+            scenario = rng.choices(names, counts)[0] if pool else "register"
+            try:
+                await SCENARIOS[scenario](user)
+                stats.scenarios[scenario] += 1
+            except StepError:
+                stats.scenarios[f"{scenario} (failed)"] += 1
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def report(concurrency: int, elapsed: float, stats: Stats) -> Tuple[float, float]:
+    print(f"\n== concurrency {concurrency}: {stats.requests:,} requests in {elapsed:.1f}s "
+          f"({stats.requests / elapsed:,.1f} req/s, "
+          f"{sum(n for s, n in stats.scenarios.items() if 'failed' not in s) / elapsed:,.2f} journeys/s)")
+    print(f"  {'step':20} {'count':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    errors_by_step = Counter()
+    for (step, _), n in stats.errors.items():
+        errors_by_step[step] += n
+    all_latencies = []
+    for step in sorted(set(stats.latencies) | set(errors_by_step)):
+        values = sorted(stats.latencies.get(step, []))
+        all_latencies += values
+        if values:
+            print(f"  {step:20} {len(values):7,} {errors_by_step[step]:7,} {percentile(values, 50):8.1f} "
+                  f"{percentile(values, 95):8.1f} {percentile(values, 99):8.1f}")
+        else:
+            print(f"  {step:20} {0:7,} {errors_by_step[step]:7,}")
+    if stats.errors:
+        print("  errors:")
+        for (step, kind), n in stats.errors.most_common():
+            print(f"    {n:6,}  {step}: {kind}")
+    all_latencies.sort()
+    p95 = percentile(all_latencies, 95) if all_latencies else 0.0
+    return stats.requests / elapsed, p95
+
+async def main(args):
+    weights = parse_weights(args.scenarios)
+    pool = [
+        Credentials(f"Bench{n}", f"BM{n:08d}", f"bench{n}@example.com")
+        for n in range(1, args.seeded_students + 1)
+    ]
+    summary = []
+    for concurrency in args.concurrency:
+        stats = Stats()
+        start = time.monotonic()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            run_user(args.base_url, stats, pool, weights, deadline, args.seed + i, args.timeout)
+            for i in range(concurrency)
+        ))
+        elapsed = time.monotonic() - start
+        throughput, p95 = report(concurrency, elapsed, stats)
+        summary.append((concurrency, throughput, p95, sum(stats.errors.values())))
+
+    if len(summary) > 1:
+        print(f"\n  {'users':>6} {'req/s':>9} {'p95 ms':>8} {'errors':>7}")
+        for concurrency, throughput, p95, errors in summary:
+            print(f"  {concurrency:6} {throughput:9,.1f} {p95:8.1f} {errors:7,}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[8],
+                        help="virtual users, or a comma-separated list of levels to step through")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per concurrency level")
+    parser.add_argument("--scenarios", default="register=1,study=4,browse=3,parent=2",
+                        help="weighted mix, e.g. study=4,parent=1")
+    parser.add_argument("--seeded-students", type=int, default=10000,
+                        help="students created by benchmarks.seed to log in as")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
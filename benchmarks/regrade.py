@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the bulk module assessment regrade engine
+
+Scores a synthetic answer matrix with RegradeService.score_matrix and with
+the per-attempt grading loop it replaces. With --database it also seeds
+attempts for an existing module assessment and times a full dry run and
+apply against the configured DATABASE_URL (use a local database).
+
+    python -m benchmarks.regrade --attempts 1000000
+    python -m benchmarks.regrade --attempts 1000000 --database --assessment-id 1
+"""
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from sqlalchemy import select, text
+from app.models import async_session, engine, ModuleAssessmentAttempt
+from app.services.assessment_cache import CompiledAssessment
+from app.services.regrade_service import RegradeService
+
+ORM_SAMPLE = 2000
+
+def sample_assessment() -> CompiledAssessment:
+    with open("sample_python_assessment.json") as f:
+        return CompiledAssessment.compile(0, f.read())
+
+def bench_scoring(attempts: int, loop_sample: int):
+    compiled = sample_assessment()
+    rng = np.random.default_rng(42)
+    answers = rng.integers(-1, 4, size=(attempts, compiled.total_questions), dtype=np.int16)
+
+    start = time.perf_counter()
+    score, percentage, stars = RegradeService.score_matrix(answers, compiled)
+    vectorised = time.perf_counter() - start
+
+    # The per-row path: build each attempt's form dict and grade it in Python
+    sample = answers[:loop_sample]
+    start = time.perf_counter()
+    for i, row in enumerate(sample.tolist()):
+        form = {name: value for name, value in zip(compiled.field_names, row) if value >= 0}
+        grade = compiled.grade(form)
+        assert grade.score == score[i] and grade.stars_earned == stars[i]
+    per_row = (time.perf_counter() - start) * attempts / loop_sample
+
+    print(f"Scoring {attempts:,} attempts x {compiled.total_questions} questions")
+    print(f"  vectorised pass:        {vectorised:8.3f}s")
+    print(f"  per-row loop (est.):    {per_row:8.3f}s  (measured on {loop_sample:,} rows)")
+    print(f"  speed-up:               {per_row / vectorised:8.1f}x")
+
+async def seed_attempts(assessment_id: int, attempts: int, total_questions: int):
+    answers_json = "json_build_object(" + ", ".join(
+        f"'{i}', floor(random() * 4)::int" for i in range(1, total_questions + 1)
+    ) + ")::text"
+    async with engine.begin() as conn:
+        await conn.execute(text(f"""
+            INSERT INTO module_assessment_attempts
+                (assessment_id, student_id, answers, score, percentage, stars_earned, completed_at)
+            SELECT :assessment_id, s.ids[1 + g % array_length(s.ids, 1)], {answers_json}, 0, 0, 1, now()
+            FROM generate_series(1, :attempts) AS g,
+                 (SELECT array_agg(id) AS ids FROM (SELECT id FROM students ORDER BY id LIMIT 1000) t) AS s
+        """), {"assessment_id": assessment_id, "attempts": attempts})
+        await conn.execute(text("ANALYZE module_assessment_attempts"))
+
+async def bench_database(assessment_id: int, attempts: int):
+    async with async_session() as db:
+        questions = await db.scalar(text(
+            "SELECT questions FROM module_assessments WHERE id = :id"
+        ), {"id": assessment_id})
+    if questions is None:
+        print(f"Module assessment {assessment_id} not found")
+        return
+    total_questions = len(json.loads(questions)["questions"])
+
+    print(f"\nSeeding {attempts:,} attempts for assessment {assessment_id}...")
+    start = time.perf_counter()
+    await seed_attempts(assessment_id, attempts, total_questions)
+    print(f"  seeded in {time.perf_counter() - start:.1f}s")
+
+    for dry_run in (True, False):
+        async with async_session() as db:
+            start = time.perf_counter()
+            report = await RegradeService.regrade(db, assessment_id, dry_run=dry_run)
+            elapsed = time.perf_counter() - start
+        label = "dry run" if dry_run else "apply"
+        print(f"  {label:8} {elapsed:7.2f}s  {report.attempts_total:,} attempts, "
+              f"{report.attempts_changed:,} changed, {report.progress_changed:,} progress rows")
+
+    # The per-row ORM path on a sample, rolled back, extrapolated to every attempt
+    async with async_session() as db:
+        compiled = CompiledAssessment.compile(assessment_id, questions)
+        start = time.perf_counter()
+        result = await db.execute(
+            select(ModuleAssessmentAttempt)
+            .where(ModuleAssessmentAttempt.assessment_id == assessment_id)
+            .limit(ORM_SAMPLE)
+        )
+        sample = result.scalars().all()
+        for attempt in sample:
+            answers = json.loads(attempt.answers)
+            grade = compiled.grade({f"question_{q}": a for q, a in answers.items()})
+            attempt.score = grade.score
+            attempt.percentage = grade.percentage
+            attempt.stars_earned = grade.stars_earned
+            await db.flush()
+        elapsed = time.perf_counter() - start
+        await db.rollback()
+    estimate = elapsed * report.attempts_total / max(len(sample), 1)
+    print(f"  per-row ORM loop (est.) {estimate:7.2f}s  (measured on {len(sample):,} rows)")
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=1000000)
+    parser.add_argument("--loop-sample", type=int, default=100000,
+                        help="rows graded one by one to estimate the per-row cost")
+    parser.add_argument("--database", action="store_true",
+                        help="also seed attempts and regrade them in the configured database")
+    parser.add_argument("--assessment-id", type=int, default=1)
+    args = parser.parse_args()
+
+    bench_scoring(args.attempts, min(args.loop_sample, args.attempts))
+    if args.database:
+        asyncio.run(bench_database(args.assessment_id, args.attempts))
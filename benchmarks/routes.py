@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Route-level performance regression suite
+
+Drives the real FastAPI app in-process (no network) through the student,
+parent and admin pages against a database seeded by benchmarks.seed, and
+records latency percentiles and SQL statements per request for each route.
+Results are compared with benchmarks/baseline.json; the run fails when a
+route's p95 grows past --threshold (plus --slack-ms for timer noise) or it
+issues more queries than the baseline.
+
+Latency is machine-dependent: refresh the baseline with --update-baseline on
+the machine that runs the comparison. Query counts are not, so they are the
+signal to trust on shared CI runners.
+
+    python -m benchmarks.seed --reset                # throwaway database!
+    python -m benchmarks.routes
+    python -m benchmarks.routes --update-baseline
+"""
+import os
+
+# Query counts come from the metrics middleware
+os.environ["METRICS_ENABLED"] = "true"
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List
+import httpx
+from sqlalchemy import select, func, text
+from app.main import app
+from app.metrics import registry
+from app.models import engine, async_session, Student, Module
+from app.services.pdf_renderer import pdf_renderer, pdf_cache
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+@dataclass
+class BenchUser:
+    student: httpx.AsyncClient
+    parent: httpx.AsyncClient
+    admin: httpx.AsyncClient
+    module_id: int
+
+@dataclass
+class RouteCase:
+    method: str
+    route: str  # Template, as recorded by the metrics middleware
+    request: Callable[[BenchUser], Awaitable[httpx.Response]]
+    expect: int = 200
+    before: Callable[[], None] = lambda: None
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+async def login_users(count: int) -> List[BenchUser]:
+    async with async_session() as db:
+        total = await db.scalar(select(func.count(Student.id)).where(Student.access_code.like("BM%")))
+        if not total:
+            raise SystemExit("No seeded students; run python -m benchmarks.seed first")
+        step = max(total // count, 1)
+        students = (await db.execute(
+            select(Student).where(Student.access_code.like("BM%")).order_by(Student.id)
+            .offset(step // 2).limit(count * step)
+        )).scalars().all()[::step][:count]
+        module_ids = (await db.execute(
+            select(Module.id).where(Module.is_published == True).order_by(Module.week_no)
+        )).scalars().all()
+
+    users = []
+    for i, student in enumerate(students):
+        user = BenchUser(client(), client(), client(), module_ids[i % len(module_ids)])
+        await user.student.post("/login", data={"first_name": student.first_name, "access_code": student.access_code})
+        await user.parent.post("/parent/login", data={"parent_email": student.parent_email, "access_code": student.access_code})
+        await user.admin.post("/admin/login", data={"password": os.getenv("ADMIN_PASS", "admin123")})
+        users.append(user)
+    return users
+
+def assessment_answers(user: BenchUser) -> dict:
+    answers = {f"question_{q}": str((q + user.module_id) % 4) for q in range(1, 11)}
+    return {**answers, "start_time": str(int(time.time()) - 300)}
+
+ROUTES = [
+    RouteCase("GET", "/dashboard", lambda u: u.student.get("/dashboard")),
+    RouteCase("GET", "/modules/{module_id}", lambda u: u.student.get(f"/modules/{u.module_id}")),
+    RouteCase("GET", "/modules/{module_id}/assessment",
+              lambda u: u.student.get(f"/modules/{u.module_id}/assessment")),
+    RouteCase("POST", "/modules/{module_id}/assessment",
+              lambda u: u.student.post(f"/modules/{u.module_id}/assessment", data=assessment_answers(u)),
+              expect=302),
+    RouteCase("GET", "/parent/report", lambda u: u.parent.get("/parent/report")),
+    # Clear the rendered-PDF cache so every request measures a real render
+    RouteCase("GET", "/parent/report.pdf", lambda u: u.parent.get("/parent/report.pdf"),
+              before=pdf_cache.clear),
+    RouteCase("GET", "/admin/dashboard", lambda u: u.admin.get("/admin/dashboard")),
+    RouteCase("GET", "/admin/assessments.csv", lambda u: u.admin.get("/admin/assessments.csv")),
+    RouteCase("GET", "/admin/students", lambda u: u.admin.get("/admin/students")),
+    RouteCase("GET", "/admin/students.json", lambda u: u.admin.get("/admin/students.json", params={"q": "bench1"})),
+]
+
+async def bench_route(case: RouteCase, users: List[BenchUser], requests: int, warmup: int) -> dict:
+    for i in range(warmup):
+        case.before()
+        await case.request(users[i % len(users)])
+
+    registry.reset()
+    timings = []
+    for i in range(requests):
+        case.before()
+        start = time.perf_counter()
+        response = await case.request(users[i % len(users)])
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != case.expect:
+            raise SystemExit(f"{case.method} {case.route}: expected {case.expect}, got {response.status_code}")
+
+    metrics = registry.routes[(case.method, case.route)]
+    _, total_queries, count = metrics.queries.cumulative()
+    timings.sort()
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "max_ms": round(timings[-1], 2),
+        "queries": round(total_queries / count, 2)
+    }
+
+async def scale() -> Dict[str, int]:
+    async with async_session() as db:
+        counts = {}
+        # Only what the seed fixes; the POST route adds attempts on every run
+        for table in ("students", "modules", "assessment_results"):
+            counts[table] = await db.scalar(text(f"SELECT count(*) FROM {table}"))
+        return counts
+
+def compare(results: dict, baseline: dict, threshold: float, slack_ms: float, query_tolerance: float) -> List[str]:
+    failures = []
+    for name, result in results.items():
+        base = baseline.get("routes", {}).get(name)
+        if not base:
+            continue
+        limit = base["p95_ms"] * (1 + threshold) + slack_ms
+        if result["p95_ms"] > limit:
+            failures.append(f"{name}: p95 {result['p95_ms']:.1f}ms > {limit:.1f}ms (baseline {base['p95_ms']:.1f}ms)")
+        if result["queries"] > base["queries"] + query_tolerance:
+            failures.append(f"{name}: {result['queries']:g} queries/request > baseline {base['queries']:g}")
+    return failures
+
+async def main(args) -> int:
+    users = await login_users(args.users)
+    results = {}
+    print(f"{'route':42} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}")
+    try:
+        for case in ROUTES:
+            name = f"{case.method} {case.route}"
+            if args.route and not any(r in name for r in args.route):
+                continue
+            result = await bench_route(case, users, args.requests, args.warmup)
+            results[name] = result
+            print(f"{name:42} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} "
+                  f"{result['p99_ms']:8.1f} {result['queries']:8g}")
+        data_scale = await scale()
+    finally:
+        for user in users:
+            await user.student.aclose()
+            await user.parent.aclose()
+            await user.admin.aclose()
+        pdf_renderer.shutdown()
+        await engine.dispose()
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "machine": f"{platform.system()} {platform.machine()} {platform.python_version()}, {os.cpu_count()} cpu",
+                "scale": data_scale,
+                "requests": args.requests,
+                "routes": results
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("scale") != data_scale:
+        print(f"Warning: baseline was recorded at {baseline.get('scale')}, this database is {data_scale}")
+
+    failures = compare(results, baseline, args.threshold, args.slack_ms, args.query_tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if not failures:
+        print("No regressions against baseline")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--users", type=int, default=10, help="seeded students to rotate through")
+    parser.add_argument("--route", action="append", help="only routes containing this text (repeatable)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed fractional p95 growth")
+    parser.add_argument("--slack-ms", type=float, default=5.0)
+    parser.add_argument("--query-tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(args)))
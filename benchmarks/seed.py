@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Seed a local database with a synthetic cohort for benchmarking
+
+Creates published weekly modules, each with the sample module assessment,
+and students (access codes BM00000001, BM00000002, ..., parent emails
+bench1@example.com, ...) spread over six classes with staggered progress,
+module assessment attempts and external assessment results. Everything is
+generated with set-based SQL, so 10k students take seconds.
+
+Refuses to run against a database that already has students unless --reset
+is given, which TRUNCATEs every table first. Point DATABASE_URL at a
+throwaway database.
+
+    python -m benchmarks.seed --students 10000 --modules 52 --attempts 20 --reset
+"""
+import argparse
+import asyncio
+import time
+from sqlalchemy import text
+from app.models import engine, Base
+from app.services.counters import CounterService
+from app.services.cohort_analytics import CohortAnalytics
+from app.services.student_stats import StudentStatsService
+
+SAMPLE_ASSESSMENT = "sample_python_assessment.json"
+
+async def seed(students: int, modules: int, attempts: int, results: int, reset: bool = False):
+    with open(SAMPLE_ASSESSMENT) as f:
+        questions = f.read()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+        existing = await conn.scalar(text("SELECT count(*) FROM students"))
+        if existing and not reset:
+            raise SystemExit(f"Database already has {existing:,} students; pass --reset to replace them")
+        if reset:
+            tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+            await conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+        await conn.execute(text("""
+            INSERT INTO modules (title, week_no, video_url, resource_url, meet_url, is_published, created_at)
+            SELECT 'Week ' || w || ': Coding Adventure', w,
+                   'https://www.youtube.com/embed/dQw4w9WgXcQ',
+                   'https://example.com/resources/week-' || w,
+                   'https://meet.example.com/week-' || w,
+                   true, now()
+            FROM generate_series(1, :modules) AS w
+        """), {"modules": modules})
+
+        await conn.execute(text("""
+            INSERT INTO module_assessments (module_id, title, questions, is_active, created_at)
+            SELECT id, title || ' - Module Assessment', :questions, true, now() FROM modules
+        """), {"questions": questions})
+
+        await conn.execute(text("""
+            INSERT INTO students (first_name, age, parent_email, access_code, class_label, created_at)
+            SELECT 'Bench' || g, 6 + g % 10, 'bench' || g || '@example.com',
+                   'BM' || lpad(g::text, 8, '0'), 'Y' || (1 + g % 6),
+                   now() - (g || ' minutes')::interval
+            FROM generate_series(1, :students) AS g
+        """), {"students": students})
+
+        # Student n has finished the first (n mod modules) weeks and started the next
+        await conn.execute(text("""
+            INSERT INTO enrollment_progress (student_id, module_id, status, stars, updated_at)
+            SELECT s.id, m.id,
+                   CASE WHEN m.week_no <= s.id % :modules THEN 'DONE' ELSE 'STARTED' END::progressstatus,
+                   CASE WHEN m.week_no <= s.id % :modules THEN 1 + (s.id + m.id) % 3 ELSE 0 END,
+                   now() - ((s.id + m.id) % 1000 || ' minutes')::interval
+            FROM students s
+            JOIN modules m ON m.week_no <= s.id % :modules + 1
+        """), {"modules": modules})
+
+        await conn.execute(text("""
+            INSERT INTO module_assessment_attempts
+                (assessment_id, student_id, answers, score, percentage, stars_earned, time_taken, completed_at)
+            SELECT a.id, s.id,
+                   json_build_object('1', g % 4, '2', 1, '3', 0, '4', (g + 1) % 4, '5', 2,
+                                     '6', 1, '7', g % 2, '8', 1, '9', 2, '10', 1)::text,
+                   5 + g % 6, 50 + (g % 6) * 10, 1 + g % 3, 120 + g % 300,
+                   now() - ((s.id * :attempts + g) || ' seconds')::interval
+            FROM students s
+            CROSS JOIN generate_series(1, :attempts) AS g
+            JOIN module_assessments a ON a.module_id = 1 + (s.id + g) % :modules
+        """), {"attempts": attempts, "modules": modules})
+
+        await conn.execute(text("""
+            INSERT INTO assessment_results
+                (student_id, raw_score, level, domain_breakdown, stars_earned, recommendation, completed_at)
+            SELECT s.id, 40 + (s.id + g) % 60,
+                   (ARRAY['Explorer', 'Builder', 'Innovator'])[1 + (s.id + g) % 3],
+                   '{"logic": 15, "creativity": 20, "math": 18, "focus": 25}', 3,
+                   'Keep practising!', now() - (g || ' days')::interval
+            FROM students s
+            CROSS JOIN generate_series(1, :results) AS g
+        """), {"results": results})
+
+        # The rows above bypass the app's write paths
+        await CounterService.reconcile(conn)
+        await CohortAnalytics.reconcile(conn)
+        await StudentStatsService.reconcile(conn)
+
+        await conn.execute(text("ANALYZE"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--modules", type=int, default=52)
+    parser.add_argument("--attempts", type=int, default=20, help="module assessment attempts per student")
+    parser.add_argument("--results", type=int, default=2, help="external assessment results per student")
+    parser.add_argument("--reset", action="store_true", help="truncate every table first")
+    args = parser.parse_args()
+
+    async def main():
+        start = time.perf_counter()
+        try:
+            await seed(args.students, args.modules, args.attempts, args.results, args.reset)
+        finally:
+            await engine.dispose()
+        print(f"Seeded {args.students:,} students x {args.modules} modules x "
+              f"{args.attempts} attempts in {time.perf_counter() - start:.1f}s")
+
+    asyncio.run(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark: import time per module and time to the first 200 OK
+
+Every measurement runs in a fresh interpreter, --runs times, and medians
+are reported:
+
+  imports    python -X importtime -c "import app.main": the total, and self
+             time summed per top-level package (app modules listed singly)
+  first 200  from spawning uvicorn to the first 200 for GET /, which is only
+             served once the lifespan (schema step, stats initialisation,
+             template precompile) has finished; once per DB_SCHEMA_STARTUP mode
+
+Results are compared with benchmarks/startup_baseline.json like
+benchmarks.routes does. Importing any of LAZY_MODULES while booting fails
+the run regardless of timings; that check is machine-independent, so it is
+the one to trust on shared CI runners, which run with --no-timing-check
+and keep the --output JSON to track timings across builds.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --update-baseline
+    python -m benchmarks.startup --no-timing-check --output startup.json    # CI
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+import httpx
+
+BASELINE = os.path.join(os.path.dirname(__file__), "startup_baseline.json")
+
+# Heavy dependencies of rare paths, imported on first use (PDF rendering, regrades, asset builds)
+LAZY_MODULES = ("reportlab", "numpy", "PIL", "alembic")
+
+def import_profile() -> Tuple[float, Dict[str, float], Set[str]]:
+    """(total ms, self ms per module group, top-level packages imported) for one cold import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True
+    )
+    groups: Dict[str, float] = defaultdict(float)
+    packages = set()
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        top = name.split(".")[0]
+        packages.add(top)
+        groups[name if top == "app" else top] += int(self_us) / 1000
+        if name == "app.main":
+            total = int(cumulative_us) / 1000
+    return total, groups, packages
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def time_to_first_200(schema: str, timeout: float) -> float:
+    port = free_port()
+    env = {**os.environ, "DB_SCHEMA_STARTUP": schema}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    # One client, so polling doesn't take CPU from the server it is timing
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout)
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise SystemExit(f"uvicorn exited with {server.returncode} before serving")
+            try:
+                if client.get("/").status_code == 200:
+                    return (time.perf_counter() - start) * 1000
+            except httpx.TransportError:
+                time.sleep(0.01)
+        raise SystemExit(f"No 200 from GET / within {timeout:.0f}s")
+    finally:
+        client.close()
+        server.terminate()
+        server.wait()
+
+def measure(runs: int, schemas: List[str], timeout: float, top: int) -> dict:
+    totals, groups, packages = [], defaultdict(list), set()
+    for _ in range(runs):
+        total, run_groups, run_packages = import_profile()
+        totals.append(total)
+        packages |= run_packages
+        for name, ms in run_groups.items():
+            groups[name].append(ms)
+    modules = sorted(((name, statistics.median(values)) for name, values in groups.items()),
+                     key=lambda item: item[1], reverse=True)
+
+    first_200 = {
+        schema: statistics.median(time_to_first_200(schema, timeout) for _ in range(runs))
+        for schema in schemas
+    }
+    return {
+        "import_ms": round(statistics.median(totals), 1),
+        "first_200_ms": {schema: round(ms, 1) for schema, ms in first_200.items()},
+        "modules": {name: round(ms, 1) for name, ms in modules[:top]},
+        "lazy_imported": sorted(packages & set(LAZY_MODULES))
+    }
+
+def compare(result: dict, baseline: dict, threshold: float, slack_ms: float) -> List[str]:
+    failures = [f"{name} is imported at startup; import it where it is used"
+                for name in result["lazy_imported"]]
+
+    def check(label: str, value: float, base: float):
+        limit = base * (1 + threshold) + slack_ms
+        if value > limit:
+            failures.append(f"{label}: {value:.0f}ms > {limit:.0f}ms (baseline {base:.0f}ms)")
+
+    if "import_ms" in baseline:
+        check("import app.main", result["import_ms"], baseline["import_ms"])
+    for schema, ms in result["first_200_ms"].items():
+        if schema in baseline.get("first_200_ms", {}):
+            check(f"first 200 ({schema})", ms, baseline["first_200_ms"][schema])
+    return failures
+
+def main(args) -> int:
+    result = measure(args.runs, args.schema, args.timeout, args.top)
+
+    print(f"import app.main {result['import_ms']:8.1f} ms  (median of {args.runs} cold imports)")
+    for name, ms in result["modules"].items():
+        print(f"  {name:36} {ms:8.1f} ms")
+    for schema, ms in result["first_200_ms"].items():
+        print(f"first 200 OK    {ms:8.1f} ms  (DB_SCHEMA_STARTUP={schema})")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "machine": f"{platform.system()} {platform.machine()} {platform.python_version()}, {os.cpu_count()} cpu",
+                "runs": args.runs,
+                **result
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 1 if result["lazy_imported"] else 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    else:
+        print(f"No baseline at {args.baseline}; run with --update-baseline")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"baseline": baseline, "result": result}, f, indent=2)
+            f.write("\n")
+
+    if args.no_timing_check:
+        baseline = {}
+    failures = compare(result, baseline, args.threshold, args.slack_ms)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if not failures:
+        print("No regressions against baseline")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per measurement")
+    parser.add_argument("--schema", type=lambda s: s.split(","), default=["create_all", "check"],
+                        help="DB_SCHEMA_STARTUP modes to boot with, comma-separated")
+    parser.add_argument("--top", type=int, default=15, help="module groups to list")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for the first 200")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed fractional growth")
+    parser.add_argument("--slack-ms", type=float, default=100.0)
+    parser.add_argument("--no-timing-check", action="store_true",
+                        help="only fail on eagerly imported LAZY_MODULES (runners unlike the baseline machine)")
+    parser.add_argument("--output", help="also write the results and baseline as JSON here")
+    args = parser.parse_args()
+
+    sys.exit(main(args))
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Build optimised, fingerprinted copies of app/static into app/static/dist
+
+Images are resized to each of WIDTHS (never upscaled) and saved as WebP plus
+a JPEG fallback (PNG when the image has transparency). Every output file is
+named after a hash of its content, so it can be cached forever. Text files
+(SVG, CSS, JS, ...) are also written gzip- and, when the brotli package is
+installed, brotli-compressed next to the original, so AssetFiles can send
+them without compressing per request.
+
+dist/manifest.json maps each source name to its built URLs; templates read
+it through asset_url() and asset_srcset(). Run on every deploy; without a
+build the templates fall back to the unoptimised files.
+
+    python build_assets.py
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Dict, List, Tuple
+from PIL import Image
+from app.services.static_assets import STATIC_DIR, BUILD_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+WIDTHS = (400, 800)  # Plus the original width; the hero image is shown at up to 400 CSS px
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+TEXT_SUFFIXES = {".svg", ".css", ".js", ".json", ".txt", ".html"}
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+HASH_LENGTH = 10
+
+def fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+class Builder:
+    def __init__(self, source: str, output: str):
+        self.source = source
+        self.output = output
+        self.assets: Dict[str, dict] = {}
+        self.encodings: Dict[str, List[str]] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def write(self, stem: str, suffix: str, data: bytes) -> str:
+        """Write data under its fingerprinted name; returns the path relative to STATIC_DIR"""
+        name = f"{stem}.{fingerprint(data)}{suffix}"
+        with open(os.path.join(self.output, name), "wb") as f:
+            f.write(data)
+        return f"{BUILD_DIR}/{name}"
+
+    def precompress(self, path: str, data: bytes):
+        """Write .br/.gz twins of a built text file when they are smaller"""
+        encoded = []
+        compressed = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(data, quality=11)
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            body = compressed.get(encoding)
+            if body is not None and len(body) < len(data):
+                with open(os.path.join(STATIC_DIR, path + suffix), "wb") as f:
+                    f.write(body)
+                encoded.append(encoding)
+        if encoded:
+            self.encodings[path] = encoded
+
+    def image(self, name: str, data: bytes):
+        stem, _ = os.path.splitext(name)
+        with Image.open(io.BytesIO(data)) as original:
+            original.load()
+            has_alpha = original.mode in ("RGBA", "LA") or "transparency" in original.info
+            image = original.convert("RGBA" if has_alpha else "RGB")
+
+        fallback, fallback_type = ("PNG", "image/png") if has_alpha else ("JPEG", "image/jpeg")
+        formats: List[Tuple[str, str, str, dict]] = [
+            ("WEBP", "image/webp", ".webp", {"quality": WEBP_QUALITY, "method": 6}),
+            (fallback, fallback_type, ".png" if has_alpha else ".jpg",
+             {"optimize": True} if has_alpha else {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}),
+        ]
+        widths = sorted({w for w in WIDTHS if w < image.width} | {image.width})
+        srcset: Dict[str, List[Tuple[int, str]]] = {media_type: [] for _, media_type, _, _ in formats}
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for fmt, media_type, suffix, options in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, fmt, **options)
+                path = self.write(f"{stem}-{width}w", suffix, buffer.getvalue())
+                srcset[media_type].append((width, f"/static/{path}"))
+                self.bytes_out += buffer.tell()
+
+        largest = srcset[fallback_type][-1][1]
+        self.assets[name] = {
+            "url": largest,
+            "width": image.width,
+            "height": image.height,
+            "type": fallback_type,
+            "srcset": srcset
+        }
+
+    def file(self, name: str, data: bytes):
+        stem, suffix = os.path.splitext(name)
+        path = self.write(stem, suffix, data)
+        self.assets[name] = {"url": f"/static/{path}"}
+        self.bytes_out += len(data)
+        if suffix.lower() in TEXT_SUFFIXES:
+            self.precompress(path, data)
+
+    def build(self):
+        for root, dirs, files in os.walk(self.source):
+            # Never feed a previous build back in
+            dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != self.output)
+            for filename in sorted(files):
+                full_path = os.path.join(root, filename)
+                name = os.path.relpath(full_path, self.source).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    data = f.read()
+                self.bytes_in += len(data)
+                os.makedirs(os.path.join(self.output, os.path.dirname(name)), exist_ok=True)
+                if os.path.splitext(filename)[1].lower() in IMAGE_SUFFIXES:
+                    self.image(name, data)
+                else:
+                    self.file(name, data)
+
+        with open(os.path.join(self.output, "manifest.json"), "w") as f:
+            json.dump({"assets": self.assets, "encodings": self.encodings}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+def main(args) -> int:
+    output = os.path.join(STATIC_DIR, BUILD_DIR)
+    if os.path.exists(output):
+        shutil.rmtree(output)
+    os.makedirs(output)
+
+    start = time.perf_counter()
+    builder = Builder(STATIC_DIR, output)
+    builder.build()
+
+    for name, asset in sorted(builder.assets.items()):
+        print(f"{name:30} {asset['url']}")
+    print(f"Built {len(builder.assets)} assets in {time.perf_counter() - start:.1f}s: "
+          f"{builder.bytes_in / 1024:,.0f} KiB of sources, {builder.bytes_out / 1024:,.0f} KiB of variants")
+    if brotli is None:
+        print("brotli is not installed; only gzip copies were written")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args = parser.parse_args()
+    sys.exit(main(args))
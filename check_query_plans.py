@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Query plan audit for Cifix Hub
+
+Runs EXPLAIN on every hot per-request lookup in app/routes and ReportService
+with sequential scans disabled, so any query that still plans a Seq Scan has
+no usable index. Exits non-zero if one is found.
+
+    python check_query_plans.py            # audit the current database
+    python check_query_plans.py --seed 5000  # seed N students first (local DB only)
+"""
+import argparse
+import asyncio
+import json
+import sys
+from sqlalchemy import select, func, text, exists
+from sqlalchemy.dialects import postgresql
+from app.models import (
+    engine, Student, Module, EnrollmentProgress, AssessmentResult,
+    ModuleAssessment, ModuleAssessmentAttempt, StudentStats
+)
+from app.services.dashboard_service import DashboardSnapshot
+from app.services.page_validators import StudentVersion
+
+def hot_queries():
+    student_id, module_id, assessment_id = 1, 1, 1
+    return [
+        ("module catalog: published modules",
+         select(Module).where(Module.is_published == True).order_by(Module.week_no)),
+        ("dashboard: snapshot (progress, student_stats, latest assessment)",
+         DashboardSnapshot.build_query(student_id)),
+        ("dashboard/report: If-None-Match validator",
+         StudentVersion.build_query(student_id)),
+        ("report: student progress",
+         select(EnrollmentProgress).where(EnrollmentProgress.student_id == student_id)),
+        ("report: student_stats + latest assessment",
+         select(StudentStats, AssessmentResult).outerjoin(
+             AssessmentResult, AssessmentResult.id == StudentStats.latest_assessment_id
+         ).where(StudentStats.student_id == student_id)),
+        ("module detail/complete/submit: progress row",
+         select(EnrollmentProgress).where(
+             EnrollmentProgress.student_id == student_id,
+             EnrollmentProgress.module_id == module_id
+         )),
+        ("assessment_complete: latest assessment",
+         select(AssessmentResult).where(
+             AssessmentResult.student_id == student_id
+         ).order_by(AssessmentResult.completed_at.desc()).limit(1)),
+        ("show_module_assessment: latest attempt",
+         select(ModuleAssessmentAttempt).where(
+             ModuleAssessmentAttempt.assessment_id == assessment_id,
+             ModuleAssessmentAttempt.student_id == student_id
+         ).order_by(ModuleAssessmentAttempt.completed_at.desc())),
+        ("submit_module_assessment: active assessment",
+         select(ModuleAssessment).where(
+             ModuleAssessment.module_id == module_id,
+             ModuleAssessment.is_active == True
+         )),
+        ("parent_login: access code + email",
+         select(Student).where(
+             Student.access_code == "ABC123",
+             Student.parent_email == "parent@example.com"
+         )),
+        # The NOT EXISTS guards of register_student's INSERT ... SELECT
+        ("register_student: email or child (lower(first_name) + age) taken",
+         select(
+             exists().where(Student.parent_email == "parent@example.com"),
+             exists().where(func.lower(Student.first_name) == "alex", Student.age == 8)
+         )),
+    ]
+
+def compile_sql(stmt) -> str:
+    return str(stmt.compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True}
+    ))
+
+def find_seq_scans(plan: dict) -> list:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+async def seed(conn, students: int):
+    print(f"Seeding {students} students with progress, results and attempts...")
+    await conn.execute(text("""
+        INSERT INTO modules (title, week_no, is_published, created_at)
+        SELECT 'Seed Module ' || w, w, w % 4 <> 0, now()
+        FROM generate_series(1, 52) AS w
+    """))
+    await conn.execute(text("""
+        INSERT INTO module_assessments (module_id, title, questions, is_active, created_at)
+        SELECT id, title || ' Assessment', '{"questions": [], "scoring": {}}', true, now()
+        FROM modules WHERE title LIKE 'Seed Module %'
+    """))
+    await conn.execute(text("""
+        INSERT INTO students (first_name, age, parent_email, access_code, created_at)
+        SELECT 'Seed' || s, 5 + s % 12, 'seed' || s || '@example.com',
+               'SD' || lpad(to_hex(s), 8, '0'), now() - (s || ' minutes')::interval
+        FROM generate_series(1, :n) AS s
+    """), {"n": students})
+    await conn.execute(text("""
+        INSERT INTO enrollment_progress (student_id, module_id, status, stars, updated_at)
+        SELECT s.id, m.id, 'DONE', 3, now()
+        FROM students s CROSS JOIN modules m
+        WHERE s.parent_email LIKE 'seed%@example.com' AND m.week_no <= 20
+    """))
+    await conn.execute(text("""
+        INSERT INTO assessment_results (student_id, raw_score, level, stars_earned, completed_at)
+        SELECT s.id, 50 + g * 5, 'Explorer', 3, now() - (g || ' days')::interval
+        FROM students s CROSS JOIN generate_series(1, 5) AS g
+        WHERE s.parent_email LIKE 'seed%@example.com'
+    """))
+    await conn.execute(text("""
+        INSERT INTO module_assessment_attempts
+            (assessment_id, student_id, answers, score, percentage, stars_earned, completed_at)
+        SELECT a.id, s.id, '{}', g % 11, (g % 11) * 10, 1 + g % 3, now() - (g || ' hours')::interval
+        FROM students s
+        CROSS JOIN module_assessments a
+        CROSS JOIN generate_series(1, 2) AS g
+        WHERE s.parent_email LIKE 'seed%@example.com'
+    """))
+    for table in ("modules", "module_assessments", "students", "enrollment_progress",
+                  "assessment_results", "module_assessment_attempts"):
+        await conn.execute(text(f"ANALYZE {table}"))
+
+async def check_query_plans(seed_students: int = 0) -> bool:
+    failures = []
+
+    async with engine.begin() as conn:
+        if seed_students:
+            await seed(conn, seed_students)
+
+        # With seq scans disabled the planner only picks one when nothing else can serve the query
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+
+        for name, stmt in hot_queries():
+            sql = compile_sql(stmt)
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            seq_scans = find_seq_scans(plan[0]["Plan"])
+
+            if seq_scans:
+                failures.append(name)
+                print(f"  FAIL  {name}: Seq Scan on {', '.join(seq_scans)}")
+            else:
+                print(f"  ok    {name}")
+
+    await engine.dispose()
+
+    if failures:
+        print(f"\n{len(failures)} hot queries fall back to a sequential scan")
+        return False
+
+    print("\nAll hot queries are index-backed")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0, metavar="N",
+                        help="seed N students with related rows before auditing")
+    args = parser.parse_args()
+
+    ok = asyncio.run(check_query_plans(args.seed))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Check the incrementally maintained stats against the tables they summarise
+
+Recounts every dashboard counter in stat_counters with COUNT(*) and
+recomputes the per-class aggregates in cohort_stats and the per-student
+totals in student_stats, reporting any drift, e.g. after rows were
+inserted or deleted with plain SQL. Exits non-zero on
+drift unless --fix is given, which rewrites the stats in place.
+
+    python reconcile_stats.py          # verify only
+    python reconcile_stats.py --fix
+"""
+import argparse
+import asyncio
+import sys
+from app.models import engine, async_session
+from app.services.counters import CounterService
+from app.services.cohort_analytics import CohortAnalytics
+from app.services.student_stats import StudentStatsService, COMPARED
+
+SHOW_STUDENTS = 20
+
+async def reconcile(fix: bool) -> int:
+    async with async_session() as db:
+        mismatched = await CounterService.reconcile(db, fix=fix)
+        cohorts = await CohortAnalytics.reconcile(db, fix=fix)
+        students = await StudentStatsService.reconcile(db, fix=fix)
+        await db.commit()
+    await engine.dispose()
+
+    for name, (counter, actual) in mismatched.items():
+        print(f"counter {name}: {counter:,} recorded, {actual:,} actual{' (fixed)' if fix else ''}")
+    for (class_label, metric, key), (stored, actual) in sorted(cohorts.items()):
+        name = f"{metric} {key}".strip()
+        print(f"cohort {class_label} {name}: {stored[0]:,} / {stored[1]:g} recorded, "
+              f"{actual[0]:,} / {actual[1]:g} actual{' (fixed)' if fix else ''}")
+    for student_id, (stored, actual) in list(students.items())[:SHOW_STUDENTS]:
+        changes = ", ".join(
+            f"{column} {old} -> {new}" for column, old, new in zip(COMPARED, stored, actual) if old != new
+        )
+        print(f"student {student_id}: {changes}")
+    if len(students) > SHOW_STUDENTS:
+        print(f"... {len(students) - SHOW_STUDENTS:,} more students drifted")
+    if students:
+        print(f"student_stats: {len(students):,} students drifted{' (rebuilt)' if fix else ''}")
+    if not mismatched and not cohorts and not students:
+        print("Counters, cohort stats and student stats match the tables")
+    return 1 if (mismatched or cohorts or students) and not fix else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fix", action="store_true", help="rewrite stats that have drifted")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(reconcile(args.fix)))
@@ -0,0 +1,26 @@
+"""
+Tests run against a throwaway Postgres database named by TEST_DATABASE_URL
+and migrated with `alembic upgrade head`, e.g.
+
+    createdb cifix_test
+    DATABASE_URL=postgresql+asyncpg://localhost/cifix_test alembic upgrade head
+    TEST_DATABASE_URL=postgresql+asyncpg://localhost/cifix_test python -m pytest tests
+
+Each test creates its own students and modules and leaves them behind.
+Without TEST_DATABASE_URL every test is skipped.
+"""
+import os
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # Before anything imports app.config
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ["METRICS_ENABLED"] = "false"
+
+def pytest_collection_modifyitems(config, items):
+    if TEST_DATABASE_URL:
+        return
+    skip = pytest.mark.skip(reason="TEST_DATABASE_URL is not set")
+    for item in items:
+        item.add_marker(skip)
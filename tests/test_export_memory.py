@@ -0,0 +1,80 @@
+"""
+The assessments CSV export streams from a server-side cursor, so its memory
+must not grow with the number of rows exported. Set EXPORT_TEST_ROWS to
+export more than the default (e.g. 1000000, as benchmarks.csv_export does).
+"""
+import asyncio
+import os
+import tracemalloc
+import uuid
+from app.models import engine, async_session, Student
+from app.services.export_service import ExportService
+from sqlalchemy import text
+
+LARGE = int(os.getenv("EXPORT_TEST_ROWS", "200000"))
+SMALL = LARGE // 10
+# Allowed peak for the large export: the small one's, plus headroom for the
+# driver's and csv module's buffers
+GROWTH = 1.5
+SLACK_BYTES = 2 * 1024 * 1024
+
+async def seed(class_label: str, rows: int) -> int:
+    async with async_session() as db:
+        student = Student(
+            first_name=class_label, age=9, parent_email=f"{class_label}@example.com",
+            access_code=uuid.uuid4().hex[:12], class_label=class_label
+        )
+        db.add(student)
+        await db.flush()
+        await db.execute(text("""
+            INSERT INTO assessment_results
+                (student_id, raw_score, level, domain_breakdown, stars_earned, recommendation, completed_at)
+            SELECT :student_id, 40 + g % 60, 'Explorer',
+                   '{"logic": 15, "creativity": 20, "math": 18, "focus": 25}', 3,
+                   'Keep practising!', now() - (g || ' seconds')::interval
+            FROM generate_series(1, :rows) AS g
+        """), {"student_id": student.id, "rows": rows})
+        await db.commit()
+        return student.id
+
+async def cleanup(student_ids):
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM assessment_results WHERE student_id = ANY(:ids)"), {"ids": student_ids})
+        await conn.execute(text("DELETE FROM students WHERE id = ANY(:ids)"), {"ids": student_ids})
+
+async def export_peak(class_label: str) -> tuple:
+    """(data rows exported, peak traced bytes above what was allocated beforehand)"""
+    tracemalloc.reset_peak()
+    start, _ = tracemalloc.get_traced_memory()
+    lines = 0
+    async for chunk in ExportService.iter_assessments_csv(class_label=class_label):
+        lines += chunk.count("\n")
+    _, peak = tracemalloc.get_traced_memory()
+    return lines - 1, peak - start
+
+async def run():
+    small_class, large_class = f"export-{uuid.uuid4().hex[:8]}", f"export-{uuid.uuid4().hex[:8]}"
+    student_ids = []
+    try:
+        student_ids.append(await seed(small_class, SMALL))
+        student_ids.append(await seed(large_class, LARGE))
+        # Warm up connections, statement caches and the csv module outside the measurement
+        await export_peak(small_class)
+
+        tracemalloc.start()
+        try:
+            small_rows, small_peak = await export_peak(small_class)
+            large_rows, large_peak = await export_peak(large_class)
+        finally:
+            tracemalloc.stop()
+
+        assert (small_rows, large_rows) == (SMALL, LARGE)
+        assert large_peak <= small_peak * GROWTH + SLACK_BYTES, (
+            f"peak {large_peak / 2**20:.1f} MiB for {LARGE:,} rows vs {small_peak / 2**20:.1f} MiB for {SMALL:,}"
+        )
+    finally:
+        await cleanup(student_ids)
+        await engine.dispose()
+
+def test_export_memory_does_not_grow_with_rows():
+    asyncio.run(run())
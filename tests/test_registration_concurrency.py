@@ -0,0 +1,37 @@
+"""
+A sign-up that races another for the same parent email must be turned away
+once the first commits, not inserted alongside it.
+"""
+import asyncio
+import uuid
+import httpx
+from app.main import app
+from app.models import engine, async_session, Student
+from sqlalchemy import select, func
+
+async def run():
+    email = f"race-{uuid.uuid4().hex[:8]}@example.com"
+    try:
+        # An in-flight registration: holds the email's lock with its row not yet committed
+        async with async_session() as first:
+            await first.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"register-email:{email}"))))
+            first.add(Student(first_name="First", age=7, parent_email=email, access_code=uuid.uuid4().hex[:12]))
+            await first.flush()
+
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                second = asyncio.create_task(client.post(
+                    "/register", data={"first_name": "Second", "age": "8", "parent_email": email}
+                ))
+                await asyncio.sleep(0.5)
+                assert not second.done(), "the second sign-up should wait for the first to commit"
+                await first.commit()
+                response = await second
+
+        assert "A student with this parent email is already registered" in response.text
+        async with async_session() as db:
+            assert await db.scalar(select(func.count()).where(Student.parent_email == email)) == 1
+    finally:
+        await engine.dispose()
+
+def test_concurrent_registration_with_same_email_is_rejected():
+    asyncio.run(run())